@@ -1,54 +1,38 @@
+from django.conf import settings
 from django.shortcuts import redirect
-from django.urls import reverse, resolve, Resolver404
 from django.contrib.auth import logout
 import time
 import logging
 
+from core.paths import get_path_matcher
+
 # Global variable to track server start time
 SERVER_START_TIME = time.time()
+# Session key holding the server start time at login (see accounts.signals)
+SESSION_START_TIME_KEY = 'server_start_time'
 logger = logging.getLogger(__name__)
 
-# Forcing a reload to fix stale code issue.
 class AuthRequiredMiddleware:
+    """
+    Redirect anonymous users to the landing page unless the URL is exempt.
+
+    Exempt URL names and path prefixes come from LOGIN_EXEMPT_URL_NAMES and
+    LOGIN_EXEMPT_PATH_PREFIXES; the check goes through the shared, precompiled
+    core.paths matcher rather than resolving every anonymous request.
+    """
+
     def __init__(self, get_response):
         self.get_response = get_response
-        # Define URL names that do not require authentication.
-        self.exempt_urls = [
-            'home',
-            'accounts:login',
-            'accounts:logout',
-            'password_reset',
-            'password_reset_done',
-            'password_reset_confirm',
-            'password_reset_complete',
-            'accounts:register_donor',
-            'accounts:register_org',
-        ]
-        # Define path prefixes that do not require authentication.
-        self.exempt_path_prefixes = [
-            '/__django_admin__/',
-        ]
+        # Build the matcher at startup rather than on the first request
+        get_path_matcher()
 
     def __call__(self, request):
         # If the user is authenticated, we don't need to do anything.
         if request.user.is_authenticated:
             return self.get_response(request)
 
-        # Check if the requested path starts with an exempt prefix.
-        for prefix in self.exempt_path_prefixes:
-            if request.path.startswith(prefix):
-                return self.get_response(request)
-
-        # Check if the requested URL name is in the exempt list.
-        try:
-            resolved_path = resolve(request.path_info)
-            url_name = resolved_path.view_name
-            if url_name in self.exempt_urls:
-                return self.get_response(request)
-        except Resolver404:
-            # If the path doesn't resolve, it's not a named URL.
-            # We'll let it fall through to the redirect.
-            pass
+        if get_path_matcher(getattr(request, 'urlconf', None)).is_exempt(request.path_info):
+            return self.get_response(request)
 
         # If the user is not authenticated and the URL is not exempt, redirect to the landing page.
         return redirect('home')
@@ -58,34 +42,76 @@ class ServerRestartMiddleware:
     """
     Middleware to detect server restarts and clear user sessions.
     
-    This middleware stores the server start time in the user's session.
-    If the stored start time doesn't match the current server start time,
-    it means the server has been restarted since the user's last request.
-    In that case, it logs the user out for security and UX consistency.
+    Authenticated browsers carry a signed cookie holding the server start
+    time (the restart epoch), bound to their session key through the
+    signing salt. If the cookie is from before the current start time, the
+    server has been restarted since the user's last request and the user is
+    logged out for security and UX consistency.
+    
+    The check is done from cookies alone, so the common case (a current
+    epoch cookie for the current session) never touches the session store.
+    When the cookie is missing or belongs to another session, the start
+    time stamped in the session at login decides instead: a session from
+    this server run gets a fresh cookie, any other is logged out. Leaving
+    the cookie out therefore does not get around the restart logout.
     """
     
     def __init__(self, get_response):
         self.get_response = get_response
+        self.epoch = str(SERVER_START_TIME)
         logger.info(f"Server started at: {SERVER_START_TIME}")
     
+    @staticmethod
+    def _salt(session_key):
+        return f'accounts.restart-epoch:{session_key}'
+    
+    def _epoch(self, request, session_key):
+        """The epoch in the cookie, or None if it is missing or not for this session."""
+        cookie_name = settings.RESTART_EPOCH_COOKIE_NAME
+        return request.get_signed_cookie(cookie_name, default=None, salt=self._salt(session_key))
+    
+    def _logged_in_this_run(self, request):
+        """Whether the session was logged in since the server started (one session read)."""
+        start_time = request.session.get(SESSION_START_TIME_KEY)
+        return start_time is not None and str(float(start_time)) == self.epoch
+    
+    def _set_epoch(self, response, session_key):
+        response.set_signed_cookie(
+            settings.RESTART_EPOCH_COOKIE_NAME,
+            self.epoch,
+            salt=self._salt(session_key),
+            max_age=None if settings.SESSION_EXPIRE_AT_BROWSER_CLOSE else settings.SESSION_COOKIE_AGE,
+            domain=settings.SESSION_COOKIE_DOMAIN,
+            path=settings.SESSION_COOKIE_PATH,
+            secure=settings.SESSION_COOKIE_SECURE,
+            httponly=True,
+            samesite=settings.SESSION_COOKIE_SAMESITE,
+        )
+    
     def __call__(self, request):
         # Process the request first
         response = self.get_response(request)
         
         # After request processing, handle the server restart check
         # This ensures login flows complete before we check timestamps
-        if request.user.is_authenticated:
-            # Store the current server time for new sessions
-            current_time = request.session.get('server_start_time')
-            
-            if not current_time:
-                # New session, just set the time
-                request.session['server_start_time'] = SERVER_START_TIME
-            elif float(current_time) != SERVER_START_TIME:
-                # Server restart detected for existing session
-                logger.info(f"Server restart detected for user {request.user.username}. Logging out.")
-                logout(request)
-                # Redirect to home page after logout
-                return redirect('home')
+        sent_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        # Reading the key does not load the session; login changes it
+        session_key = request.session.session_key
+        epoch = self._epoch(request, sent_key) if sent_key and session_key == sent_key else None
+        if epoch == self.epoch:
+            return response
+        
+        if not request.user.is_authenticated:
+            return response
         
-        return response
+        if epoch is None and self._logged_in_this_run(request):
+            # Logged in during this request, switched accounts, or the cookie
+            # was lost: the session vouches for the epoch, so stamp it
+            self._set_epoch(response, session_key)
+            return response
+        
+        # Server restart detected for existing session
+        logger.info(f"Server restart detected for user {request.user.username}. Logging out.")
+        logout(request)
+        # Redirect to home page after logout
+        return redirect('home')
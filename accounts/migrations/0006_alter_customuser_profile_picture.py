@@ -0,0 +1,21 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:32
+
+import accounts.models
+import core.fields
+import core.validators
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='profile_picture',
+            field=core.fields.LimitedImageField(blank=True, help_text='Profile picture (max 512x512px, 1MB, formats: JPEG, PNG)', null=True, upload_to=accounts.models.user_profile_path, validators=[core.validators.ImageUploadValidator(1, 512, 512, ['JPEG', 'PNG'])]),
+        ),
+    ]
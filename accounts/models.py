@@ -3,7 +3,8 @@ from django.db import models
 from django.conf import settings
 import os
 from organizations.models import Organisation # Import from modularized organizations app
-from core.validators import FileSizeValidator, ImageDimensionsValidator, ImageFormatValidator
+from core.fields import LimitedImageField
+from core.validators import ImageUploadValidator
 
 def user_profile_path(instance, filename):
     # File will be uploaded to MEDIA_ROOT/user_<id>/<filename>
@@ -17,14 +18,12 @@ class CustomUser(AbstractUser):
         ('admin', 'Admin'),
     )
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='donor')
-    profile_picture = models.ImageField(
+    profile_picture = LimitedImageField(
         upload_to=user_profile_path, 
         blank=True, 
         null=True, 
         validators=[
-            FileSizeValidator(1),  # 1 MB limit
-            ImageDimensionsValidator(512, 512),  # 512x512px max
-            ImageFormatValidator(['JPEG', 'PNG']),  # Profile picture formats
+            ImageUploadValidator(1, 512, 512, ['JPEG', 'PNG']),  # 1 MB, 512x512px max
         ],
         help_text='Profile picture (max 512x512px, 1MB, formats: JPEG, PNG)'
     )
@@ -37,6 +36,12 @@ class CustomUser(AbstractUser):
         help_text='The organisation this user owns or manages, if applicable.'
     )
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Admin donor lists and counters filter on role
+            models.Index(fields=['role'], name='user_role_idx'),
+        ]
+
     def __str__(self):
         return self.username
 
@@ -0,0 +1,20 @@
+"""
+Signal handlers for the accounts app.
+"""
+from django.contrib.auth.signals import user_logged_in
+from django.dispatch import receiver
+
+from . import middleware
+
+
+@receiver(user_logged_in)
+def stamp_server_start_time(sender, request, user, **kwargs):
+    """
+    Record the server start time in the session at login.
+
+    ServerRestartMiddleware falls back to it when a request arrives without
+    a restart-epoch cookie for its session. Login saves the session anyway,
+    so this costs no extra write.
+    """
+    if request is not None and hasattr(request, 'session'):
+        request.session[middleware.SESSION_START_TIME_KEY] = middleware.SERVER_START_TIME
@@ -1,9 +1,14 @@
+from importlib import import_module
+from unittest import mock
+
+from django.conf import settings
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from funding.models import Organisation
 
 CustomUser = get_user_model()
+SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
 
 class DonorRegistrationTests(TestCase):
     def setUp(self):
@@ -122,3 +127,62 @@ class DashboardAccessTests(TestCase):
         self.assertEqual(response.status_code, 403)
         response = self.client.get(self.donor_dashboard_url)
         self.assertEqual(response.status_code, 403)
+
+
+class ServerRestartMiddlewareTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.donor_user = CustomUser.objects.create_user(username='testdonor', password='password123', role='donor')
+        self.client.post(reverse('accounts:login'), {'username': 'testdonor', 'password': 'password123'})
+        self.url = reverse('campaigns:list')
+
+    def restarted_client(self, start_time):
+        # A new client builds a new middleware chain, which reads the start time
+        with mock.patch('accounts.middleware.SERVER_START_TIME', start_time):
+            client = Client()
+            client.cookies = self.client.cookies
+            response = client.get(self.url)
+        return client, response
+
+    def test_login_stamps_epoch_without_session_writes(self):
+        self.assertIn(settings.RESTART_EPOCH_COOKIE_NAME, self.client.cookies)
+
+        with mock.patch.object(SessionStore, 'save') as save:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        save.assert_not_called()
+
+    def test_restart_logs_user_out(self):
+        client, response = self.restarted_client(1.0)
+
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+        self.assertNotIn('_auth_user_id', client.session)
+
+    def test_cookie_from_another_session_is_replaced(self):
+        # e.g. switching accounts without this middleware seeing the login
+        other_user = CustomUser.objects.create_user(username='otherdonor', password='password123', role='donor')
+        cookie = self.client.cookies[settings.RESTART_EPOCH_COOKIE_NAME].value
+        self.client.force_login(other_user)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.cookies[settings.RESTART_EPOCH_COOKIE_NAME].value, cookie)
+        _, response = self.restarted_client(1.0)
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+
+    def test_missing_cookie_is_restamped_for_a_session_from_this_run(self):
+        del self.client.cookies[settings.RESTART_EPOCH_COOKIE_NAME]
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(settings.RESTART_EPOCH_COOKIE_NAME, response.cookies)
+
+    def test_dropping_the_cookie_does_not_avoid_restart_logout(self):
+        del self.client.cookies[settings.RESTART_EPOCH_COOKIE_NAME]
+
+        client, response = self.restarted_client(1.0)
+
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+        self.assertNotIn('_auth_user_id', client.session)
@@ -156,12 +156,12 @@ class DonorOrganizationListView(LoginRequiredMixin, DonorRequiredMixin, Template
         user = self.request.user
         
         # Get all active organizations
-        active_organizations = Organisation.objects.filter(is_active=True).order_by('name')
+        active_organizations = Organisation.objects.filter(is_active=True).with_stats().order_by('name')
         
         # Get organizations this donor has supported
         supported_orgs = Organisation.objects.filter(
-            campaigns__donations__donor=user
-        ).distinct()
+            pk__in=Organisation.objects.filter(campaigns__donations__donor=user).values('pk')
+        ).with_stats()
         
         # Get recommended organizations - for now just exclude supported ones
         recommended_orgs = active_organizations.exclude(
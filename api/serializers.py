@@ -2,6 +2,7 @@ from rest_framework import serializers
 
 from campaigns.models import Campaign
 from organizations.models import Organisation  
+from donations.forms import MAX_DONATION_AMOUNT, MIN_DONATION_AMOUNT
 from donations.models import Donation
 from tags.models import Tag
 from accounts.models import CustomUser
@@ -66,13 +67,18 @@ class DonationSerializer(serializers.ModelSerializer):
     """
     donor_name = serializers.SerializerMethodField()
     campaign_title = serializers.ReadOnlyField(source='campaign.title')
+    # Donations are only taken for active campaigns, within the form's limits
+    campaign = serializers.PrimaryKeyRelatedField(queryset=Campaign.objects.filter(status='active'))
+    amount = serializers.IntegerField(min_value=MIN_DONATION_AMOUNT, max_value=MAX_DONATION_AMOUNT)
+    is_anonymous = serializers.ReadOnlyField()
     
     class Meta:
         model = Donation
         fields = [
-            'id', 'user', 'donor_name', 'campaign', 'campaign_title',
+            'id', 'donor', 'donor_name', 'campaign', 'campaign_title',
             'amount', 'comment', 'is_anonymous', 'reference_number', 'created_at'
         ]
+        read_only_fields = ['donor', 'reference_number', 'created_at']
     
     def get_donor_name(self, obj):
         """
@@ -80,7 +86,7 @@ class DonationSerializer(serializers.ModelSerializer):
         """
         if obj.is_anonymous:
             return "Anonymous"
-        if obj.user:
-            name = f"{obj.user.first_name} {obj.user.last_name}".strip()
-            return name if name else obj.user.username
+        if obj.donor:
+            name = f"{obj.donor.first_name} {obj.donor.last_name}".strip()
+            return name if name else obj.donor.username
         return "Anonymous"
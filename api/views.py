@@ -1,13 +1,22 @@
-from rest_framework import viewsets, permissions, filters
+from functools import partial
+
+from rest_framework import viewsets, mixins, permissions, filters, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
 from django.utils import timezone
 
 from campaigns.models import Campaign
 from organizations.models import Organisation
+from donations.idempotency import idempotent
+from donations.ingest import ingest
 from donations.models import Donation
 from tags.models import Tag
 from accounts.models import CustomUser
+from core.conditional import ConditionalReadMixin
+from core.pagination import CreatedAtCursorPagination
+from utils.constants import UserRoles
+from search.filters import FullTextSearchFilter
 
 from .serializers import (
     CampaignSerializer, OrganisationSerializer,
@@ -28,14 +37,16 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
     lookup_field = 'slug'
 
 
-class OrganisationViewSet(viewsets.ModelViewSet):
+class OrganisationViewSet(ConditionalReadMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows organizations to be viewed or edited.
     """
     queryset = Organisation.objects.filter(is_active=True)
+    # The payload holds organisation fields only
+    list_validator_options = retrieve_validator_options = {'campaigns': False}
     serializer_class = OrganisationSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [FullTextSearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'mission']
     ordering_fields = ['name', 'created_at']
     
@@ -60,14 +71,15 @@ class OrganisationViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class CampaignViewSet(viewsets.ModelViewSet):
+class CampaignViewSet(ConditionalReadMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows campaigns to be viewed or edited.
     """
     queryset = Campaign.objects.all()
+    list_validator_options = {'latest_donation': False}
     serializer_class = CampaignSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [FullTextSearchFilter, filters.OrderingFilter]
     search_fields = ['title', 'description', 'category']
     ordering_fields = ['created_at', 'end_date', 'current_amount']
     
@@ -115,42 +127,70 @@ class CampaignViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class DonationViewSet(viewsets.ModelViewSet):
+class DonationViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+                      viewsets.GenericViewSet):
     """
     API endpoint that allows donations to be viewed or created.
+
+    Donations cannot be edited or deleted here: the campaign funding
+    counters are only maintained for new and deleted rows.
     """
     queryset = Donation.objects.all()
     serializer_class = DonationSerializer
-    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
     
     def get_queryset(self):
         """
-        Filter donations based on query parameters and user permissions:
-        - If admin, see all donations
-        - If authenticated, see own donations and public anonymous donations
-        - If not authenticated, see only public anonymous donations
+        Return the donations visible to the user: staff see all of them,
+        everyone else only their own.
         """
-        user = self.request.user
-        
-        if user.is_staff:
-            return Donation.objects.all()
-        
-        if user.is_authenticated:
-            # User can see their own donations and public non-anonymous donations
-            return Donation.objects.filter(
-                user=user
-            ) | Donation.objects.filter(
-                is_anonymous=False
-            )
-        
-        # Unauthenticated users can only see public non-anonymous donations
-        return Donation.objects.filter(is_anonymous=False)
+        queryset = Donation.objects.select_related('donor', 'campaign')
+        if self.request.user.is_staff:
+            return queryset
+        return queryset.filter(donor=self.request.user)
+    
+    def create(self, request, *args, **kwargs):
+        """
+        Create a donation; retries carrying the same Idempotency-Key get
+        the first response back instead of creating another.
+        """
+        if request.user.role != UserRoles.DONOR or request.user.is_staff:
+            raise PermissionDenied('Only donors can make donations.')
+        return idempotent(
+            request, request.user, 'api.donations.create',
+            partial(super().create, request, *args, **kwargs),
+            prepare=lambda response: self.finalize_response(request, response, *args, **kwargs),
+        )
     
     def perform_create(self, serializer):
         """
-        Set the user to the current authenticated user when creating a donation.
+        Set the donor to the current authenticated user when creating a donation.
         """
-        serializer.save(user=self.request.user)
+        serializer.save(donor=self.request.user)
+
+    # Largest batch accepted in one request; bigger files go through
+    # `manage.py import_donations`
+    bulk_max_rows = 5000
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def bulk(self, request):
+        """
+        Import a batch of offline or partner donations.
+
+        Takes a JSON list of rows (campaign, donor or donor_email, amount and
+        optionally reference_number, comment and source). Valid rows are
+        created even if others fail; the response lists the errors by row.
+        """
+        rows = request.data
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValidationError('Expected a JSON list of donation objects.')
+        if len(rows) > self.bulk_max_rows:
+            raise ValidationError(f'At most {self.bulk_max_rows} donations can be imported per request.')
+
+        result = ingest(rows)
+        response_status = status.HTTP_201_CREATED if result.created else status.HTTP_400_BAD_REQUEST
+        return Response(result.as_dict(), status=response_status)
 
 
 class UserViewSet(viewsets.ReadOnlyModelViewSet):
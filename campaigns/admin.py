@@ -8,7 +8,7 @@ class CampaignAdmin(admin.ModelAdmin):
     list_display = ('title', 'organisation', 'funding_goal', 'status', 'created_at')
     list_filter = ('status', 'category', 'created_at')
     search_fields = ('title', 'description', 'organisation__name')
-    readonly_fields = ('created_at', 'updated_at', 'closed_at')
+    readonly_fields = ('created_at', 'updated_at', 'closed_at', 'total_raised', 'donation_count', 'donor_count')
     raw_id_fields = ('organisation', 'created_by')
     
     fieldsets = (
@@ -21,6 +21,9 @@ class CampaignAdmin(admin.ModelAdmin):
         ('Status', {
             'fields': ('status', 'rejection_reason')
         }),
+        ('Funding', {
+            'fields': ('total_raised', 'donation_count', 'donor_count')
+        }),
         ('Dates', {
             'fields': ('created_at', 'updated_at', 'closed_at'),
             'classes': ('collapse',)
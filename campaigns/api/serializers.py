@@ -2,6 +2,7 @@
 API serializers for Campaign models.
 """
 from rest_framework import serializers
+from campaigns.counters import live_counters
 from campaigns.models import Campaign
 from organizations.models import Organisation
 from accounts.models import CustomUser
@@ -78,12 +79,29 @@ class CampaignDetailSerializer(CampaignListSerializer):
     """
     recent_donations = serializers.SerializerMethodField()
     updates = serializers.SerializerMethodField()
+    total_raised = serializers.SerializerMethodField()
     
     class Meta(CampaignListSerializer.Meta):
         fields = CampaignListSerializer.Meta.fields + [
             'content', 'category', 'recent_donations', 'updates'
         ]
     
+    def get_total_raised(self, obj):
+        """
+        Total raised including unfolded counter shards (see campaigns.counters);
+        lists read the stored counter, which folds catch up.
+        """
+        return live_counters(obj)['total_raised']
+    
+    def get_progress_percentage(self, obj):
+        """
+        Calculate percentage of funding goal achieved, from the live total.
+        """
+        if not obj.funding_goal or obj.funding_goal <= 0:
+            return 0
+            
+        return min(100, int((self.get_total_raised(obj) / obj.funding_goal) * 100))
+    
     def get_recent_donations(self, obj):
         """
         Get recent donations for this campaign.
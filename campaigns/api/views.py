@@ -7,6 +7,9 @@ from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 
 from campaigns.models import Campaign
+from core.conditional import ConditionalReadMixin
+from core.pagination import CreatedAtCursorPagination
+from search.filters import FullTextSearchFilter
 from .serializers import (
     CampaignListSerializer,
     CampaignDetailSerializer,
@@ -26,7 +29,7 @@ class IsStaffOrReadOnly(permissions.BasePermission):
         return request.user and request.user.is_staff
 
 
-class CampaignViewSet(viewsets.ModelViewSet):
+class CampaignViewSet(ConditionalReadMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing campaigns.
     
@@ -49,11 +52,15 @@ class CampaignViewSet(viewsets.ModelViewSet):
     Delete a campaign.
     """
     queryset = Campaign.objects.all()
+    list_validator_options = {'latest_donation': False}
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = CreatedAtCursorPagination
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'category', 'organization']
     search_fields = ['title', 'description', 'content']
-    ordering_fields = ['created_at', 'end_date', 'total_raised', 'funding_goal']
+    # Cursor pagination positions on the ordering, so only the unique-enough
+    # created_at (with an id tiebreaker, see CreatedAtCursorPagination)
+    ordering_fields = ['created_at']
     lookup_field = 'slug'
     
     def get_serializer_class(self):
@@ -5,3 +5,7 @@ class CampaignsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'campaigns'
     verbose_name = 'Campaign Management'
+
+    def ready(self):
+        # Invalidate cached campaign pages on edits and donations
+        from . import signals  # noqa: F401
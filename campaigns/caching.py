@@ -0,0 +1,66 @@
+"""
+Versioned caching for campaign pages.
+
+Each campaign has a version number in the cache. Cached context and
+template fragments for the campaign include that version in their keys, so
+bumping it (on a donation, or when the campaign is edited) makes every
+cached piece unreachable at once; the stale entries simply expire.
+
+Versions start from the current time in milliseconds rather than 1, so a
+version evicted from the cache cannot restart at a value that older
+fragments were stored under.
+"""
+import time
+
+from django.core.cache import cache
+
+# How long cached fragments and context live without a bump
+CAMPAIGN_CACHE_TIMEOUT = 60 * 60
+
+# Versions outlive the fragments keyed on them
+VERSION_TIMEOUT = CAMPAIGN_CACHE_TIMEOUT * 24
+
+RECENT_DONATIONS_LIMIT = 5
+
+
+def version_key(campaign_id):
+    return f'campaign:{campaign_id}:version'
+
+
+def _new_version():
+    return int(time.time() * 1000)
+
+
+def get_version(campaign_id):
+    """Return the campaign's current cache version, creating one if needed."""
+    return cache.get_or_set(version_key(campaign_id), _new_version, VERSION_TIMEOUT)
+
+
+def bump_version(campaign_id):
+    """Invalidate everything cached for the campaign."""
+    try:
+        cache.incr(version_key(campaign_id))
+    except ValueError:
+        cache.set(version_key(campaign_id), _new_version(), VERSION_TIMEOUT)
+
+
+def cached_for_campaign(campaign_id, name, compute, version=None):
+    """
+    Return `compute()` cached under the campaign's current version.
+
+    Pass `version` when the caller has already looked it up, to save a
+    cache round trip.
+    """
+    if version is None:
+        version = get_version(campaign_id)
+    key = f'campaign:{campaign_id}:{version}:{name}'
+    return cache.get_or_set(key, compute, CAMPAIGN_CACHE_TIMEOUT)
+
+
+def recent_donations(campaign, version=None, limit=RECENT_DONATIONS_LIMIT):
+    """The campaign's latest donations, with donors, as a cached list."""
+    def compute():
+        return list(
+            campaign.donations.select_related('donor').order_by('-created_at', '-id')[:limit]
+        )
+    return cached_for_campaign(campaign.pk, f'recent-donations:{limit}', compute, version=version)
@@ -0,0 +1,201 @@
+"""
+Sharded campaign funding counters.
+
+Every donation adds to its campaign's counters (total_raised,
+donation_count, donor_count). When one campaign goes viral those updates
+all queue on the campaign row's lock. With CAMPAIGN_COUNTER_SHARDS = N a
+donation instead adds to one of N CampaignCounterShard rows, picked from
+the donor so that one donor's donations to a campaign always share a row
+(see lock_counter_row), so concurrent donations mostly lock different rows.
+
+A campaign's live counters are then its own columns plus its shards.
+live_counters() sums them in one query and caches the result for
+CAMPAIGN_COUNTER_CACHE_TTL seconds; `manage.py fold_campaign_counters`
+periodically moves the shards back into the campaign row, which is what
+lists, dashboards and aggregates read. Code that writes absolute counter
+values (deletes, bulk ingestion, sync_campaign_counters) folds a
+campaign's shards first, which also locks its row, and then writes the
+recount less any shards added since: a donation that commits in between
+is in the recount and in a shard, and must not be counted twice.
+
+With CAMPAIGN_COUNTER_SHARDS = 0 (the default) donations update the
+campaign row directly and reads never look at shards; fold any leftover
+shards after turning sharding off.
+"""
+import random
+from collections import defaultdict
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, OuterRef, PositiveBigIntegerField, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from .caching import bump_version
+from .models import COUNTER_FIELDS, Campaign, CampaignCounterShard
+
+FOLD_BATCH_SIZE = 500
+
+
+def shard_count():
+    return getattr(settings, 'CAMPAIGN_COUNTER_SHARDS', 0)
+
+
+def live_counters_key(campaign_id):
+    return f'campaign:{campaign_id}:live-counters'
+
+
+def per_campaign(values):
+    """A CASE expression giving each campaign id in `values` its value, 0 for others."""
+    return Case(
+        *[When(pk=campaign_id, then=Value(value)) for campaign_id, value in values.items()],
+        default=Value(0),
+        output_field=PositiveBigIntegerField(),
+    )
+
+
+def refresh_cached_counters(campaign_ids):
+    """
+    Drop the campaigns' cached live counters, then bump their page versions
+    so no fragment stays cached with the old values.
+    """
+    cache.delete_many([live_counters_key(campaign_id) for campaign_id in campaign_ids])
+    for campaign_id in campaign_ids:
+        bump_version(campaign_id)
+
+
+def pick_shard(shard_key=None):
+    """The shard for `shard_key`, or a random one when there is no key."""
+    shards = shard_count()
+    return random.randrange(shards) if shard_key is None else shard_key % shards
+
+
+def lock_counter_row(campaign_id, shard_key=None):
+    """
+    Lock the row that add_to_counters(campaign_id, shard_key=shard_key) will
+    add to, until the caller's transaction ends: the campaign row, or with
+    sharding the key's shard, which is created if needed.
+
+    Callers that must read before they add (such as "is this the donor's
+    first donation?") lock first, so that concurrent callers with the same
+    key take turns and each reads what the one before it committed.
+    """
+    if not shard_count():
+        list(Campaign.objects.select_for_update().filter(pk=campaign_id).values_list('pk'))
+        return
+    shard = pick_shard(shard_key)
+    locked = CampaignCounterShard.objects.select_for_update().filter(campaign_id=campaign_id, shard=shard)
+    if list(locked.values_list('pk')):
+        return
+    try:
+        # The new row stays locked until the transaction ends
+        with transaction.atomic():
+            CampaignCounterShard.objects.create(campaign_id=campaign_id, shard=shard)
+    except IntegrityError:
+        # Another caller created this shard first
+        list(locked.values_list('pk'))
+
+
+def add_to_counters(campaign_id, total_raised=0, donation_count=0, donor_count=0, shard_key=None):
+    """
+    Add to a campaign's counters, through a shard when sharding is on: the
+    one for `shard_key`, or a random one.
+
+    A sharded increment refreshes the cached live counters straight away and
+    again once it commits, as campaigns.signals does for page versions.
+    """
+    deltas = {'total_raised': total_raised, 'donation_count': donation_count, 'donor_count': donor_count}
+    increments = {field: F(field) + delta for field, delta in deltas.items()}
+    if not shard_count():
+        Campaign.objects.filter(pk=campaign_id).update(**increments)
+        return
+
+    refresh_cached_counters([campaign_id])
+    transaction.on_commit(partial(refresh_cached_counters, [campaign_id]))
+    shard = pick_shard(shard_key)
+    if CampaignCounterShard.objects.filter(campaign_id=campaign_id, shard=shard).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            CampaignCounterShard.objects.create(campaign_id=campaign_id, shard=shard, **deltas)
+    except IntegrityError:
+        # Another donation created this shard first
+        CampaignCounterShard.objects.filter(campaign_id=campaign_id, shard=shard).update(**increments)
+
+
+def unfolded(field):
+    """An expression for a campaign's unfolded shard increments to `field`, for Campaign queries."""
+    return Coalesce(Subquery(
+        CampaignCounterShard.objects.filter(campaign=OuterRef('pk'))
+        .order_by().values('campaign').annotate(total=Sum(field)).values('total')
+    ), 0)
+
+
+def compute_live_counters(campaign_id):
+    """The campaign's counters plus its unfolded shards, in one query."""
+    row = Campaign.objects.filter(pk=campaign_id).annotate(
+        **{f'shard_{field}': unfolded(field) for field in COUNTER_FIELDS}
+    ).values(*COUNTER_FIELDS, *(f'shard_{field}' for field in COUNTER_FIELDS)).first()
+    if row is None:
+        return dict.fromkeys(COUNTER_FIELDS, 0)
+    return {field: row[field] + row[f'shard_{field}'] for field in COUNTER_FIELDS}
+
+
+def live_counters(campaign):
+    """
+    Return the campaign's counters as a dict, including unfolded shards.
+
+    Without sharding these are the campaign's own columns and cost nothing.
+    """
+    if not shard_count():
+        return {field: getattr(campaign, field) for field in COUNTER_FIELDS}
+    return cache.get_or_set(
+        live_counters_key(campaign.pk),
+        partial(compute_live_counters, campaign.pk),
+        getattr(settings, 'CAMPAIGN_COUNTER_CACHE_TTL', 5),
+    )
+
+
+def fold_counter_shards(campaign_ids=None, batch_size=FOLD_BATCH_SIZE):
+    """
+    Move shard increments into the campaign rows; returns the number of
+    campaigns folded. Folds every campaign with shards when no ids are given.
+
+    The campaign rows are locked first and stay locked until the caller's
+    transaction ends, so code that goes on to write absolute counter values
+    cannot race another fold. The shards are locked while they are read and
+    deleted, so a donation that arrives meanwhile waits and then starts a
+    fresh shard.
+    """
+    if campaign_ids is None:
+        campaign_ids = CampaignCounterShard.objects.order_by('campaign_id').values_list(
+            'campaign_id', flat=True
+        ).distinct()
+    campaign_ids = list(campaign_ids)
+
+    folded = 0
+    for start in range(0, len(campaign_ids), batch_size):
+        batch_ids = campaign_ids[start:start + batch_size]
+        with transaction.atomic():
+            list(Campaign.objects.select_for_update().filter(pk__in=batch_ids).order_by('pk').values_list('pk'))
+            shards = list(
+                CampaignCounterShard.objects.select_for_update()
+                .filter(campaign_id__in=batch_ids)
+                .values_list('pk', 'campaign_id', *COUNTER_FIELDS)
+            )
+            if not shards:
+                continue
+            totals = {field: defaultdict(int) for field in COUNTER_FIELDS}
+            for _, campaign_id, *values in shards:
+                for field, value in zip(COUNTER_FIELDS, values):
+                    totals[field][campaign_id] += value
+
+            Campaign.objects.filter(pk__in=totals['total_raised']).update(**{
+                field: F(field) + per_campaign(values) for field, values in totals.items()
+            })
+            CampaignCounterShard.objects.filter(pk__in=[shard[0] for shard in shards]).delete()
+            folded_ids = list(totals['total_raised'])
+            transaction.on_commit(partial(refresh_cached_counters, folded_ids))
+            folded += len(folded_ids)
+    return folded
@@ -0,0 +1,155 @@
+"""
+Load test donation creation against one campaign, with and without
+counter shards.
+
+For each --shards value (0 meaning no sharding) a fresh campaign and a
+pool of donors are created, then --threads threads create --donations
+donations to it as fast as they can through Donation.objects.create, the
+same path as the donation form. Reports throughput, latency and whether
+the folded counters match the donations, as JSON. Runs against a
+throwaway test database unless --use-current-database is given.
+
+Row-lock contention only shows on databases with row-level locks
+(PostgreSQL, MySQL). SQLite allows one writer at a time whatever the row,
+so there the runs mostly measure the cost of the extra shard bookkeeping;
+`lock_retries` counts the writes it turned away.
+"""
+import json
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.db.models import Count, Sum
+from django.test import override_settings
+
+from campaigns.counters import COUNTER_FIELDS, fold_counter_shards
+from campaigns.models import Campaign
+from donations.models import Donation
+from organizations.models import Organisation
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = 'Reports donation throughput on one campaign with and without counter shards, as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent donors (default: 16)')
+        parser.add_argument('--donations', type=int, default=4000, help='Donations per run (default: 4000)')
+        parser.add_argument(
+            '--shards', default='0,16',
+            help='Comma-separated CAMPAIGN_COUNTER_SHARDS values to compare (default: 0,16)',
+        )
+        parser.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+        parser.add_argument(
+            '--use-current-database', action='store_true',
+            help='Run against the configured database instead of a throwaway test database.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            shard_counts = [int(value) for value in options['shards'].split(',')]
+        except ValueError:
+            raise CommandError('--shards must be a comma-separated list of integers.')
+        if options['threads'] < 1 or options['donations'] < 1 or min(shard_counts) < 0:
+            raise CommandError('--threads and --donations must be positive and --shards not negative.')
+
+        old_name = None
+        if not options['use_current_database']:
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            report = {
+                'database': connection.vendor,
+                'threads': options['threads'],
+                'donations': options['donations'],
+                'runs': {},
+            }
+            for shards in shard_counts:
+                self.stderr.write(f'CAMPAIGN_COUNTER_SHARDS={shards}...')
+                report['runs'][str(shards)] = self.run(shards, options)
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def run(self, shards, options):
+        threads, total = options['threads'], options['donations']
+        organisation = Organisation.objects.create(name=f'Counter load test ({shards} shards)')
+        campaign = Campaign.objects.create(
+            title='Viral campaign',
+            slug=f'counter-load-test-{shards}-{time.time_ns()}',
+            description='Counter load test',
+            funding_goal=total * 100,
+            category='education',
+            organisation=organisation,
+            status='active',
+        )
+        prefix = f'counter-load-{shards}-{time.time_ns()}'
+        donors = get_user_model().objects.bulk_create([
+            get_user_model()(username=f'{prefix}-{i}', role='donor') for i in range(min(total, 500))
+        ])
+
+        latencies, retries = [], []
+        rng = random.Random(options['seed'])
+        amounts = [rng.randint(5, 500) for _ in range(total)]
+
+        def donate(index):
+            thread_latencies, thread_retries = [], 0
+            try:
+                for n in range(index, total, threads):
+                    started = time.perf_counter()
+                    while True:
+                        try:
+                            Donation.objects.create(campaign=campaign, donor=donors[n % len(donors)], amount=amounts[n])
+                            break
+                        except OperationalError as exc:
+                            if 'locked' not in str(exc):
+                                raise
+                            thread_retries += 1
+                            time.sleep(0.001)
+                    thread_latencies.append((time.perf_counter() - started) * 1000)
+            finally:
+                connection.close()
+            with lock:
+                latencies.extend(thread_latencies)
+                retries.append(thread_retries)
+
+        lock = threading.Lock()
+        with override_settings(CAMPAIGN_COUNTER_SHARDS=shards):
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                list(pool.map(donate, range(threads)))
+            elapsed = time.perf_counter() - started
+
+            fold_started = time.perf_counter()
+            fold_counter_shards([campaign.pk])
+            fold_ms = (time.perf_counter() - fold_started) * 1000
+
+        campaign.refresh_from_db()
+        actual = Donation.objects.filter(campaign=campaign).aggregate(
+            total_raised=Sum('amount'), donation_count=Count('pk'), donor_count=Count('donor', distinct=True),
+        )
+        result = {
+            'donations_per_second': round(total / elapsed, 1),
+            'seconds': round(elapsed, 3),
+            'p50_ms': round(statistics.median(latencies), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'max_ms': round(max(latencies), 3),
+            'lock_retries': sum(retries),
+            'fold_ms': round(fold_ms, 3),
+            'counters_consistent': all(getattr(campaign, field) == actual[field] for field in COUNTER_FIELDS),
+        }
+
+        if options['use_current_database']:
+            organisation.delete()
+            get_user_model().objects.filter(username__startswith=f'{prefix}-').delete()
+        return result
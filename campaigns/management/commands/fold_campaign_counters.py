@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from campaigns.counters import fold_counter_shards
+
+
+class Command(BaseCommand):
+    help = (
+        'Folds sharded campaign counter increments (CAMPAIGN_COUNTER_SHARDS) '
+        'back into the campaign rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Fold once and exit instead of repeating.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=30.0,
+            help='Seconds between folds (default: 30).',
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        if interval <= 0:
+            raise CommandError('--interval must be positive.')
+
+        while True:
+            folded = fold_counter_shards()
+            if folded:
+                self.stdout.write(self.style.SUCCESS(f'Folded counter shards of {folded} campaign(s).'))
+            if options['once']:
+                return
+            time.sleep(interval)
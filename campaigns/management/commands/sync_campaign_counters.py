@@ -0,0 +1,114 @@
+from functools import partial
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from campaigns.counters import COUNTER_FIELDS, fold_counter_shards, refresh_cached_counters, unfolded
+from campaigns.models import Campaign
+from donations.models import Donation
+
+
+class Command(BaseCommand):
+    help = (
+        'Backfills the denormalised funding counters on campaigns from the '
+        'donations table and reports any campaigns whose counters have drifted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drift; exit with an error if any is found.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of campaigns to reconcile per transaction (default: 500).',
+        )
+
+    def handle(self, *args, **options):
+        check_only = options['check']
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        campaign_ids = list(Campaign.objects.order_by('pk').values_list('pk', flat=True))
+        drifted_total = 0
+
+        for start in range(0, len(campaign_ids), batch_size):
+            batch_ids = campaign_ids[start:start + batch_size]
+            drifted_total += self._reconcile_batch(batch_ids, check_only)
+
+        if check_only and drifted_total:
+            raise CommandError(f'{drifted_total} campaign(s) have drifted funding counters.')
+
+        if drifted_total:
+            self.stdout.write(self.style.SUCCESS(
+                f'Repaired funding counters on {drifted_total} of {len(campaign_ids)} campaign(s).'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'All {len(campaign_ids)} campaign(s) have consistent funding counters.'
+            ))
+
+    def _reconcile_batch(self, batch_ids, check_only):
+        """
+        Compare stored counters with the donations table for one batch.
+
+        The campaign rows are locked for the duration of the batch so that a
+        donation committed concurrently applies its increment on top of the
+        corrected value instead of being overwritten by it. Counter shards
+        are folded into the rows first (with --check they are left alone).
+        Shard increments do not take the row lock, so the stored values and
+        the donations table are then read in one query, together with any
+        shards added since: a donation is either in both the donations and
+        its shard, or in neither, and the corrected row leaves its shard to
+        be folded in later.
+        """
+        with transaction.atomic():
+            if not check_only:
+                fold_counter_shards(batch_ids)
+            list(Campaign.objects.select_for_update().filter(pk__in=batch_ids).order_by('pk').values_list('pk'))
+            campaigns = list(
+                Campaign.objects.filter(pk__in=batch_ids)
+                .annotate(
+                    actual_total_raised=self._actual(Sum('amount')),
+                    actual_donation_count=self._actual(Count('id')),
+                    actual_donor_count=self._actual(Count('donor', distinct=True)),
+                    **{f'unfolded_{field}': unfolded(field) for field in COUNTER_FIELDS},
+                )
+                .only('pk', 'title', *COUNTER_FIELDS)
+            )
+
+            drifted = []
+            for campaign in campaigns:
+                expected = {field: getattr(campaign, f'actual_{field}') for field in COUNTER_FIELDS}
+                shards = {field: getattr(campaign, f'unfolded_{field}') for field in COUNTER_FIELDS}
+                stored = {field: getattr(campaign, field) + shards[field] for field in COUNTER_FIELDS}
+                if stored == expected:
+                    continue
+
+                self.stdout.write(self.style.WARNING(
+                    f'Campaign {campaign.pk} "{campaign.title}": stored {stored}, actual {expected}'
+                ))
+                for field in COUNTER_FIELDS:
+                    setattr(campaign, field, max(expected[field] - shards[field], 0))
+                drifted.append(campaign)
+
+            if drifted and not check_only:
+                Campaign.objects.bulk_update(drifted, COUNTER_FIELDS)
+                # bulk_update sends no signals, so refresh cached pages here
+                transaction.on_commit(partial(refresh_cached_counters, [campaign.pk for campaign in drifted]))
+
+        return len(drifted)
+
+    @staticmethod
+    def _actual(aggregate):
+        """`aggregate` over the campaign's donations, as a subquery."""
+        return Coalesce(Subquery(
+            Donation.objects.filter(campaign=OuterRef('pk'))
+            .order_by().values('campaign').annotate(value=aggregate).values('value')
+        ), 0)
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.15 on 2026-10-18 18:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0003_hot_query_indexes'),
+        ('tags', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaign',
+            name='tags',
+            field=models.ManyToManyField(blank=True, help_text='Categories or tags for this campaign', related_name='campaigns', to='tags.tag'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0004_campaign_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CampaignCounterShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('total_raised', models.BigIntegerField(default=0)),
+                ('donation_count', models.IntegerField(default=0)),
+                ('donor_count', models.IntegerField(default=0)),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='counter_shards', to='campaigns.campaign')),
+            ],
+            options={
+                'verbose_name': 'Campaign Counter Shard',
+                'verbose_name_plural': 'Campaign Counter Shards',
+                'constraints': [models.UniqueConstraint(fields=('campaign', 'shard'), name='unique_campaign_counter_shard')],
+            },
+        ),
+    ]
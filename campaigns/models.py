@@ -5,6 +5,53 @@ from django.utils import timezone
 
 from utils.constants import CAMPAIGN_STATUS_CHOICES, CAMPAIGN_CATEGORY_CHOICES
 
+# Denormalised funding counters, written only by queries that add to or
+# recount them (see campaigns.counters)
+COUNTER_FIELDS = ('total_raised', 'donation_count', 'donor_count')
+
+
+class CampaignQuerySet(models.QuerySet):
+    """QuerySet with cheap change validators for campaigns"""
+
+    def cache_validators(self, latest_donation=True):
+        """
+        Summarise what campaign pages and payloads depend on, in one query.
+
+        Returns a dict with the number of campaigns, their latest change
+        (including their organisation's) and their donation counters,
+        counter shards included. With latest_donation=True the id and time
+        of the newest donation are included too; lists skip that per-row
+        lookup and rely on the counters instead.
+        """
+        from donations.models import Donation
+
+        validators = {
+            'count': models.Count('pk'),
+            'modified': models.Max('updated_at'),
+            'organisation_modified': models.Max('organisation__updated_at'),
+            'donations': models.Sum('donation_count'),
+            'raised': models.Sum('total_raised'),
+        }
+        queryset = self.order_by()
+        if getattr(settings, 'CAMPAIGN_COUNTER_SHARDS', 0):
+            # Donations go to counter shards rather than the campaign row
+            shard_donations = CampaignCounterShard.objects.filter(
+                campaign=models.OuterRef('pk')
+            ).order_by().values('campaign').annotate(total=models.Sum('donation_count')).values('total')
+            queryset = queryset.annotate(shard_donation_count=models.Subquery(shard_donations))
+            validators['shard_donations'] = models.Sum('shard_donation_count')
+        if latest_donation:
+            newest = Donation.objects.filter(campaign=models.OuterRef('pk')).order_by('-id')
+            queryset = queryset.annotate(
+                newest_donation_id=models.Subquery(newest.values('id')[:1]),
+                newest_donation_at=models.Subquery(newest.values('created_at')[:1]),
+            )
+            validators.update(
+                latest_donation=models.Max('newest_donation_id'),
+                donated=models.Max('newest_donation_at'),
+            )
+        return queryset.aggregate(**validators)
+
 
 class Campaign(models.Model):
     """
@@ -23,6 +70,14 @@ class Campaign(models.Model):
     # Media
     cover_image = models.ImageField(upload_to='campaign_covers/', blank=True, null=True)
     
+    # Categorisation - filtered with tags.matching
+    tags = models.ManyToManyField(
+        'tags.Tag',
+        blank=True,
+        related_name='campaigns',
+        help_text='Categories or tags for this campaign'
+    )
+    
     # Foreign keys
     organisation = models.ForeignKey(
         'organizations.Organisation', 
@@ -49,6 +104,14 @@ class Campaign(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     closed_at = models.DateTimeField(blank=True, null=True)
     
+    # Funding counters - denormalised from the donations table and kept in
+    # step by donations.signals; use `sync_campaign_counters` to repair drift
+    total_raised = models.PositiveBigIntegerField(default=0, editable=False)
+    donation_count = models.PositiveIntegerField(default=0, editable=False)
+    donor_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = CampaignQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Campaign'
@@ -58,10 +121,30 @@ class Campaign(models.Model):
             ('close_campaign', 'Can close campaigns'),
             ('reactivate_campaign', 'Can reactivate campaigns'),
         ]
+        indexes = [
+            # Public/admin lists: filter by status, order by created_at
+            models.Index(fields=['status', 'created_at'], name='campaign_status_created_idx'),
+            # Org dashboards: an organisation's campaigns in a given status
+            models.Index(fields=['organisation', 'status'], name='campaign_org_status_idx'),
+        ]
     
     def __str__(self):
         return self.title
     
+    def save(self, *args, **kwargs):
+        """
+        Save the campaign, leaving the funding counters of an existing row
+        alone: the in-memory values may predate donations committed since
+        the row was loaded, and writing them back would undo those.
+        """
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in COUNTER_FIELDS and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+    
     def get_absolute_url(self):
         return reverse('campaigns:detail', kwargs={'pk': self.pk})
     
@@ -101,3 +184,37 @@ class Campaign(models.Model):
             self.status = 'active'
             self.closed_at = None
             self.save()
+
+
+class CampaignCounterShard(models.Model):
+    """
+    One slice of a campaign's pending funding counter increments
+
+    With CAMPAIGN_COUNTER_SHARDS set, donations add to a shard picked at
+    random instead of the campaign row, so concurrent donations to one
+    campaign do not queue on a single row lock. A campaign's live totals
+    are its own counters plus its shards (see campaigns.counters), and
+    `manage.py fold_campaign_counters` periodically moves the shards back
+    into the campaign row.
+    """
+    campaign = models.ForeignKey(
+        Campaign,
+        on_delete=models.CASCADE,
+        related_name='counter_shards'
+    )
+    shard = models.PositiveSmallIntegerField()
+
+    # Increments not yet folded into the campaign's counters
+    total_raised = models.BigIntegerField(default=0)
+    donation_count = models.IntegerField(default=0)
+    donor_count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Campaign Counter Shard'
+        verbose_name_plural = 'Campaign Counter Shards'
+        constraints = [
+            models.UniqueConstraint(fields=['campaign', 'shard'], name='unique_campaign_counter_shard'),
+        ]
+
+    def __str__(self):
+        return f'Counter shard {self.shard} of campaign {self.campaign_id}'
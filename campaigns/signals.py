@@ -0,0 +1,60 @@
+"""
+Signal handlers that invalidate cached campaign pages.
+
+Versions are bumped straight away, so the change is visible to the rest
+of the current transaction, and again once it commits, so a concurrent
+request cannot leave pre-commit data cached under the new version.
+"""
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from donations.models import Donation
+from organizations.models import Organisation
+
+from .caching import bump_version
+from .models import Campaign
+
+
+def _bump(campaign_id):
+    bump_version(campaign_id)
+    transaction.on_commit(partial(bump_version, campaign_id))
+
+
+@receiver(post_save, sender=Campaign)
+def campaign_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _bump(instance.pk)
+
+
+@receiver(post_save, sender=Organisation)
+def organisation_saved(sender, instance, created, raw=False, **kwargs):
+    # Campaign pages render the organisation's name
+    if created or raw:
+        return
+    for campaign_id in instance.campaigns.values_list('pk', flat=True):
+        _bump(campaign_id)
+
+
+# The user fields campaign pages show for a donor
+DONOR_NAME_FIELDS = {'first_name', 'last_name', 'username'}
+
+
+@receiver(post_save, sender=get_user_model())
+def donor_saved(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    # Recent-donor lists render the donor's name
+    if created or raw or (update_fields is not None and not DONOR_NAME_FIELDS & set(update_fields)):
+        return
+    campaign_ids = Donation.objects.filter(donor=instance).order_by().values_list('campaign_id', flat=True).distinct()
+    for campaign_id in campaign_ids:
+        _bump(campaign_id)
+
+
+@receiver(post_save, sender=Donation)
+@receiver(post_delete, sender=Donation)
+def donation_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _bump(instance.campaign_id)
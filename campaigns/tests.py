@@ -0,0 +1,334 @@
+import json
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from campaigns.caching import get_version
+from campaigns.counters import fold_counter_shards, live_counters
+from campaigns.models import Campaign, CampaignCounterShard
+from donations.models import Donation
+from organizations.models import Organisation
+
+CustomUser = get_user_model()
+
+
+class CampaignCountersTestCase(TestCase):
+    """Shared fixtures for tests of the denormalised campaign counters."""
+
+    def setUp(self):
+        self.organisation = Organisation.objects.create(name='Counter Org')
+        self.donor = CustomUser.objects.create_user(username='donor1', password='password123', role='donor')
+        self.other_donor = CustomUser.objects.create_user(username='donor2', password='password123', role='donor')
+        self.campaign = Campaign.objects.create(
+            title='Counted Campaign',
+            slug='counted-campaign',
+            description='A campaign with counters',
+            funding_goal=1000,
+            category='education',
+            organisation=self.organisation,
+            status='active',
+        )
+
+    def donate(self, donor, amount, reference_number):
+        return Donation.objects.create(
+            campaign=self.campaign,
+            donor=donor,
+            amount=amount,
+            reference_number=reference_number,
+        )
+
+    def assertCounters(self, total_raised, donation_count, donor_count):
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.total_raised, total_raised)
+        self.assertEqual(self.campaign.donation_count, donation_count)
+        self.assertEqual(self.campaign.donor_count, donor_count)
+
+
+class CampaignCounterSignalTests(CampaignCountersTestCase):
+    def test_new_campaign_starts_at_zero(self):
+        self.assertCounters(0, 0, 0)
+
+    def test_donation_create_increments_counters(self):
+        self.donate(self.donor, 50, 'REF-1')
+        self.assertCounters(50, 1, 1)
+
+    def test_repeat_donor_is_counted_once(self):
+        self.donate(self.donor, 50, 'REF-1')
+        self.donate(self.donor, 25, 'REF-2')
+        self.donate(self.other_donor, 10, 'REF-3')
+        self.assertCounters(85, 3, 2)
+
+    def test_updating_a_donation_does_not_double_count(self):
+        donation = self.donate(self.donor, 50, 'REF-1')
+        donation.comment = 'Edited comment'
+        donation.save()
+        self.assertCounters(50, 1, 1)
+
+    def test_donation_delete_decrements_counters(self):
+        first = self.donate(self.donor, 50, 'REF-1')
+        self.donate(self.donor, 25, 'REF-2')
+        first.delete()
+        self.assertCounters(25, 1, 1)
+
+    def test_cascade_delete_of_donor_recounts_donors(self):
+        self.donate(self.donor, 50, 'REF-1')
+        self.donate(self.donor, 25, 'REF-2')
+        self.donate(self.other_donor, 10, 'REF-3')
+        self.donor.delete()
+        self.assertCounters(10, 1, 1)
+
+    def test_saving_a_stale_campaign_keeps_later_donations(self):
+        stale = Campaign.objects.get(pk=self.campaign.pk)
+        self.donate(self.donor, 50, 'REF-1')
+
+        stale.close()
+
+        self.assertCounters(50, 1, 1)
+        self.assertEqual(self.campaign.status, 'closed')
+
+
+class SyncCampaignCountersCommandTests(CampaignCountersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.donate(self.donor, 50, 'REF-1')
+        self.donate(self.other_donor, 30, 'REF-2')
+        # Simulate rows that predate the counters
+        Campaign.objects.update(total_raised=0, donation_count=0, donor_count=0)
+
+    def test_check_reports_drift_without_fixing(self):
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('sync_campaign_counters', '--check', stdout=out)
+        self.assertIn('Counted Campaign', out.getvalue())
+        self.assertCounters(0, 0, 0)
+
+    def test_backfill_repairs_drift(self):
+        call_command('sync_campaign_counters', stdout=StringIO())
+        self.assertCounters(80, 2, 2)
+
+        out = StringIO()
+        call_command('sync_campaign_counters', '--check', stdout=out)
+        self.assertIn('consistent', out.getvalue())
+
+
+class CampaignDetailCounterTests(CampaignCountersTestCase):
+    def test_detail_view_reads_stored_counters(self):
+        self.donate(self.donor, 50, 'REF-1')
+        self.donate(self.donor, 70, 'REF-2')
+        self.client.login(username='donor1', password='password123')
+
+        response = self.client.get(reverse('campaigns:detail', kwargs={'pk': self.campaign.pk}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_raised'], 120)
+        self.assertEqual(response.context['donor_count'], 1)
+        self.assertEqual(response.context['progress_percent'], 12)
+
+
+class CampaignDetailCacheTests(CampaignCountersTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.url = reverse('campaigns:detail', kwargs={'pk': self.campaign.pk})
+        self.client.login(username='donor1', password='password123')
+        # Absorb the one-off session writes of the first request
+        self.client.get(reverse('home'))
+
+    def test_warm_page_skips_donation_queries(self):
+        self.donate(self.other_donor, 40, 'REF-1')
+        self.client.get(self.url)
+
+        # Session and user lookups, the conditional GET validators, then
+        # the campaign with its organisation
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.context['donations']), 1)
+
+    def test_donation_refreshes_cached_page(self):
+        self.assertContains(self.client.get(self.url), 'No donations yet')
+        version = get_version(self.campaign.pk)
+
+        self.donate(self.other_donor, 40, 'REF-1')
+
+        self.assertNotEqual(get_version(self.campaign.pk), version)
+        response = self.client.get(self.url)
+        self.assertNotContains(response, 'No donations yet')
+        self.assertContains(response, '$40')
+
+    def test_donation_delete_and_campaign_edit_bump_version(self):
+        donation = self.donate(self.other_donor, 40, 'REF-1')
+        version = get_version(self.campaign.pk)
+        donation.delete()
+        self.assertNotEqual(get_version(self.campaign.pk), version)
+
+        self.client.get(self.url)
+        self.campaign.title = 'Renamed Campaign'
+        self.campaign.save()
+        self.assertContains(self.client.get(self.url), 'Renamed Campaign')
+
+    def test_organisation_rename_bumps_its_campaigns(self):
+        self.assertContains(self.client.get(self.url), 'Counter Org')
+
+        self.organisation.name = 'Renamed Org'
+        self.organisation.save()
+
+        self.assertContains(self.client.get(self.url), 'Renamed Org')
+
+    def test_donor_rename_bumps_their_campaigns(self):
+        self.other_donor.first_name, self.other_donor.last_name = 'Ada', 'Donor'
+        self.other_donor.save()
+        self.donate(self.other_donor, 40, 'REF-1')
+        self.assertContains(self.client.get(self.url), 'Ada Donor')
+
+        self.other_donor.first_name = 'Grace'
+        self.other_donor.save()
+
+        self.assertContains(self.client.get(self.url), 'Grace Donor')
+
+    def test_login_does_not_bump_donor_campaigns(self):
+        self.donate(self.other_donor, 40, 'REF-1')
+        version = get_version(self.campaign.pk)
+
+        self.client.login(username='donor2', password='password123')
+
+        self.assertEqual(get_version(self.campaign.pk), version)
+
+
+@override_settings(CAMPAIGN_COUNTER_SHARDS=4)
+class CampaignCounterShardTests(CampaignCountersTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_donations_go_to_shards_and_are_summed_on_read(self):
+        for i in range(20):
+            self.donate(self.donor if i % 2 else self.other_donor, 10, f'REF-{i}')
+
+        self.assertCounters(0, 0, 0)
+        self.assertLessEqual(CampaignCounterShard.objects.filter(campaign=self.campaign).count(), 4)
+        self.assertEqual(live_counters(self.campaign), {'total_raised': 200, 'donation_count': 20, 'donor_count': 2})
+
+        # The summed value is cached
+        with self.assertNumQueries(0):
+            live_counters(self.campaign)
+
+    def test_a_donors_donations_share_one_shard(self):
+        # The donor's shard is the row locked while checking for a first donation
+        for i in range(5):
+            self.donate(self.donor, 10, f'REF-{i}')
+
+        shard = CampaignCounterShard.objects.get(campaign=self.campaign)
+        self.assertEqual((shard.shard, shard.donation_count, shard.donor_count), (self.donor.pk % 4, 5, 1))
+
+    def test_api_detail_includes_unfolded_shards(self):
+        from campaigns.api.serializers import CampaignDetailSerializer
+        self.donate(self.donor, 500, 'REF-1')
+
+        data = CampaignDetailSerializer(self.campaign).data
+
+        self.assertEqual((data['total_raised'], data['progress_percentage']), (500, 50))
+
+    def test_fold_moves_shards_into_the_campaign_row(self):
+        self.donate(self.donor, 50, 'REF-1')
+        self.donate(self.other_donor, 30, 'REF-2')
+
+        call_command('fold_campaign_counters', '--once', stdout=StringIO())
+
+        self.assertCounters(80, 2, 2)
+        self.assertFalse(CampaignCounterShard.objects.exists())
+        self.assertEqual(live_counters(self.campaign)['total_raised'], 80)
+
+    def test_detail_view_includes_unfolded_shards(self):
+        self.donate(self.donor, 50, 'REF-1')
+        fold_counter_shards()
+        self.donate(self.donor, 70, 'REF-2')
+        self.client.login(username='donor1', password='password123')
+
+        response = self.client.get(reverse('campaigns:detail', kwargs={'pk': self.campaign.pk}))
+
+        self.assertEqual((response.context['total_raised'], response.context['donor_count']), (120, 1))
+
+    def test_detail_page_shows_new_donations_and_folds(self):
+        # The sidebar fragment must not be re-cached with stale live counters
+        url = reverse('campaigns:detail', kwargs={'pk': self.campaign.pk})
+        self.client.login(username='donor1', password='password123')
+        self.donate(self.donor, 100, 'REF-1')
+        self.assertContains(self.client.get(url), '$100')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.donate(self.other_donor, 50, 'REF-2')
+        self.assertContains(self.client.get(url), '$150')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            fold_counter_shards()
+        response = self.client.get(url)
+        self.assertContains(response, '$150')
+        self.assertContains(response, '2 donors')
+
+    def test_delete_and_sync_account_for_shards(self):
+        first = self.donate(self.donor, 50, 'REF-1')
+        self.donate(self.other_donor, 25, 'REF-2')
+        call_command('sync_campaign_counters', '--check', stdout=StringIO())
+
+        first.delete()
+
+        self.assertCounters(25, 1, 1)
+        self.donate(self.donor, 10, 'REF-3')
+        call_command('sync_campaign_counters', stdout=StringIO())
+        self.assertCounters(35, 2, 2)
+
+    def fold_then_donate(self, module, donor, amount, reference_number):
+        """Patch `module`'s fold so a donation lands in a new shard right after it."""
+        def fold(*args, **kwargs):
+            folded = fold_counter_shards(*args, **kwargs)
+            self.donate(donor, amount, reference_number)
+            return folded
+        return mock.patch(f'{module}.fold_counter_shards', side_effect=fold)
+
+    def test_sync_does_not_count_a_donation_made_after_the_fold_twice(self):
+        self.donate(self.donor, 50, 'REF-1')
+
+        with self.fold_then_donate('campaigns.management.commands.sync_campaign_counters', self.other_donor, 25, 'REF-2'):
+            call_command('sync_campaign_counters', stdout=StringIO())
+        fold_counter_shards()
+
+        self.assertCounters(75, 2, 2)
+
+    def test_delete_does_not_count_a_donor_added_after_the_fold_twice(self):
+        first = self.donate(self.donor, 50, 'REF-1')
+        self.donate(self.donor, 20, 'REF-2')
+
+        with self.fold_then_donate('donations.signals', self.other_donor, 25, 'REF-3'):
+            first.delete()
+        fold_counter_shards()
+
+        self.assertCounters(45, 2, 2)
+
+    def test_list_validators_change_with_sharded_donations(self):
+        before = Campaign.objects.cache_validators(latest_donation=False)
+        self.donate(self.donor, 50, 'REF-1')
+
+        self.assertNotEqual(Campaign.objects.cache_validators(latest_donation=False), before)
+
+
+class CampaignCounterLoadTestCommandTests(TransactionTestCase):
+    def test_threaded_runs_with_and_without_shards_stay_consistent(self):
+        out = StringIO()
+        call_command(
+            'benchmark_campaign_counters', '--threads', '4', '--donations', '40', '--shards', '0,4',
+            '--use-current-database', stdout=out, stderr=StringIO(),
+        )
+
+        report = json.loads(out.getvalue())
+        self.assertEqual(set(report['runs']), {'0', '4'})
+        for run in report['runs'].values():
+            self.assertTrue(run['counters_consistent'])
+            self.assertGreater(run['donations_per_second'], 0)
+        self.assertFalse(Donation.objects.exists())
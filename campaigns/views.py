@@ -3,10 +3,14 @@ from django.views.generic import ListView, DetailView, CreateView, UpdateView, D
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.urls import reverse_lazy, reverse
 from django.http import HttpResponseRedirect
-from django.db.models import Sum
 from django.utils import timezone
 
+from core.conditional import ConditionalGetMixin
+from core.image_variants import prefetch_variants
 from core.mixins import OrganisationOwnerRequiredMixin
+from core.pagination import KeysetPaginationMixin
+from .caching import CAMPAIGN_CACHE_TIMEOUT, get_version, recent_donations
+from .counters import live_counters
 from .models import Campaign
 from .forms import CampaignForm
 from donations.models import Donation
@@ -14,19 +18,28 @@ from utils.message_utils import add_success, add_error
 from utils.constants import Messages
 
 
-class CampaignListView(ListView):
-    """List all active campaigns for public viewing"""
+class CampaignListView(KeysetPaginationMixin, ListView):
+    """List all active campaigns for public viewing, newest first"""
     model = Campaign
     template_name = 'campaigns/list.html'
     context_object_name = 'campaigns'
     paginate_by = 12
     
     def get_queryset(self):
-        # Show only active campaigns for public visitors
-        return Campaign.objects.filter(status='active').order_by('-created_at')
+        # Show only active campaigns for public visitors; ordering comes
+        # from the keyset paginator
+        return Campaign.objects.filter(status='active')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # One lookup for the whole grid's responsive cover images
+        context['cover_variants'] = prefetch_variants(
+            campaign.cover_image.name for campaign in context['object_list']
+        )
+        return context
 
 
-class CampaignDetailView(DetailView):
+class CampaignDetailView(ConditionalGetMixin, DetailView):
     """
     Display a campaign's details
     
@@ -42,27 +55,42 @@ class CampaignDetailView(DetailView):
     def get_queryset(self):
         # Only active campaigns are visible to the general public
         if not self.request.user.is_authenticated or self.request.user.role == 'donor':
-            return Campaign.objects.filter(status='active')
+            queryset = Campaign.objects.filter(status='active')
         
         # Staff can view all campaigns
-        if self.request.user.is_staff:
-            return Campaign.objects.all()
+        elif self.request.user.is_staff:
+            queryset = Campaign.objects.all()
             
         # Organization owners can only see their own campaigns 
-        if self.request.user.role == 'org_owner':
-            return Campaign.objects.filter(organisation=self.request.user.organisation)
+        elif self.request.user.role == 'org_owner':
+            queryset = Campaign.objects.filter(organisation=self.request.user.organisation)
             
         # Default case - active campaigns only
-        return Campaign.objects.filter(status='active')
+        else:
+            queryset = Campaign.objects.filter(status='active')
+
+        return queryset.select_related('organisation')
+
+    def get_validators(self):
+        return self.get_queryset().filter(pk=self.kwargs['pk']).cache_validators()
+
+    def get_validator_vary(self):
+        # Donor renames bump the version without touching the validators
+        return super().get_validator_vary() + (get_version(self.kwargs['pk']),)
         
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        campaign = self.get_object()
+        campaign = self.object
         
-        # Add donation stats
-        donations = Donation.objects.filter(campaign=campaign)
-        total_raised = donations.aggregate(Sum('amount'))['amount__sum'] or 0
-        donor_count = donations.values('donor').distinct().count()
+        # Recent donations and the rendered page fragments are cached under
+        # the campaign's version, which donations and edits bump
+        version = get_version(campaign.pk)
+
+        # Donation stats come from the campaign's denormalised counters
+        # (plus any unfolded counter shards, see campaigns.counters)
+        counters = live_counters(campaign)
+        total_raised = counters['total_raised']
+        donor_count = counters['donor_count']
         
         # Calculate progress percentage
         progress_percent = 0
@@ -75,11 +103,13 @@ class CampaignDetailView(DetailView):
             is_org_owner = self.request.user.organisation == campaign.organisation
         
         context.update({
-            'donations': donations.order_by('-created_at')[:5],
+            'campaign_version': version,
+            'donations': recent_donations(campaign, version=version),
             'total_raised': total_raised,
             'donor_count': donor_count,
             'progress_percent': progress_percent,
             'is_org_owner': is_org_owner,
+            'campaign_cache_timeout': CAMPAIGN_CACHE_TIMEOUT,
         })
         
         return context
@@ -195,7 +225,7 @@ class OrgCampaignListView(OrganisationOwnerRequiredMixin, ListView):
         ).order_by('-created_at')
 
 
-class OrgCampaignDetailView(OrganisationOwnerRequiredMixin, DetailView):
+class OrgCampaignDetailView(OrganisationOwnerRequiredMixin, ConditionalGetMixin, DetailView):
     """Org owner view of a campaign with management functions"""
     model = Campaign
     context_object_name = 'campaign'
@@ -204,6 +234,9 @@ class OrgCampaignDetailView(OrganisationOwnerRequiredMixin, DetailView):
     def get_queryset(self):
         # Only allow org owners to see their own campaigns
         return Campaign.objects.filter(organisation=self.request.user.organisation)
+
+    def get_validators(self):
+        return self.get_queryset().filter(pk=self.kwargs['pk']).cache_validators()
         
     def get_template_names(self):
         # Select the appropriate template based on campaign status
@@ -221,12 +254,13 @@ class OrgCampaignDetailView(OrganisationOwnerRequiredMixin, DetailView):
             
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        campaign = self.get_object()
+        campaign = self.object
         
-        # Add donation stats
+        # Donation stats come from the campaign's denormalised counters
         donations = Donation.objects.filter(campaign=campaign)
-        total_raised = donations.aggregate(Sum('amount'))['amount__sum'] or 0
-        donor_count = donations.values('donor').distinct().count()
+        counters = live_counters(campaign)
+        total_raised = counters['total_raised']
+        donor_count = counters['donor_count']
         
         # Calculate progress percentage
         progress_percent = 0
@@ -245,8 +279,8 @@ class OrgCampaignDetailView(OrganisationOwnerRequiredMixin, DetailView):
 
 
 # Admin campaign management views
-class AdminCampaignListView(UserPassesTestMixin, ListView):
-    """List all campaigns for admin review"""
+class AdminCampaignListView(UserPassesTestMixin, KeysetPaginationMixin, ListView):
+    """List all campaigns for admin review, newest first"""
     model = Campaign
     template_name = 'campaigns/admin/list.html'
     context_object_name = 'campaigns'
@@ -256,7 +290,7 @@ class AdminCampaignListView(UserPassesTestMixin, ListView):
         return self.request.user.is_staff
     
     def get_queryset(self):
-        return Campaign.objects.all().order_by('-created_at')
+        return Campaign.objects.all()
 
 
 class AdminCampaignReviewView(UserPassesTestMixin, UpdateView):
@@ -0,0 +1,103 @@
+"""
+IP allowlists of addresses and CIDR ranges.
+
+The configured entries are parsed once into ipaddress networks, then
+merged per address family into sorted, non-overlapping integer intervals.
+Checking an address is a binary search over the interval starts, so an
+allowlist of thousands of office, VPN and cloud ranges costs O(log n) per
+request.
+"""
+import bisect
+import ipaddress
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+def parse_networks(entries):
+    """
+    Parse addresses and CIDR ranges ('10.0.0.0/8', '2001:db8::/32',
+    '203.0.113.7') into networks. Blank entries are skipped; host bits
+    in a range are ignored.
+    """
+    networks = []
+    for entry in entries:
+        entry = entry.strip()
+        if not entry:
+            continue
+        try:
+            networks.append(ipaddress.ip_network(entry, strict=False))
+        except ValueError:
+            raise ImproperlyConfigured(f'Invalid IP address or network in allowlist: {entry!r}')
+    return networks
+
+
+def parse_address(value):
+    """An ipaddress object for value, with IPv4-mapped IPv6 unwrapped; None if invalid."""
+    try:
+        address = ipaddress.ip_address(value.strip())
+    except (AttributeError, ValueError):
+        return None
+    if address.version == 6 and address.ipv4_mapped:
+        return address.ipv4_mapped
+    return address
+
+
+class IPAllowlist:
+    """A set of networks answering membership with a bisect per lookup."""
+
+    def __init__(self, entries):
+        self.networks = parse_networks(entries)
+        self._intervals = {}
+        for version in (4, 6):
+            ranges = sorted(
+                (int(network.network_address), int(network.broadcast_address))
+                for network in self.networks if network.version == version
+            )
+            merged = []
+            for start, end in ranges:
+                if merged and start <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            self._intervals[version] = ([start for start, _ in merged], [end for _, end in merged])
+
+    def __bool__(self):
+        return bool(self.networks)
+
+    def __len__(self):
+        return len(self.networks)
+
+    def __contains__(self, address):
+        if not isinstance(address, (ipaddress.IPv4Address, ipaddress.IPv6Address)):
+            address = parse_address(address)
+            if address is None:
+                return False
+        starts, ends = self._intervals[address.version]
+        value = int(address)
+        index = bisect.bisect_right(starts, value) - 1
+        return index >= 0 and value <= ends[index]
+
+
+def client_ip(request, trusted_proxies=0):
+    """
+    The client address for a request behind `trusted_proxies` reverse proxies.
+
+    Each trusted proxy appends the address it received the request from to
+    X-Forwarded-For, and the last one connects to us (REMOTE_ADDR). Counting
+    back that many hops gives the first address not supplied by the client,
+    so spoofed entries at the front of the header are ignored. With no
+    trusted proxies the header is ignored entirely.
+    """
+    remote_addr = request.META.get('REMOTE_ADDR', '')
+    if trusted_proxies <= 0:
+        return remote_addr
+
+    forwarded = [
+        hop.strip() for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if hop.strip()
+    ]
+    chain = forwarded + [remote_addr]
+    if len(chain) <= trusted_proxies:
+        # Fewer hops than proxies: the request bypassed part of the proxy
+        # tier, so nothing in the header can be trusted
+        return remote_addr
+    return chain[-(trusted_proxies + 1)]
@@ -8,3 +8,5 @@ class CoreConfig(AppConfig):
     def ready(self):
         # Import and register template tags
         import core.templatetags.custom_filters
+        # Keep the cached platform counters in step with status changes
+        from . import signals  # noqa: F401
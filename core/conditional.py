@@ -0,0 +1,129 @@
+"""
+Conditional GET (ETag / Last-Modified) for read views.
+
+Views describe their content with a small dict of validators, normally
+from a queryset's `cache_validators()`: one aggregate query over
+timestamps and counters rather than the objects themselves. The ETag is a
+hash of those values plus whatever else the response varies on (viewer,
+query string, renderer), so a matching If-None-Match is answered with a
+304 before the object graph is loaded or rendered.
+
+Last-Modified is the newest timestamp among the validators. Deleted rows
+leave no timestamp behind, so the ETag is the authoritative validator and
+If-None-Match takes precedence when a client sends both.
+"""
+import hashlib
+from datetime import datetime
+
+from django.contrib.messages import get_messages
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+
+def validators_to_headers(validators, vary=(), allow_empty=False):
+    """
+    Turn a validators dict into an (etag, last_modified) pair.
+
+    Unless allow_empty is set, returns (None, None) when the validators
+    describe no objects, so a detail view runs normally and can 404.
+    """
+    if not validators or not (allow_empty or validators.get('count')):
+        return None, None
+
+    parts = [f'{key}={validators[key]!r}' for key in sorted(validators)]
+    parts.extend(repr(value) for value in vary)
+    etag = quote_etag(hashlib.md5('|'.join(parts).encode(), usedforsecurity=False).hexdigest())
+
+    timestamps = [value for value in validators.values() if isinstance(value, datetime)]
+    last_modified = int(max(timestamps).timestamp()) if timestamps else None
+    return etag, last_modified
+
+
+def conditional_response(request, etag, last_modified):
+    """Return a 304 response if the client's copy is current, else None."""
+    if etag is None:
+        return None
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def set_validator_headers(response, etag, last_modified):
+    """Add validators to a successful response that does not have its own."""
+    if etag is None or response.status_code != 200:
+        return response
+    if not response.has_header('ETag'):
+        response.headers['ETag'] = etag
+    if last_modified is not None and not response.has_header('Last-Modified'):
+        response.headers['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Answer conditional GETs on a DetailView without loading the object.
+
+    Subclasses implement get_validators(). The ETag also varies on the
+    viewer, their session and the CSRF secret the page's forms embed, so a
+    re-login or rotated token never revalidates a page with a stale token.
+    Requests with queued messages skip conditional handling altogether:
+    the page must be rendered to show (and consume) them, and its ETag
+    would otherwise revalidate a copy that still shows them.
+    """
+
+    def get_validators(self):
+        raise NotImplementedError
+
+    def get_validator_vary(self):
+        # get_token() makes sure the secret exists, and that a new one is set
+        # on this response, so the ETag matches what the next request sends
+        get_token(self.request)
+        session = getattr(self.request, 'session', None)
+        return (
+            self.request.user.pk,
+            session.session_key if session is not None else None,
+            self.request.META.get('CSRF_COOKIE'),
+        )
+
+    def get(self, request, *args, **kwargs):
+        if len(get_messages(request)):
+            return super().get(request, *args, **kwargs)
+        etag, last_modified = validators_to_headers(self.get_validators(), self.get_validator_vary())
+        response = conditional_response(request, etag, last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return set_validator_headers(response, etag, last_modified)
+
+
+class ConditionalReadMixin:
+    """
+    Answer conditional GETs on a DRF viewset's list and retrieve actions.
+
+    The list validators cover the filtered queryset, and the ETag varies on
+    the full URL (filters, cursor) and the negotiated renderer. Viewset
+    querysets must provide cache_validators().
+    """
+    list_validator_options = {}
+    retrieve_validator_options = {}
+
+    def get_validator_vary(self):
+        return (self.request.get_full_path(), self.request.accepted_renderer.format)
+
+    def _conditional(self, validators, handler, request, *args, allow_empty=False, **kwargs):
+        etag, last_modified = validators_to_headers(validators, self.get_validator_vary(), allow_empty)
+        response = conditional_response(request, etag, last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        return set_validator_headers(response, etag, last_modified)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        validators = queryset.cache_validators(**self.list_validator_options)
+        return self._conditional(validators, super().list, request, *args, allow_empty=True, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: kwargs[lookup_url_kwarg]}
+        )
+        validators = queryset.cache_validators(**self.retrieve_validator_options)
+        return self._conditional(validators, super().retrieve, request, *args, **kwargs)
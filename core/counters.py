@@ -0,0 +1,44 @@
+"""
+Platform-wide counters for the admin dashboard.
+
+The dashboard and its polling endpoint show the same four numbers. They
+are computed with one conditional-aggregation query per table and cached
+for PLATFORM_COUNTERS_TTL seconds; core.signals drops the cached copy as
+soon as a campaign's status, a user's role or the set of organisations
+changes, so the TTL only bounds staleness from bulk updates that bypass
+signals.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from campaigns.models import Campaign
+from organizations.models import Organisation
+
+CACHE_KEY = 'core:platform-counters'
+
+
+def compute_platform_counters():
+    """Count straight from the database: one query per table."""
+    campaigns = Campaign.objects.order_by().aggregate(
+        pending=Count('pk', filter=Q(status='pending')),
+        active=Count('pk', filter=Q(status='active')),
+    )
+    organisations = Organisation.objects.order_by().aggregate(total=Count('pk'))
+    users = get_user_model().objects.order_by().aggregate(donors=Count('pk', filter=Q(role='donor')))
+    return {
+        'pending_campaigns_count': campaigns['pending'],
+        'active_campaigns_count': campaigns['active'],
+        'total_organisations_count': organisations['total'],
+        'total_donors_count': users['donors'],
+    }
+
+
+def platform_counters():
+    """Return the dashboard counters, from the cache when fresh."""
+    return cache.get_or_set(CACHE_KEY, compute_platform_counters, settings.PLATFORM_COUNTERS_TTL)
+
+
+def invalidate_platform_counters():
+    cache.delete(CACHE_KEY)
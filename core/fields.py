@@ -0,0 +1,39 @@
+"""
+Image fields that enforce upload size limits before Pillow sees the file.
+
+forms.ImageField opens and verifies every upload in to_python(), before
+any validator runs, so an oversize file is fully parsed only to be
+rejected afterwards. LimitedImageField hands its forms a field that checks
+the size limit of the model field's ImageUploadValidator first.
+"""
+from django import forms
+from django.db import models
+
+from core.validators import ImageUploadValidator
+
+
+class LimitedImageFormField(forms.ImageField):
+    """forms.ImageField that rejects oversize uploads before opening them."""
+
+    def __init__(self, *, upload_validator=None, **kwargs):
+        self.upload_validator = upload_validator
+        super().__init__(**kwargs)
+
+    def to_python(self, data):
+        if data and self.upload_validator is not None:
+            self.upload_validator.check_size(data)
+        return super().to_python(data)
+
+
+class LimitedImageField(models.ImageField):
+    """ImageField whose form field applies its ImageUploadValidator's size limit first."""
+
+    def formfield(self, **kwargs):
+        upload_validator = next(
+            (validator for validator in self.validators if isinstance(validator, ImageUploadValidator)), None
+        )
+        return super().formfield(**{
+            'form_class': LimitedImageFormField,
+            'upload_validator': upload_validator,
+            **kwargs,
+        })
@@ -0,0 +1,262 @@
+"""
+Responsive image derivatives, generated off the request path.
+
+Uploading a campaign cover, organisation logo or banner, or profile
+picture queues an ImageVariantSet for the new file. A worker then renders
+thumbnail, card and hero widths in WebP and JPEG (see core.imaging) and
+stores them next to the original as
+
+    <original name without extension>.<content hash>.<variant>.<ext>
+
+so a changed image never reuses a cached URL. Rendering is CPU-bound and
+runs in a process pool (IMAGE_VARIANT_PROCESSES); the queue is drained
+either by `manage.py process_image_variants` (IMAGE_VARIANT_BACKEND =
+'worker') or by a small in-process thread ('thread').
+
+Pages look variants up through `variants_for()`, which is cached, and
+fall back to the original image until the set is complete, so a request
+never waits for rendering.
+"""
+import hashlib
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .imaging import render_variants
+from .models import ImageVariantSet
+
+logger = logging.getLogger(__name__)
+
+# Image fields that get variants, as 'app_label.Model': [field names]
+IMAGE_VARIANT_FIELDS = {
+    'campaigns.Campaign': ['cover_image'],
+    'organizations.Organisation': ['logo', 'banner'],
+    'accounts.CustomUser': ['profile_picture'],
+}
+
+# Lookups are cached for this long once a set is complete...
+VARIANTS_CACHE_TIMEOUT = 60 * 60 * 24
+# ...and briefly while it is not, so pages notice new variants soon
+PENDING_CACHE_TIMEOUT = 60
+
+STALE_AFTER = 60 * 15  # seconds before a running set is presumed abandoned
+
+_dispatcher = None
+_process_pool = None
+
+
+def cache_key(source):
+    return f'image-variants:{hashlib.md5(source.encode(), usedforsecurity=False).hexdigest()}'
+
+
+def variant_name(source, content_hash, variant, extension):
+    root, _ = os.path.splitext(source)
+    return f'{root}.{content_hash[:16]}.{variant}.{extension}'
+
+
+def variants_for(source):
+    """
+    The finished variants of an image as a list of dicts, or [] while they
+    are pending, failed or were never queued.
+    """
+    if not source:
+        return []
+    key = cache_key(source)
+    variants = cache.get(key)
+    if variants is None:
+        variant_set = ImageVariantSet.objects.filter(source=source).only('status', 'variants').first()
+        complete = variant_set is not None and variant_set.status == ImageVariantSet.STATUS_COMPLETE
+        variants = variant_set.variants if complete else []
+        cache.set(key, variants, VARIANTS_CACHE_TIMEOUT if complete else PENDING_CACHE_TIMEOUT)
+    return variants
+
+
+def prefetch_variants(sources):
+    """
+    Look up the variants of several images in one cache round trip and at
+    most one query, so a grid of cards does not look them up one by one.
+    Returns {source: variants}; pass it to `responsive_image` as `prefetched`.
+    """
+    keys = {cache_key(source): source for source in sources if source}
+    found = cache.get_many(keys)
+    prefetched = {keys[key]: variants for key, variants in found.items()}
+    missing = {source: key for key, source in keys.items() if key not in found}
+    if not missing:
+        return prefetched
+
+    complete = dict(ImageVariantSet.objects.filter(
+        source__in=missing, status=ImageVariantSet.STATUS_COMPLETE
+    ).values_list('source', 'variants'))
+    cache.set_many({missing[source]: complete[source] for source in complete}, VARIANTS_CACHE_TIMEOUT)
+    cache.set_many(
+        {key: [] for source, key in missing.items() if source not in complete}, PENDING_CACHE_TIMEOUT
+    )
+    prefetched.update({source: complete.get(source, []) for source in missing})
+    return prefetched
+
+
+def queue_variants(source, new_upload=False):
+    """
+    Queue rendering for an image's storage name. A source that already has
+    a set is left alone unless its last attempt failed, or `new_upload`
+    says the name now belongs to a different file (a deleted image's name
+    reused by a new upload), whose variants must not be served.
+    """
+    variant_set, created = ImageVariantSet.objects.get_or_create(source=source)
+    if not created:
+        if variant_set.status != ImageVariantSet.STATUS_FAILED and not new_upload:
+            return variant_set
+        ImageVariantSet.objects.filter(pk=variant_set.pk).update(
+            status=ImageVariantSet.STATUS_PENDING, error='', content_hash='', variants=[],
+        )
+        # Again on commit, in case a page cached the old set meanwhile
+        cache.delete(cache_key(source))
+        transaction.on_commit(lambda: cache.delete(cache_key(source)))
+    transaction.on_commit(lambda: dispatch(variant_set.pk))
+    return variant_set
+
+
+def dispatch(set_id):
+    """Hand a freshly queued set to the configured backend."""
+    if getattr(settings, 'IMAGE_VARIANT_BACKEND', 'worker') != 'thread':
+        # Picked up by `manage.py process_image_variants`
+        return
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-variants')
+    _dispatcher.submit(_run_in_thread, set_id)
+
+
+def _run_in_thread(set_id):
+    close_old_connections()
+    try:
+        process([set_id])
+    finally:
+        close_old_connections()
+
+
+def get_process_pool():
+    """The shared rendering pool, or None to render in the calling thread."""
+    global _process_pool
+    workers = getattr(settings, 'IMAGE_VARIANT_PROCESSES', 2)
+    if not workers:
+        return None
+    if _process_pool is None:
+        # Spawned, not forked: the 'thread' backend creates the pool inside
+        # a threaded web process, and a forked child could inherit locks
+        # (logging, database connections) held by other threads. Workers
+        # only import core.imaging, which needs no Django setup
+        _process_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    return _process_pool
+
+
+def claim(set_id):
+    """Atomically move a pending set to running; False if someone else won."""
+    return bool(ImageVariantSet.objects.filter(
+        pk=set_id, status=ImageVariantSet.STATUS_PENDING
+    ).update(status=ImageVariantSet.STATUS_RUNNING, started_at=timezone.now()))
+
+
+def process(set_ids):
+    """
+    Claim and render the given sets, rendering them in parallel on the
+    process pool. Returns the number completed.
+    """
+    pool = get_process_pool()
+    renders = []
+    for set_id in set_ids:
+        if not claim(set_id):
+            continue
+        variant_set = ImageVariantSet.objects.get(pk=set_id)
+        try:
+            with default_storage.open(variant_set.source, 'rb') as source_file:
+                data = source_file.read()
+        except Exception as exc:
+            _fail(variant_set, exc)
+            continue
+        content_hash = hashlib.sha256(data).hexdigest()
+        render = pool.submit(render_variants, data) if pool is not None else None
+        renders.append((variant_set, content_hash, data, render))
+
+    completed = 0
+    for variant_set, content_hash, data, render in renders:
+        try:
+            rendered = render.result() if render is not None else render_variants(data)
+            variants = _store(variant_set.source, content_hash, rendered)
+        except Exception as exc:
+            _fail(variant_set, exc)
+            continue
+        # A set requeued for a new upload meanwhile is left for the next run
+        if not ImageVariantSet.objects.filter(pk=variant_set.pk, status=ImageVariantSet.STATUS_RUNNING).update(
+            status=ImageVariantSet.STATUS_COMPLETE,
+            content_hash=content_hash,
+            variants=variants,
+            finished_at=timezone.now(),
+        ):
+            continue
+        cache.set(cache_key(variant_set.source), variants, VARIANTS_CACHE_TIMEOUT)
+        completed += 1
+    return completed
+
+
+def _store(source, content_hash, rendered):
+    variants = []
+    for variant, image_format, extension, width, height, content in rendered:
+        name = variant_name(source, content_hash, variant, extension)
+        # Content-hashed names make an existing file a finished copy of this one
+        if not default_storage.exists(name):
+            name = default_storage.save(name, ContentFile(content))
+        variants.append({
+            'variant': variant, 'format': image_format, 'name': name, 'width': width, 'height': height,
+        })
+    return variants
+
+
+def _fail(variant_set, exc):
+    logger.exception('Rendering variants of %s failed', variant_set.source, exc_info=exc)
+    ImageVariantSet.objects.filter(pk=variant_set.pk).update(
+        status=ImageVariantSet.STATUS_FAILED, error=str(exc), finished_at=timezone.now()
+    )
+
+
+def process_pending(limit=None):
+    """Render queued sets oldest first; returns the number completed."""
+    pending = ImageVariantSet.objects.filter(
+        status=ImageVariantSet.STATUS_PENDING
+    ).order_by('created_at').values_list('pk', flat=True)
+    if limit:
+        pending = pending[:limit]
+    return process(list(pending))
+
+
+def requeue_stale(now=None):
+    """Put sets that have been running longer than STALE_AFTER back in the queue."""
+    now = now or timezone.now()
+    return ImageVariantSet.objects.filter(
+        status=ImageVariantSet.STATUS_RUNNING, started_at__lt=now - timedelta(seconds=STALE_AFTER)
+    ).update(status=ImageVariantSet.STATUS_PENDING)
+
+
+def queue_existing():
+    """Queue every stored image that has no variant set yet; returns the count."""
+    from django.apps import apps
+
+    queued = 0
+    for label, fields in IMAGE_VARIANT_FIELDS.items():
+        model = apps.get_model(label)
+        for field in fields:
+            names = model._default_manager.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+            for name in names.values_list(field, flat=True).distinct().iterator():
+                if not ImageVariantSet.objects.filter(source=name).exists():
+                    queue_variants(name)
+                    queued += 1
+    return queued
@@ -0,0 +1,59 @@
+"""
+Pillow-only image resizing for the derivative pipeline.
+
+Kept free of Django imports so worker processes in the image variant
+process pool can import it without configuring settings (see
+core.image_variants).
+"""
+import io
+
+from PIL import Image, ImageOps
+
+# (name, width in px); heights follow the original's aspect ratio
+VARIANTS = (
+    ('thumbnail', 160),
+    ('card', 480),
+    ('hero', 1200),
+)
+
+# Pillow format name -> file extension
+FORMATS = (
+    ('WEBP', 'webp'),
+    ('JPEG', 'jpg'),
+)
+
+QUALITY = 80
+
+
+def render_variants(data, variants=VARIANTS):
+    """
+    Resize an image (as bytes) to each variant width in every output format.
+
+    Returns a list of (variant, format, extension, width, height, bytes).
+    Images are never upscaled: a variant wider than the original is made
+    at the original width, and variants that would come out identical to a
+    narrower one are dropped.
+    """
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'L'):
+            # JPEG has no alpha channel; flatten transparency onto white
+            background = Image.new('RGB', image.size, 'white')
+            rgba = image.convert('RGBA')
+            background.paste(rgba, mask=rgba.getchannel('A'))
+            image = background
+
+        results = []
+        seen_widths = set()
+        for variant, width in variants:
+            width = min(width, image.width)
+            if width in seen_widths:
+                continue
+            seen_widths.add(width)
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.Resampling.LANCZOS) if width != image.width else image
+            for image_format, extension in FORMATS:
+                buffer = io.BytesIO()
+                resized.save(buffer, format=image_format, quality=QUALITY, optimize=True)
+                results.append((variant, image_format, extension, width, height, buffer.getvalue()))
+        return results
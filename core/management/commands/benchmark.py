@@ -0,0 +1,275 @@
+"""
+Benchmark the hot pages and API endpoints at several data scales.
+
+For each scale the command seeds a fresh database with `seed_scale`, then
+drives the Django test client through the campaign pages, dashboards,
+admin lists, CSV exports and DRF endpoints as a suitable user, and
+reports per-endpoint latency percentiles, query counts and peak Python
+memory as JSON. Runs are deterministic apart from timing, so two JSON
+reports can be diffed between releases.
+
+By default every scale gets its own throwaway test database, so the
+configured database is never touched.
+"""
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from importlib import import_module
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from campaigns.models import Campaign
+from donations.models import Donation
+from organizations.models import Organisation
+
+CustomUser = get_user_model()
+
+DEFAULT_SCALES = '1000,100000,1000000'
+
+# (name, url name, url kwargs key, user, query string)
+ENDPOINTS = [
+    ('home', 'home', None, 'donor', {}),
+    ('campaign_list', 'campaigns:list', None, 'donor', {}),
+    ('campaign_detail', 'campaigns:detail', 'campaign', 'donor', {}),
+    ('org_dashboard', 'organizations:dashboard', None, 'owner', {}),
+    ('donor_dashboard', 'donor:dashboard', None, 'donor', {}),
+    ('admin_active_campaigns', 'core_admin:admin_active_campaigns', None, 'admin', {}),
+    ('admin_campaign_queue', 'core_admin:admin_campaign_queue', None, 'admin', {}),
+    ('admin_organisations', 'core_admin:admin_organisations', None, 'admin', {}),
+    ('admin_donors', 'core_admin:admin_donors', None, 'admin', {}),
+    ('admin_metrics_summary', 'core_admin:admin_metrics_summary', None, 'admin', {}),
+    ('export_donations_csv', 'organizations:export_donations', None, 'owner', {}),
+    ('export_donations_csv_gzip', 'organizations:export_donations', None, 'owner', {'compress': 'gzip'}),
+    ('api_organisation_list', 'api:organisation-list', None, 'donor', {}),
+    ('api_organisation_detail', 'api:organisation-detail', 'organisation', 'donor', {}),
+    ('api_donation_list', 'api:donation-list', None, 'admin', {}),
+    ('api_tag_list', 'api:tag-list', None, 'donor', {}),
+]
+
+
+def dataset_sizes(donations):
+    """Scale the other tables with the donation count."""
+    return {
+        'donations': donations,
+        'organisations': max(5, donations // 5000),
+        'campaigns': max(20, donations // 500),
+        'donors': max(50, donations // 20),
+        'tags': 30,
+    }
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+@contextmanager
+def count_session_store_calls():
+    """Count reads and writes of the configured session store while active."""
+    store = import_module(settings.SESSION_ENGINE).SessionStore
+    counts = Counter()
+    patched = {}
+    for name, counter in (('load', 'reads'), ('save', 'writes'), ('delete', 'writes')):
+        method = getattr(store, name)
+
+        def counted(self, *args, _method=method, _counter=counter, **kwargs):
+            counts[_counter] += 1
+            return _method(self, *args, **kwargs)
+
+        patched[name] = store.__dict__.get(name)
+        setattr(store, name, counted)
+    try:
+        yield counts
+    finally:
+        for name, original in patched.items():
+            if original is None:
+                delattr(store, name)
+            else:
+                setattr(store, name, original)
+
+
+def response_size(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds datasets of several sizes and reports p50/p95 latency, query '
+        'counts and peak memory for the hot views and API endpoints as JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales', default=DEFAULT_SCALES,
+            help=f'Comma-separated donation counts to benchmark (default: {DEFAULT_SCALES})',
+        )
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per endpoint (default: 20)')
+        parser.add_argument('--endpoints', default='', help='Comma-separated endpoint names to run (default: all)')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for the datasets (default: 1)')
+        parser.add_argument('--cold', action='store_true', help='Clear the cache before every request')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+        parser.add_argument(
+            '--use-current-database', action='store_true',
+            help='Seed into the configured database instead of a throwaway one (it must be disposable)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            scales = [int(scale) for scale in options['scales'].split(',') if scale.strip()]
+        except ValueError:
+            raise CommandError('--scales must be a comma-separated list of integers.')
+        if not scales or min(scales) < 1 or options['iterations'] < 1:
+            raise CommandError('Scales and --iterations must be positive.')
+
+        known = [name for name, *_ in ENDPOINTS]
+        selected = [name.strip() for name in options['endpoints'].split(',') if name.strip()] or known
+        unknown = sorted(set(selected) - set(known))
+        if unknown:
+            raise CommandError(f"Unknown endpoints: {', '.join(unknown)}. Choose from: {', '.join(known)}")
+        self.endpoints = [endpoint for endpoint in ENDPOINTS if endpoint[0] in selected]
+        self.iterations = options['iterations']
+        self.cold = options['cold']
+
+        report = {
+            'meta': {
+                'started_at': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'iterations': self.iterations,
+                'cache': 'cold' if self.cold else 'warm',
+                'seed': options['seed'],
+            },
+            'scales': {},
+        }
+
+        # Measure production-like settings: DEBUG's query log and the query
+        # profiler both add per-query overhead (and the log caps at 9000
+        # entries, which the seeding alone exceeds).
+        setup_test_environment(debug=False)
+        try:
+            with override_settings(QUERY_PROFILING=False):
+                for scale in scales:
+                    report['scales'][str(scale)] = self.run_scale(scale, options)
+        finally:
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stderr.write(f"Wrote {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    def run_scale(self, donations, options):
+        sizes = dataset_sizes(donations)
+        old_name = None
+        if not options['use_current_database']:
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stderr.write(f'Seeding {donations:,} donations...')
+            started = time.perf_counter()
+            call_command('seed_scale', seed=options['seed'], prefix=f'bench{donations}', stdout=self.stderr, **sizes)
+            seed_seconds = time.perf_counter() - started
+            cache.clear()
+
+            context = self.benchmark_context()
+            results = {}
+            for name, url_name, kwarg, user, params in self.endpoints:
+                self.stderr.write(f'  {name}')
+                results[name] = self.measure(url_name, kwarg, context, context['users'][user], params)
+            return {'dataset': sizes, 'seed_seconds': round(seed_seconds, 2), 'endpoints': results}
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def benchmark_context(self):
+        """Pick the busiest campaign, organisation owner and donor to request as."""
+        campaign = Campaign.objects.filter(status='active').order_by('-donation_count').first()
+        organisation = Organisation.objects.with_stats().order_by('-total_raised').first()
+        donor_id = (
+            Donation.objects.order_by().values('donor')
+            .annotate(n=Count('pk')).order_by('-n').values_list('donor', flat=True).first()
+        )
+        admin, _ = CustomUser.objects.get_or_create(
+            username='benchmark-admin', defaults={'is_staff': True, 'is_superuser': True, 'role': 'admin'},
+        )
+        return {
+            'campaign': campaign,
+            'organisation': organisation,
+            'users': {
+                'admin': admin,
+                'donor': CustomUser.objects.get(pk=donor_id),
+                'owner': CustomUser.objects.filter(organisation=organisation, role='org_owner').first(),
+            },
+        }
+
+    def measure(self, url_name, kwarg, context, user, params):
+        url = reverse(url_name, kwargs={'pk': context[kwarg].pk} if kwarg else None)
+        client = Client(raise_request_exception=False)
+        client.force_login(user)
+
+        # Warm up: the first request after login stamps the session and fills caches
+        with count_session_store_calls() as first_session_calls:
+            response_size(client.get(url, params))
+
+        timings = []
+        for _ in range(self.iterations):
+            if self.cold:
+                cache.clear()
+            started = time.perf_counter()
+            response = client.get(url, params)
+            size = response_size(response)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        if self.cold:
+            cache.clear()
+        with CaptureQueriesContext(connection) as queries, count_session_store_calls() as session_calls:
+            response_size(client.get(url, params))
+        # Count now: the next request resets the connection's query log
+        query_count = len(queries)
+
+        if self.cold:
+            cache.clear()
+        tracemalloc.start()
+        try:
+            response_size(client.get(url, params))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'url': url,
+            'status': response.status_code,
+            'bytes': size,
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'max_ms': round(max(timings), 2),
+            'queries': query_count,
+            'session_reads': session_calls['reads'],
+            'session_writes': session_calls['writes'],
+            'first_request_session_writes': first_session_calls['writes'],
+            'peak_memory_kib': round(peak / 1024, 1),
+        }
@@ -0,0 +1,99 @@
+"""
+Benchmark upload validation for the image fields.
+
+Generates a mix of uploads (valid, oversize, too many pixels, wrong
+format, not an image) and runs each through the field's form field and
+model validators, the way a ModelForm does. Reports the time per upload
+and how many times Pillow opened a file, per field, as JSON.
+"""
+import io
+import json
+import random
+import statistics
+import time
+from collections import Counter
+
+from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+FIELDS = ['organizations.Organisation.logo', 'organizations.Organisation.banner', 'accounts.CustomUser.profile_picture']
+
+KINDS = ['valid', 'oversize', 'too_large', 'wrong_format', 'not_an_image']
+
+
+def make_upload(kind, rng):
+    """An in-memory upload of the given kind."""
+    if kind == 'not_an_image':
+        return SimpleUploadedFile('notes.png', b'not an image' * 100, content_type='image/png')
+
+    image_format, size = 'PNG', (rng.randint(64, 400), rng.randint(64, 400))
+    if kind == 'too_large':
+        size = (rng.randint(2000, 3000), rng.randint(2000, 3000))
+    elif kind == 'wrong_format':
+        image_format = 'GIF'
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color=(rng.randrange(256), 0, 0)).save(buffer, format=image_format)
+    content = buffer.getvalue()
+    if kind == 'oversize':
+        # A valid image padded past every field's limit
+        content += b'\0' * (4 * 1024 * 1024)
+    return SimpleUploadedFile(f'upload.{image_format.lower()}', content, content_type=f'image/{image_format.lower()}')
+
+
+class Command(BaseCommand):
+    help = 'Reports per-upload validation time and Pillow parses for the image fields as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--uploads', type=int, default=500, help='Uploads per field (default: 500)')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        uploads = []
+        for kind in (KINDS * options['uploads'])[:options['uploads']]:
+            upload = make_upload(kind, rng)
+            uploads.append((kind, (upload.name, upload.read(), upload.content_type)))
+
+        report = {'uploads_per_field': len(uploads), 'fields': {}}
+        original_open = Image.open
+        for label in FIELDS:
+            app_label, model_name, field_name = label.split('.')
+            model_field = apps.get_model(app_label, model_name)._meta.get_field(field_name)
+            opens = Counter()
+            timings = {kind: [] for kind in KINDS}
+            rejected = Counter()
+
+            for kind, upload in uploads:
+                # A fresh file object per run, as for a new request
+                upload = SimpleUploadedFile(*upload)
+
+                def counting_open(*args, _kind=kind, **kwargs):
+                    opens[_kind] += 1
+                    return original_open(*args, **kwargs)
+
+                Image.open = counting_open
+                try:
+                    started = time.perf_counter()
+                    try:
+                        cleaned = model_field.formfield().clean(upload)
+                        model_field.run_validators(cleaned)
+                    except ValidationError:
+                        rejected[kind] += 1
+                    timings[kind].append((time.perf_counter() - started) * 1000)
+                finally:
+                    Image.open = original_open
+
+            report['fields'][label] = {
+                kind: {
+                    'uploads': len(timings[kind]),
+                    'rejected': rejected[kind],
+                    'pillow_opens_per_upload': round(opens[kind] / len(timings[kind]), 2),
+                    'mean_ms': round(statistics.mean(timings[kind]), 3),
+                }
+                for kind in KINDS if timings[kind]
+            }
+
+        self.stdout.write(json.dumps(report, indent=2))
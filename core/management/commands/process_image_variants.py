@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.image_variants import process_pending, queue_existing, requeue_stale
+from core.models import ImageVariantSet
+
+
+class Command(BaseCommand):
+    help = (
+        'Renders queued responsive image variants on the process pool and '
+        'requeues sets whose worker has died.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the queue once and exit instead of polling.',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5.0,
+            help='Seconds to wait between polls when the queue is empty (default: 5).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=20,
+            help='Images rendered in parallel per batch (default: 20).',
+        )
+        parser.add_argument(
+            '--backfill',
+            action='store_true',
+            help='First queue every stored image that has no variants yet.',
+        )
+
+    def handle(self, *args, **options):
+        poll_interval = options['poll_interval']
+        if poll_interval <= 0 or options['batch_size'] <= 0:
+            raise CommandError('--poll-interval and --batch-size must be positive.')
+
+        if options['backfill']:
+            self.stdout.write(f'Queued {queue_existing()} image(s).')
+
+        while True:
+            stale = requeue_stale()
+            if stale:
+                self.stdout.write(self.style.WARNING(f'Requeued {stale} stalled image(s).'))
+            processed = process_pending(limit=options['batch_size'])
+            if processed:
+                self.stdout.write(self.style.SUCCESS(f'Rendered variants of {processed} image(s).'))
+            if options['once']:
+                if not ImageVariantSet.objects.filter(status=ImageVariantSet.STATUS_PENDING).exists():
+                    return
+            elif not processed:
+                time.sleep(poll_interval)
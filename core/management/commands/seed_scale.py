@@ -0,0 +1,358 @@
+"""
+Generate production-scale synthetic data for load and benchmark testing.
+
+Rows are written in batches - with bulk_create, and for donations with a
+plain executemany() INSERT into a table whose secondary indexes are
+rebuilt afterwards - bypassing model signals, so the command patches up
+what those signals would have maintained itself:
+campaign funding counters are accumulated while donations are generated,
+and the search and tag-matching indexes are rebuilt at the end.
+
+Everything is drawn from one seeded random generator, so the same
+arguments always produce the same rows (timestamps are relative to the
+time of the run).
+"""
+import math
+import random
+import time
+from bisect import bisect
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from campaigns.models import Campaign
+from core.counters import invalidate_platform_counters
+from donations.models import Donation
+from organizations.models import Organisation
+from search.documents import DOCUMENTS
+from search.index import rebuild
+from tags import matching
+from tags.models import Tag
+from utils.constants import CAMPAIGN_CATEGORY_CHOICES
+
+CustomUser = get_user_model()
+
+BATCH_SIZE = 10000
+
+# Share of campaigns in each status
+CAMPAIGN_STATUSES = [('active', 70), ('closed', 15), ('pending', 10), ('draft', 3), ('rejected', 2)]
+
+# Donation amounts are log-normal: a median of about $30 with a long tail
+AMOUNT_MU = math.log(30)
+AMOUNT_SIGMA = 1.1
+MAX_AMOUNT = 100000
+
+# Popularity follows a power law: rank r gets weight 1 / r**exponent
+CAMPAIGN_POPULARITY = 1.1
+DONOR_ACTIVITY = 0.8
+TAG_POPULARITY = 1.0
+
+WORDS = (
+    'clean water school library clinic garden shelter meals books solar '
+    'wells bridge music art scholarships rescue forest river youth elders '
+    'training kitchen playground laptops vaccines housing repair community'
+).split()
+
+SOURCES = ['', '', '', 'newsletter', 'facebook', 'twitter', 'partner']
+REFERRERS = ['', '', '', 'https://www.google.com/', 'https://www.facebook.com/', 'https://news.example.org/story']
+
+
+def power_law_cum_weights(count, exponent):
+    return list(accumulate(1 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+def insert_rows(model, field_names, rows):
+    """
+    Insert plain value tuples with one executemany() per batch.
+
+    This is the INSERT that bulk_create issues, minus building a model
+    instance and compiling SQL for every row, which dominates the cost of
+    loading millions of donations. Values must already be database-ready.
+    """
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(model._meta.get_field(name).column) for name in field_names)
+    placeholders = ', '.join(['%s'] * len(field_names))
+    with connection.cursor() as cursor:
+        cursor.executemany(f'INSERT INTO {quote(model._meta.db_table)} ({columns}) VALUES ({placeholders})', rows)
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Let bulk_create keep the timestamps we generate on auto_now fields."""
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+@contextmanager
+def deferred_indexes(model):
+    """
+    Drop the table's secondary indexes for a bulk load and rebuild them after.
+
+    Building an index once over the loaded rows is several times faster
+    than updating it on every insert. Primary keys and unique constraints
+    stay in place, so integrity is still checked during the load.
+    """
+    table = model._meta.db_table
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    indexes = {
+        name: info['columns'] for name, info in constraints.items()
+        if info['index'] and not info['primary_key'] and not info['unique']
+    }
+    with connection.cursor() as cursor:
+        for name in indexes:
+            cursor.execute(f'DROP INDEX {quote(name)}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for name, columns in indexes.items():
+                cursor.execute(
+                    f'CREATE INDEX {quote(name)} ON {quote(table)} ({", ".join(quote(c) for c in columns)})'
+                )
+
+
+@contextmanager
+def fast_sqlite_writes():
+    """Relax SQLite durability for the duration of a bulk load."""
+    # The setting cannot change inside a transaction (e.g. under tests)
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA synchronous')
+        synchronous = cursor.fetchone()[0]
+        cursor.execute('PRAGMA synchronous = OFF')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA synchronous = {int(synchronous)}')
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates synthetic organisations, campaigns, donors and donations '
+        'at production scale with bulk inserts and deterministic randomness.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organisations', type=int, default=200, help='Organisations to create (default: 200)')
+        parser.add_argument('--campaigns', type=int, default=2000, help='Campaigns to create (default: 2000)')
+        parser.add_argument('--donors', type=int, default=50000, help='Donor accounts to create (default: 50000)')
+        parser.add_argument('--donations', type=int, default=1000000, help='Donations to create (default: 1000000)')
+        parser.add_argument('--tags', type=int, default=30, help='Tags to create and spread over campaigns (default: 30)')
+        parser.add_argument('--days', type=int, default=730, help='Days of history to spread campaigns over (default: 730)')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+        parser.add_argument(
+            '--prefix', default='scale',
+            help='Prefix for generated names, so several runs can share a database (default: scale)',
+        )
+
+    def handle(self, *args, **options):
+        if options['organisations'] < 1 or options['campaigns'] < 1 or options['donors'] < 1:
+            raise CommandError('At least one organisation, campaign and donor is required.')
+
+        self.random = random.Random(options['seed'])
+        self.prefix = f"{options['prefix']}-{options['seed']}"
+        self.now = timezone.now()
+        self.days = max(options['days'], 1)
+        if CustomUser.objects.filter(username__startswith=f'{self.prefix}-').exists():
+            raise CommandError(
+                f'Data with prefix "{self.prefix}" already exists; choose another --seed or --prefix.'
+            )
+
+        started = time.perf_counter()
+        with fast_sqlite_writes():
+            with transaction.atomic():
+                organisations = self.create_organisations(options['organisations'])
+                donors = self.create_donors(options['donors'])
+                campaigns = self.create_campaigns(options['campaigns'], organisations)
+                self.tag_campaigns(campaigns, options['tags'])
+            with deferred_indexes(Donation):
+                self.create_donations(options['donations'], campaigns, donors)
+
+        self.stdout.write('Rebuilding search index...')
+        for kind in DOCUMENTS:
+            rebuild(kind)
+        matching.invalidate()
+        invalidate_platform_counters()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(organisations):,} organisations, {len(campaigns):,} campaigns, "
+            f"{len(donors):,} donors and {options['donations']:,} donations "
+            f"in {time.perf_counter() - started:.1f}s."
+        ))
+
+    def sentence(self, words):
+        return ' '.join(self.random.choice(WORDS) for _ in range(words)).capitalize()
+
+    def past(self, max_days):
+        return self.now - timedelta(seconds=self.random.uniform(0, max_days * 86400))
+
+    def create_organisations(self, count):
+        organisations = Organisation.objects.bulk_create(
+            (
+                Organisation(
+                    name=f'{self.sentence(2)} {self.prefix}-{i}',
+                    mission=self.sentence(12),
+                    is_active=self.random.random() > 0.05,
+                )
+                for i in range(count)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+
+        # One owner per organisation, sharing a single password hash
+        password = make_password('password123')
+        CustomUser.objects.bulk_create(
+            (
+                CustomUser(
+                    username=f'{self.prefix}-owner-{i}', email=f'{self.prefix}-owner-{i}@example.com',
+                    password=password, role='org_owner', organisation=organisation,
+                )
+                for i, organisation in enumerate(organisations)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        self.stdout.write(f'Created {len(organisations):,} organisations and owners')
+        return organisations
+
+    def create_donors(self, count):
+        password = make_password('password123')
+        donors = CustomUser.objects.bulk_create(
+            (
+                CustomUser(
+                    username=f'{self.prefix}-donor-{i}', email=f'{self.prefix}-donor-{i}@example.com',
+                    password=password, role='donor',
+                )
+                for i in range(count)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        # Shuffle so activity rank is independent of creation order
+        self.random.shuffle(donors)
+        self.stdout.write(f'Created {len(donors):,} donors')
+        return donors
+
+    def create_campaigns(self, count, organisations):
+        statuses, status_weights = zip(*CAMPAIGN_STATUSES)
+        categories = [value for value, _ in CAMPAIGN_CATEGORY_CHOICES]
+        created = sorted(self.past(self.days) for _ in range(count))
+
+        campaigns = []
+        for i, created_at in enumerate(created):
+            status = self.random.choices(statuses, status_weights)[0]
+            campaigns.append(Campaign(
+                title=f'{self.sentence(3)} {i}'[:100],
+                slug=f'{self.prefix}-campaign-{i}',
+                description=self.sentence(40),
+                funding_goal=self.random.choice([1000, 2500, 5000, 10000, 25000, 50000, 100000]),
+                category=self.random.choice(categories),
+                organisation=self.random.choice(organisations),
+                status=status,
+                created_at=created_at,
+                updated_at=created_at,
+                closed_at=self.past(0) if status == 'closed' else None,
+            ))
+
+        with explicit_timestamps(Campaign._meta.get_field('created_at'), Campaign._meta.get_field('updated_at')):
+            campaigns = Campaign.objects.bulk_create(campaigns, batch_size=BATCH_SIZE)
+
+        # Most donations go to a few popular campaigns
+        self.random.shuffle(campaigns)
+        self.stdout.write(f'Created {len(campaigns):,} campaigns')
+        return campaigns
+
+    def tag_campaigns(self, campaigns, count):
+        if count < 1:
+            return
+        tags = Tag.objects.bulk_create(
+            Tag(name=f'{self.sentence(1)} {self.prefix}-{i}', slug=f'{self.prefix}-tag-{i}')
+            for i in range(count)
+        )
+        cum_weights = power_law_cum_weights(len(tags), TAG_POPULARITY)
+        through = Campaign.tags.through
+        links = []
+        for campaign in campaigns:
+            chosen = {
+                tags[bisect(cum_weights, self.random.random() * cum_weights[-1])]
+                for _ in range(self.random.randint(1, 4))
+            }
+            links.extend(through(campaign_id=campaign.pk, tag_id=tag.pk) for tag in chosen)
+        through.objects.bulk_create(links, batch_size=BATCH_SIZE)
+        self.stdout.write(f'Created {len(tags):,} tags on {len(links):,} campaign tag links')
+
+    def create_donations(self, count, campaigns, donors):
+        """
+        Insert donations batch by batch, then write the campaign counters.
+
+        Each donation picks a campaign and a donor by power-law popularity,
+        a log-normal amount, and a time after the campaign started that is
+        exponentially distributed, so donations cluster around launch.
+        """
+        campaign_weights = power_law_cum_weights(len(campaigns), CAMPAIGN_POPULARITY)
+        donor_weights = power_law_cum_weights(len(donors), DONOR_ACTIVITY)
+        campaign_total = campaign_weights[-1]
+        donor_total = donor_weights[-1]
+        lifetimes = [max((self.now - campaign.created_at).total_seconds(), 1) for campaign in campaigns]
+        campaign_ids = [campaign.pk for campaign in campaigns]
+        donor_ids = [donor.pk for donor in donors]
+
+        totals = [0] * len(campaigns)
+        donation_counts = [0] * len(campaigns)
+        campaign_donors = [set() for _ in campaigns]
+
+        rand = self.random.random
+        expovariate = self.random.expovariate
+        lognormvariate = self.random.lognormvariate
+        choice = self.random.choice
+        adapt_datetime = connection.ops.adapt_datetimefield_value
+        fields = ('campaign', 'donor', 'amount', 'reference_number', 'comment', 'source', 'referrer', 'created_at')
+
+        written = 0
+        while written < count:
+            rows = []
+            for i in range(written, min(written + BATCH_SIZE, count)):
+                c = bisect(campaign_weights, rand() * campaign_total)
+                donor_id = donor_ids[bisect(donor_weights, rand() * donor_total)]
+                amount = min(MAX_AMOUNT, max(1, int(lognormvariate(AMOUNT_MU, AMOUNT_SIGMA))))
+                offset = min(expovariate(4 / lifetimes[c]), lifetimes[c])
+
+                totals[c] += amount
+                donation_counts[c] += 1
+                campaign_donors[c].add(donor_id)
+                rows.append((
+                    campaign_ids[c], donor_id, amount, f'{self.prefix}-{i}', None,
+                    choice(SOURCES), choice(REFERRERS),
+                    adapt_datetime(campaigns[c].created_at + timedelta(seconds=offset)),
+                ))
+            with transaction.atomic():
+                insert_rows(Donation, fields, rows)
+            written += len(rows)
+            if written % (BATCH_SIZE * 20) == 0 or written == count:
+                self.stdout.write(f'  {written:,} / {count:,} donations')
+
+        quote = connection.ops.quote_name
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(
+                f'UPDATE {quote(Campaign._meta.db_table)} SET {quote("total_raised")} = %s, '
+                f'{quote("donation_count")} = %s, {quote("donor_count")} = %s WHERE {quote("id")} = %s',
+                [
+                    (totals[c], donation_counts[c], len(campaign_donors[c]), campaign_id)
+                    for c, campaign_id in enumerate(campaign_ids)
+                ],
+            )
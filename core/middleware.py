@@ -4,12 +4,23 @@ Custom middleware components for the CrowdFund application.
 This module contains middleware classes that handle various aspects
 of request/response processing across the application.
 """
+import logging
+import os
+import re
+import time
+import traceback
+from contextlib import ExitStack
+
 from django.conf import settings
-from django.core.exceptions import PermissionDenied
+from django.core.exceptions import MiddlewareNotUsed, PermissionDenied
+from django.db import connections
 from django.http import HttpResponseRedirect
-from django.urls import reverse, resolve
+from django.urls import reverse
 from django.utils.deprecation import MiddlewareMixin
 
+from core.allowlist import IPAllowlist, client_ip
+from core.paths import get_path_matcher
+
 
 class AdminIPRestrictionMiddleware(MiddlewareMixin):
     """
@@ -17,7 +28,19 @@ class AdminIPRestrictionMiddleware(MiddlewareMixin):
     
     This middleware checks if the request is for an admin page and,
     if so, verifies that the client IP is in the ADMIN_IP_ALLOWLIST.
+    The allowlist may mix addresses and CIDR ranges; it is parsed once
+    at startup (see core.allowlist). Behind a proxy tier, set
+    ADMIN_TRUSTED_PROXY_COUNT to the number of proxies that append to
+    X-Forwarded-For; otherwise the header is ignored.
     """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.allowlist = IPAllowlist(getattr(settings, 'ADMIN_IP_ALLOWLIST', None) or ())
+        # Nothing to restrict if no IP allowlist is configured
+        if not self.allowlist:
+            raise MiddlewareNotUsed
+        self.trusted_proxies = getattr(settings, 'ADMIN_TRUSTED_PROXY_COUNT', 0)
     
     def process_request(self, request):
         """
@@ -29,32 +52,12 @@ class AdminIPRestrictionMiddleware(MiddlewareMixin):
         Returns:
             None if access is allowed, PermissionDenied otherwise
         """
-        # Check if this is an admin request
-        try:
-            resolved = resolve(request.path)
-            admin_request = resolved.app_name == 'admin' or resolved.namespace == 'admin'
-        except:
-            admin_request = False
-        
-        # Skip non-admin requests
-        if not admin_request:
-            return None
-        
-        # Skip if no IP allowlist is configured
-        if not hasattr(settings, 'ADMIN_IP_ALLOWLIST') or not settings.ADMIN_IP_ALLOWLIST:
+        # Skip non-admin requests (answered by the shared precompiled matcher)
+        if not get_path_matcher(getattr(request, 'urlconf', None)).is_admin(request.path_info):
             return None
         
-        # Get client IP
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        
-        if x_forwarded_for:
-            # In case of proxy, get the real IP
-            ip = x_forwarded_for.split(',')[0].strip()
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        
-        # Allow access if IP is in the allowlist
-        if ip in settings.ADMIN_IP_ALLOWLIST:
+        # Allow access if the client IP is in an allowlisted network
+        if client_ip(request, self.trusted_proxies) in self.allowlist:
             return None
         
         # Deny access
@@ -168,10 +171,103 @@ class ResponseTimeMiddleware(MiddlewareMixin):
         
         # Log slow responses (over 1000ms)
         if response_time > 1000:
-            import logging
             logger = logging.getLogger('django.request')
             logger.warning(
                 f'Slow response ({int(response_time)}ms): {request.method} {request.path}'
             )
         
         return response
+
+
+class QueryProfilingMiddleware:
+    """
+    Middleware to count and time the database queries behind each request.
+
+    Enabled with the QUERY_PROFILING setting. Every query run while the
+    request is handled passes through a `connection.execute_wrapper`, which
+    records the query count, total database time and how often each SQL
+    shape (the statement with literals and placeholder lists collapsed)
+    repeats. The totals are added as `X-DB-Queries` and `X-DB-Time-ms`
+    headers, and a shape repeated QUERY_PROFILING_REPEAT_THRESHOLD times -
+    the signature of an N+1 loop - is logged with the application code
+    that issued it.
+
+    Queries run while a streaming response is consumed are not counted.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.repeat_threshold = getattr(settings, 'QUERY_PROFILING_REPEAT_THRESHOLD', 10)
+
+    def __call__(self, request):
+        profile = QueryProfile(self.repeat_threshold)
+        request.query_profile = profile
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            response = self.get_response(request)
+
+        response['X-DB-Queries'] = profile.count
+        response['X-DB-Time-ms'] = f'{profile.duration * 1000:.1f}'
+
+        if profile.repeated:
+            logger = logging.getLogger('django.request')
+            for shape, (count, call_site) in profile.repeated.items():
+                logger.warning(
+                    f'Repeated query ({count}x) on {request.method} {request.path} '
+                    f'from {call_site}: {shape}'
+                )
+        return response
+
+
+class QueryProfile:
+    """Query statistics for one request, collected as an execute wrapper."""
+
+    def __init__(self, repeat_threshold):
+        self.repeat_threshold = repeat_threshold
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = {}
+        # shape -> (count, call site), for shapes over the threshold
+        self.repeated = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.record(sql)
+
+    def record(self, sql):
+        shape = normalize_sql(sql)
+        seen = self.shapes.get(shape, 0) + 1
+        self.shapes[shape] = seen
+        if seen == self.repeat_threshold:
+            self.repeated[shape] = (seen, application_call_site())
+        elif seen > self.repeat_threshold:
+            self.repeated[shape] = (seen, self.repeated[shape][1])
+
+
+def normalize_sql(sql):
+    """Reduce a statement to its shape: literals and IN-list lengths removed."""
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+(?:\.\d+)?\b', '?', sql)
+    sql = re.sub(r'%s', '?', sql)
+    sql = re.sub(r'\?(?:\s*,\s*\?)+', '?', sql)
+    return ' '.join(sql.split())
+
+
+def application_call_site():
+    """Describe the innermost stack frame in project code, not libraries."""
+    root = str(settings.BASE_DIR)
+    this_file = os.path.abspath(__file__)
+    for frame in reversed(traceback.extract_stack()):
+        filename = os.path.abspath(frame.filename)
+        if (filename.startswith(root) and filename != this_file
+                and 'site-packages' not in filename):
+            return f'{os.path.relpath(filename, root)}:{frame.lineno} in {frame.name}'
+    return 'unknown call site'
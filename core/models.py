@@ -1,3 +1,46 @@
 from django.db import models
 
-# Create your models here.
+
+class ImageVariantSet(models.Model):
+    """
+    Resized variants of one uploaded image
+
+    A row is queued when an image is uploaded and filled in by a worker
+    (see core.image_variants). The variant files live next to the
+    original under content-hashed names; `variants` lists them for the
+    `responsive_image` template tag.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETE = 'complete'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETE, 'Complete'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    # Storage name of the original image
+    source = models.CharField(max_length=255, unique=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    content_hash = models.CharField(max_length=64, blank=True)
+    # [{"variant": "card", "format": "WEBP", "name": ..., "width": 480, "height": 320}, ...]
+    variants = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True)
+
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Image Variant Set"
+        verbose_name_plural = "Image Variant Sets"
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='imagevariant_status_idx'),
+        ]
+
+    def __str__(self):
+        return f'Variants of {self.source} ({self.status})'
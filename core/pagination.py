@@ -0,0 +1,145 @@
+"""
+Keyset (cursor) pagination.
+
+OFFSET pagination makes the database walk and discard every row before the
+requested page and needs a COUNT(*) to number the pages, so deep pages of
+the campaign and donation tables get slower the further back you go. Keyset
+pagination instead remembers the (created_at, id) of the last row shown and
+asks for rows strictly after it, which an index on created_at answers in
+the same time for page 1000 as for page 1. The trade-off is that pages have
+no numbers: templates get next/previous links only.
+"""
+import base64
+import binascii
+from datetime import datetime
+
+from django.db.models import Q
+from django.http import Http404
+from rest_framework.pagination import CursorPagination
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(direction, created_at, pk):
+    """Encode a page boundary as an opaque URL-safe token."""
+    raw = f'{direction}|{created_at.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return `(direction, created_at, pk)` for a token from encode_cursor."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, created_at, pk = base64.urlsafe_b64decode(padded).decode().split('|')
+        if direction not in ('next', 'prev'):
+            raise ValueError(direction)
+        return direction, datetime.fromisoformat(created_at), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise InvalidCursor(token) from exc
+
+
+class KeysetPage:
+    """A page of results with opaque cursors to its neighbours"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset newest first by (created_at, id).
+
+    Each page costs one query of at most `per_page + 1` rows - the extra row
+    only tells us whether there is another page - and never a COUNT(*).
+    """
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+
+    def page(self, cursor=None):
+        """Return the KeysetPage after (or before) `cursor`; raises InvalidCursor."""
+        if not cursor:
+            rows = list(self.queryset.order_by('-created_at', '-id')[:self.per_page + 1])
+            return self._page(rows[:self.per_page], has_more_after=len(rows) > self.per_page, has_more_before=False)
+
+        direction, created_at, pk = decode_cursor(cursor)
+        if direction == 'next':
+            rows = list(self.queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+            ).order_by('-created_at', '-id')[:self.per_page + 1])
+            return self._page(rows[:self.per_page], has_more_after=len(rows) > self.per_page, has_more_before=True)
+
+        # Walk backwards in ascending order, then restore newest-first order
+        rows = list(self.queryset.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+        ).order_by('created_at', 'id')[:self.per_page + 1])
+        has_more_before = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        return self._page(rows, has_more_after=True, has_more_before=has_more_before)
+
+    def _page(self, rows, has_more_after, has_more_before):
+        next_cursor = previous_cursor = None
+        if rows and has_more_after:
+            next_cursor = encode_cursor('next', rows[-1].created_at, rows[-1].pk)
+        if rows and has_more_before:
+            previous_cursor = encode_cursor('prev', rows[0].created_at, rows[0].pk)
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+class KeysetPaginationMixin:
+    """
+    Keyset pagination for ListViews, driven by `?cursor=`.
+
+    Replaces Django's numbered pagination; `page_obj` in the template is a
+    KeysetPage exposing has_next/has_previous and next_cursor/previous_cursor.
+    """
+    cursor_kwarg = 'cursor'
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, page_size)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor:
+            raise Http404('Invalid page cursor.')
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    DRF cursor pagination, newest first by (created_at, id), with no COUNT(*)
+
+    Views that pair it with an OrderingFilter should only allow created_at:
+    the cursor positions on the first ordering field, so a non-unique one
+    such as total_raised would skip or repeat rows between pages. Whatever
+    the direction, id is appended as the tiebreaker.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            return ordering
+        return ordering + ('-id' if ordering[0].startswith('-') else 'id',)
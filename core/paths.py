@@ -0,0 +1,152 @@
+"""
+Precompiled URL classification for middleware.
+
+AuthRequiredMiddleware needs to know whether a path is exempt from login
+and AdminIPRestrictionMiddleware whether it belongs to the Django admin.
+Running resolve() for that on every request walks the whole URLconf,
+which under crawler traffic is a real share of CPU.
+
+PathMatcher is built once per URLconf from the reverse dictionaries:
+
+- exempt views whose routes have no parameters become a set of literal
+  paths, answered with a set lookup;
+- parameterised exempt routes and the admin include prefixes become a
+  few compiled regexes that rule paths out without resolving;
+- only a path one of those regexes accepts is resolved, to account for
+  earlier patterns shadowing it, and the answer is memoized per path in
+  a bounded LRU.
+
+The matcher never disagrees with resolve(): a path can only resolve to a
+view whose full pattern matches it.
+"""
+import functools
+import re
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import Resolver404, get_resolver, resolve
+
+# Distinct paths whose classification is memoized per matcher
+DEFAULT_CACHE_SIZE = 4096
+
+MATCHER_SETTINGS = {
+    'ROOT_URLCONF', 'LOGIN_EXEMPT_URL_NAMES', 'LOGIN_EXEMPT_PATH_PREFIXES', 'PATH_MATCHER_CACHE_SIZE',
+}
+
+
+class PathMatch(NamedTuple):
+    exempt: bool
+    admin: bool
+
+
+def _is_admin(match):
+    return match.app_name == 'admin' or match.namespace == 'admin'
+
+
+def _literal(regex):
+    """The text a regex fragment matches if it has no special characters, else None."""
+    if re.fullmatch(r'(?:[^\\.^$*+?{}\[\]|()]|\\[^A-Za-z0-9])*', regex):
+        return re.sub(r'\\(.)', r'\1', regex)
+    return None
+
+
+def _name_patterns(resolver, view_name):
+    """
+    Yield (full regex, literal path or None) for each route of a view name,
+    following namespaces the way reverse() does.
+    """
+    *namespaces, name = view_name.split(':')
+    prefix = ''
+    for namespace in namespaces:
+        if namespace not in resolver.namespace_dict and namespace in resolver.app_dict:
+            namespace = resolver.app_dict[namespace][0]
+        try:
+            extra, resolver = resolver.namespace_dict[namespace]
+        except KeyError:
+            return
+        prefix += extra
+
+    literal_prefix = _literal(prefix)
+    for possibilities, pattern, _defaults, _converters in resolver.reverse_dict.getlist(name):
+        for result, params in possibilities:
+            if params or literal_prefix is None:
+                yield '^' + prefix + pattern, None
+            else:
+                yield '^' + prefix + pattern, '/' + literal_prefix + result % {}
+
+
+class PathMatcher:
+    """Answers "is this path login-exempt / an admin page?" for one URLconf."""
+
+    def __init__(self, exempt_names=(), exempt_prefixes=(), urlconf=None, cache_size=DEFAULT_CACHE_SIZE):
+        self.urlconf = urlconf
+        self.exempt_names = frozenset(exempt_names)
+        self.exempt_prefixes = tuple(exempt_prefixes)
+        resolver = get_resolver(urlconf)
+
+        self.exempt_paths = set()
+        exempt_patterns = set()
+        for view_name in self.exempt_names:
+            for pattern, literal in _name_patterns(resolver, view_name):
+                if literal is not None:
+                    if self._resolved_name(literal) == view_name:
+                        self.exempt_paths.add(literal)
+                else:
+                    exempt_patterns.add(pattern)
+        self.exempt_regexes = [re.compile(pattern) for pattern in sorted(exempt_patterns)]
+
+        self.admin_regexes = [
+            url_pattern.pattern.regex
+            for url_pattern in resolver.url_patterns
+            if getattr(url_pattern, 'url_patterns', None) is not None
+            and (url_pattern.namespace == 'admin' or url_pattern.app_name == 'admin')
+        ]
+
+        self.match = functools.lru_cache(maxsize=cache_size)(self._match)
+
+    def _resolved_name(self, path):
+        try:
+            return resolve(path, self.urlconf).view_name
+        except Resolver404:
+            return None
+
+    def _match(self, path):
+        exempt = path.startswith(self.exempt_prefixes) or path in self.exempt_paths
+
+        # URL patterns match the path without its leading slash
+        relative = path[1:] if path.startswith('/') else path
+        may_be_admin = any(regex.search(relative) for regex in self.admin_regexes)
+        may_be_exempt = not exempt and any(regex.search(relative) for regex in self.exempt_regexes)
+        if not (may_be_exempt or may_be_admin):
+            return PathMatch(exempt=exempt, admin=False)
+
+        try:
+            resolved = resolve(path, self.urlconf)
+        except Resolver404:
+            return PathMatch(exempt=exempt, admin=False)
+        return PathMatch(exempt=exempt or resolved.view_name in self.exempt_names, admin=_is_admin(resolved))
+
+    def is_exempt(self, path):
+        return self.match(path).exempt
+
+    def is_admin(self, path):
+        return self.match(path).admin
+
+
+@functools.lru_cache(maxsize=None)
+def get_path_matcher(urlconf=None):
+    """The shared matcher for a URLconf (default: ROOT_URLCONF), built on first use."""
+    return PathMatcher(
+        exempt_names=getattr(settings, 'LOGIN_EXEMPT_URL_NAMES', ()),
+        exempt_prefixes=getattr(settings, 'LOGIN_EXEMPT_PATH_PREFIXES', ()),
+        urlconf=urlconf,
+        cache_size=getattr(settings, 'PATH_MATCHER_CACHE_SIZE', DEFAULT_CACHE_SIZE),
+    )
+
+
+@receiver(setting_changed)
+def _reset_path_matchers(*, setting, **kwargs):
+    if setting in MATCHER_SETTINGS:
+        get_path_matcher.cache_clear()
@@ -0,0 +1,63 @@
+"""
+Signal handlers that drop the cached platform counters when a change
+could move one of them, and queue responsive variants of newly uploaded
+images.
+"""
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from campaigns.models import Campaign
+from organizations.models import Organisation
+
+from .counters import invalidate_platform_counters
+from .image_variants import IMAGE_VARIANT_FIELDS, queue_variants
+
+
+def _touches(created, update_fields, field):
+    return created or update_fields is None or field in update_fields
+
+
+@receiver(post_save, sender=Campaign)
+def campaign_saved(sender, instance, created, update_fields=None, **kwargs):
+    if _touches(created, update_fields, 'status'):
+        invalidate_platform_counters()
+
+
+@receiver(post_save, sender=get_user_model())
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if _touches(created, update_fields, 'role'):
+        invalidate_platform_counters()
+
+
+@receiver(post_save, sender=Organisation)
+def organisation_saved(sender, instance, created, **kwargs):
+    if created:
+        invalidate_platform_counters()
+
+
+@receiver(post_delete, sender=Campaign)
+@receiver(post_delete, sender=Organisation)
+@receiver(post_delete, sender=get_user_model())
+def counted_object_deleted(sender, instance, **kwargs):
+    invalidate_platform_counters()
+
+
+def note_image_uploads(sender, instance, **kwargs):
+    # Runs before the fields commit their files, so new uploads are still uncommitted
+    instance._image_variant_uploads = [
+        field for field in IMAGE_VARIANT_FIELDS[sender._meta.label]
+        if getattr(instance, field) and not getattr(instance, field)._committed
+    ]
+
+
+def queue_image_variants(sender, instance, **kwargs):
+    for field in getattr(instance, '_image_variant_uploads', ()):
+        queue_variants(getattr(instance, field).name, new_upload=True)
+    instance._image_variant_uploads = []
+
+
+for label in IMAGE_VARIANT_FIELDS:
+    pre_save.connect(note_image_uploads, sender=apps.get_model(label), dispatch_uid=f'note_image_uploads:{label}')
+    post_save.connect(queue_image_variants, sender=apps.get_model(label), dispatch_uid=f'queue_image_variants:{label}')
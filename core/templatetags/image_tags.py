@@ -0,0 +1,62 @@
+"""
+Template tags for responsive images.
+
+    {% load image_tags %}
+    {% responsive_image campaign.cover_image 'card' sizes='(min-width: 768px) 33vw, 100vw' alt=campaign.title class='card-img-top' %}
+
+renders a <picture> with WebP and JPEG srcsets built from the image's
+generated variants (see core.image_variants), with the named variant as
+the fallback src. Until the variants exist it renders a plain <img> of
+the original upload.
+"""
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+from core.image_variants import variants_for
+
+register = template.Library()
+
+
+def _srcset(variants, image_format):
+    return ', '.join(
+        f"{default_storage.url(variant['name'])} {variant['width']}w"
+        for variant in variants if variant['format'] == image_format
+    )
+
+
+@register.simple_tag
+def responsive_image(image, variant='card', sizes='100vw', prefetched=None, **attrs):
+    """
+    Render an image field value with srcset, falling back to the original.
+
+    `prefetched` is the map from core.image_variants.prefetch_variants(),
+    which saves a grid of images a cache lookup each. Extra keyword
+    arguments (alt, class, style, ...) become <img> attributes; images are
+    lazy-loaded unless `loading` says otherwise.
+    """
+    if not image:
+        return ''
+    attrs.setdefault('alt', '')
+    attrs.setdefault('loading', 'lazy')
+    if prefetched is not None and image.name in prefetched:
+        variants = prefetched[image.name]
+    else:
+        variants = variants_for(image.name)
+
+    if not variants:
+        return format_html(
+            '<img src="{}"{}>', image.url, format_html_join('', ' {}="{}"', attrs.items()),
+        )
+
+    jpegs = [item for item in variants if item['format'] == 'JPEG']
+    # The requested size, or the widest one when the original was narrower
+    fallback = next((item for item in jpegs if item['variant'] == variant), jpegs[-1])
+    attrs.update(width=fallback['width'], height=fallback['height'])
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}"{}></picture>',
+        _srcset(variants, 'WEBP'), sizes,
+        default_storage.url(fallback['name']), _srcset(variants, 'JPEG'), sizes,
+        format_html_join('', ' {}="{}"', attrs.items()),
+    )
@@ -1,3 +1,719 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed, PermissionDenied, ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import CommandError
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import Resolver404, resolve, reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.filters import OrderingFilter
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from campaigns.models import Campaign
+from core.allowlist import IPAllowlist, client_ip
+from core.counters import platform_counters
+from core.image_variants import prefetch_variants, process_pending, queue_variants, variants_for
+from core.imaging import render_variants
+from core.middleware import AdminIPRestrictionMiddleware, QueryProfilingMiddleware, normalize_sql
+from core.models import ImageVariantSet
+from core.pagination import (
+    CreatedAtCursorPagination, InvalidCursor, KeysetPaginator, decode_cursor, encode_cursor,
+)
+from core.paths import get_path_matcher
+from core.validators import ImageInfo, ImageUploadValidator, inspect_image
+from donations.models import Donation
+from donations.tests import DonationFixturesMixin
+from organizations.models import Organisation
+from organizations.views import OrganisationDetailView
+
+CustomUser = get_user_model()
+
+
+class KeysetPaginatorTests(DonationFixturesMixin, TestCase):
+
+    def setUp(self):
+        self.create_fixtures()
+        now = timezone.now()
+        for index in range(11):
+            campaign = Campaign.objects.create(
+                title=f'Campaign {index}', slug=f'campaign-{index}', description='Keyset',
+                funding_goal=100, category='education', organisation=self.organisation, status='active',
+            )
+            # Pairs of campaigns share a timestamp, so id has to break ties
+            Campaign.objects.filter(pk=campaign.pk).update(created_at=now - timedelta(minutes=index // 2))
+        self.expected = list(Campaign.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+
+    def test_forward_and_backward_walks_visit_every_row_once(self):
+        paginator = KeysetPaginator(Campaign.objects.all(), 5)
+
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        forward = [campaign.pk for page in pages for campaign in page]
+
+        self.assertEqual(forward, self.expected)
+        self.assertFalse(pages[0].has_previous())
+        self.assertEqual([len(page) for page in pages], [5, 5, 2])
+
+        previous = paginator.page(pages[-1].previous_cursor)
+        self.assertEqual([campaign.pk for campaign in previous], self.expected[5:10])
+        first = paginator.page(previous.previous_cursor)
+        self.assertEqual([campaign.pk for campaign in first], self.expected[:5])
+        self.assertFalse(first.has_previous())
+
+    def test_deep_pages_cost_one_query_without_count(self):
+        paginator = KeysetPaginator(Campaign.objects.all(), 2)
+        cursor = paginator.page().next_cursor
+        for _ in range(3):
+            cursor = paginator.page(cursor).next_cursor
+
+        with CaptureQueriesContext(connection) as queries:
+            page = paginator.page(cursor)
+            list(page)
+
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('COUNT(', queries[0]['sql'].upper())
+        self.assertNotIn('OFFSET', queries[0]['sql'].upper())
+
+    def test_cursor_round_trip_and_tampering(self):
+        created_at = timezone.now()
+        self.assertEqual(decode_cursor(encode_cursor('next', created_at, 7)), ('next', created_at, 7))
+        with self.assertRaises(InvalidCursor):
+            decode_cursor('not-a-cursor')
+
+    def test_campaign_list_follows_cursor_links(self):
+        for index in range(11, 15):
+            Campaign.objects.create(
+                title=f'Campaign {index}', slug=f'campaign-{index}', description='Keyset',
+                funding_goal=100, category='education', organisation=self.organisation, status='active',
+            )
+        self.expected = list(Campaign.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+        self.client.login(username='donor1', password='password123')
+        url = reverse('campaigns:list')
+
+        first = self.client.get(url)
+        second = self.client.get(url, {'cursor': first.context['page_obj'].next_cursor})
+
+        self.assertEqual([c.pk for c in first.context['campaigns']], self.expected[:12])
+        self.assertEqual([c.pk for c in second.context['campaigns']], self.expected[12:])
+        self.assertEqual(self.client.get(url, {'cursor': 'garbage'}).status_code, 404)
+
+
+class CreatedAtCursorPaginationTests(DonationFixturesMixin, TestCase):
+
+    def test_donations_page_by_cursor_without_count(self):
+        self.create_fixtures()
+        for days_ago in range(25):
+            self.donate_at(timezone.now() - timedelta(days=days_ago), 10)
+        pagination = CreatedAtCursorPagination()
+        factory = APIRequestFactory()
+
+        first = pagination.paginate_queryset(Donation.objects.all(), Request(factory.get('/api/v1/donations/')))
+        next_url = pagination.get_next_link()
+        with CaptureQueriesContext(connection) as queries:
+            second = CreatedAtCursorPagination().paginate_queryset(Donation.objects.all(), Request(factory.get(next_url)))
+
+        self.assertEqual(len(first), 20)
+        self.assertEqual(len(second), 5)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('COUNT(', queries[0]['sql'].upper())
+
+
+    def test_ordering_filter_pages_ties_by_id(self):
+        self.create_fixtures()
+        now = timezone.now()
+        for _ in range(25):
+            self.donate_at(now, 10)  # every row ties on created_at
+        factory = APIRequestFactory()
+        view = SimpleNamespace(filter_backends=[OrderingFilter], ordering_fields=['created_at'])
+
+        seen, url = [], factory.get('/api/v1/donations/', {'ordering': 'created_at', 'page_size': 10}).get_full_path()
+        while url:
+            pagination = CreatedAtCursorPagination()
+            request = Request(factory.get(url))
+            self.assertEqual(pagination.get_ordering(request, Donation.objects.all(), view), ('created_at', 'id'))
+            seen.extend(donation.pk for donation in pagination.paginate_queryset(Donation.objects.all(), request, view))
+            url = pagination.get_next_link()
+
+        self.assertEqual(seen, sorted(Donation.objects.values_list('pk', flat=True)))
+
+
+class ConditionalGetTests(DonationFixturesMixin, TestCase):
+
+    def setUp(self):
+        self.create_fixtures()
+        self.client.login(username='donor1', password='password123')
+        # Absorb the one-off session writes of the first request
+        self.client.get(reverse('home'))
+
+    def assertRevalidates(self, url, **extra):
+        response = self.client.get(url, **extra)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        # Session, user and one validator query; no object loading
+        with self.assertNumQueries(3):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **extra)
+        self.assertEqual(cached.status_code, 304)
+        return etag
+
+    def test_campaign_detail_changes_with_donations_and_edits(self):
+        url = reverse('campaigns:detail', kwargs={'pk': self.campaign.pk})
+        etag = self.assertRevalidates(url)
+
+        self.donate_at(timezone.now(), 25)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        self.campaign.title = 'Renamed'
+        self.campaign.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_campaign_detail_if_modified_since(self):
+        url = reverse('campaigns:detail', kwargs={'pk': self.campaign.pk})
+        last_modified = self.client.get(url)['Last-Modified']
+
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+    def test_etag_varies_by_viewer(self):
+        url = reverse('campaigns:detail', kwargs={'pk': self.campaign.pk})
+        etag = self.client.get(url)['ETag']
+
+        CustomUser.objects.create_user(username='donor2', password='password123', role='donor')
+        self.client.login(username='donor2', password='password123')
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_hidden_campaign_is_not_revalidated(self):
+        self.campaign.status = 'pending'
+        self.campaign.save()
+        url = reverse('campaigns:detail', kwargs={'pk': self.campaign.pk})
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='*').status_code, 404)
+
+    def test_organisation_detail_changes_with_campaign_donations(self):
+        # Only the validators are exercised: a 200 would render the
+        # organisation detail template, which the app does not ship
+        url = reverse('organizations:detail', kwargs={'pk': self.organisation.pk})
+        request = RequestFactory().get(url)
+        request.user = self.donor
+        view = OrganisationDetailView()
+        view.setup(request, pk=self.organisation.pk)
+        validators = view.get_validators()
+
+        with self.assertNumQueries(3):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='*').status_code, 304)
+
+        self.donate_at(timezone.now(), 25)
+
+        self.assertNotEqual(view.get_validators(), validators)
+
+    def test_etag_varies_by_csrf_secret(self):
+        url = reverse('campaigns:detail', kwargs={'pk': self.campaign.pk})
+        etag = self.assertRevalidates(url)
+
+        # As on re-login, which rotates the CSRF secret
+        self.client.cookies[settings.CSRF_COOKIE_NAME] = 'x' * 32
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    @override_settings(MESSAGE_STORAGE='django.contrib.messages.storage.session.SessionStorage')
+    def test_pending_messages_are_rendered_not_revalidated(self):
+        url = reverse('campaigns:detail', kwargs={'pk': self.campaign.pk})
+        etag = self.assertRevalidates(url)
+        session = self.client.session
+        session['_messages'] = '[["__json_message",0,25,"Thanks for your donation"]]'
+        session.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Thanks for your donation')
+        self.assertFalse(response.has_header('ETag'))
+        # Once shown, the page revalidates again
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_organisation_api_list_and_retrieve(self):
+        list_url = reverse('api:organisation-list')
+        detail_url = reverse('api:organisation-detail', kwargs={'pk': self.organisation.pk})
+        list_etag = self.assertRevalidates(list_url, HTTP_ACCEPT='application/json')
+        detail_etag = self.assertRevalidates(detail_url, HTTP_ACCEPT='application/json')
+
+        self.organisation.mission = 'A new mission'
+        self.organisation.save()
+
+        self.assertEqual(self.client.get(list_url, HTTP_IF_NONE_MATCH=list_etag, HTTP_ACCEPT='application/json').status_code, 200)
+        self.assertEqual(self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag, HTTP_ACCEPT='application/json').status_code, 200)
+
+
+class PlatformCountersTests(DonationFixturesMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.create_fixtures()
+        Campaign.objects.create(
+            title='Pending Campaign', slug='pending-campaign', description='Awaiting review',
+            funding_goal=100, category='education', organisation=self.organisation, status='pending',
+        )
+
+    def test_counts_with_one_query_per_table_then_cache(self):
+        expected = {
+            'pending_campaigns_count': 1,
+            'active_campaigns_count': 1,
+            'total_organisations_count': 1,
+            'total_donors_count': 1,
+        }
+        with self.assertNumQueries(3):
+            self.assertEqual(platform_counters(), expected)
+        with self.assertNumQueries(0):
+            self.assertEqual(platform_counters(), expected)
+
+    def test_status_and_role_changes_invalidate(self):
+        platform_counters()
+
+        self.campaign.status = 'closed'
+        self.campaign.save()
+        self.assertEqual(platform_counters()['active_campaigns_count'], 0)
+
+        self.donor.role = 'org_owner'
+        self.donor.save(update_fields=['role'])
+        self.assertEqual(platform_counters()['total_donors_count'], 0)
+
+        Organisation.objects.create(name='Second Org')
+        self.assertEqual(platform_counters()['total_organisations_count'], 2)
+
+    def test_unrelated_saves_keep_cache(self):
+        platform_counters()
+        self.donor.save(update_fields=['last_login'])
+
+        with self.assertNumQueries(0):
+            platform_counters()
+
+    def test_dashboard_and_summary_share_counters(self):
+        CustomUser.objects.create_superuser(username='admin', password='password123', email='admin@example.com')
+        self.client.login(username='admin', password='password123')
+
+        dashboard = self.client.get(reverse('core_admin:dashboard'))
+        summary = self.client.get(reverse('core_admin:admin_metrics_summary')).json()
+
+        self.assertEqual(dashboard.context['pending_campaigns_count'], 1)
+        self.assertEqual(summary, platform_counters())
+
+
+@override_settings(QUERY_PROFILING=True, QUERY_PROFILING_REPEAT_THRESHOLD=3)
+class QueryProfilingMiddlewareTests(DonationFixturesMixin, TestCase):
+
+    def setUp(self):
+        self.create_fixtures()
+
+    def profile(self, view):
+        middleware = QueryProfilingMiddleware(view)
+        return middleware(RequestFactory().get('/profiled/'))
+
+    def test_headers_report_query_count_and_time(self):
+        def view(request):
+            list(Campaign.objects.all())
+            list(Donation.objects.all())
+            return HttpResponse()
+
+        response = self.profile(view)
+
+        self.assertEqual(response['X-DB-Queries'], '2')
+        self.assertGreaterEqual(float(response['X-DB-Time-ms']), 0)
+
+    def test_repeated_shape_is_logged_with_call_site(self):
+        def view(request):
+            for campaign_id in range(5):
+                Campaign.objects.filter(pk=campaign_id).exists()
+            return HttpResponse()
+
+        with self.assertLogs('django.request', 'WARNING') as logs:
+            response = self.profile(view)
+
+        self.assertEqual(response['X-DB-Queries'], '5')
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('Repeated query (5x)', logs.output[0])
+        self.assertIn('core/tests.py', logs.output[0])
+        self.assertIn('in view', logs.output[0])
+
+    def test_distinct_shapes_are_not_logged(self):
+        def view(request):
+            list(Campaign.objects.all())
+            list(Donation.objects.all())
+            return HttpResponse()
+
+        with self.assertNoLogs('django.request', 'WARNING'):
+            self.profile(view)
+
+    @override_settings(QUERY_PROFILING=False)
+    def test_disabled_by_default(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            QueryProfilingMiddleware(lambda request: HttpResponse())
+
+    def test_normalize_sql_collapses_literals_and_in_lists(self):
+        self.assertEqual(
+            normalize_sql("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x' LIMIT 21"),
+            normalize_sql("SELECT * FROM t WHERE id IN (%s) AND name = 'y' LIMIT 5"),
+        )
+
+
+class SeedScaleCommandTests(TestCase):
+
+    def seed(self, prefix, seed=7):
+        call_command(
+            'seed_scale', organisations=3, campaigns=12, donors=20, donations=500, tags=4,
+            seed=seed, prefix=prefix, stdout=StringIO(),
+        )
+        return Donation.objects.filter(reference_number__startswith=f'{prefix}-{seed}-')
+
+    def test_generates_consistent_data(self):
+        donations = self.seed('test')
+
+        self.assertEqual(donations.count(), 500)
+        self.assertEqual(Organisation.objects.count(), 3)
+        self.assertEqual(CustomUser.objects.filter(role='donor').count(), 20)
+        # Counters match the rows, as if the donation signals had run
+        out = StringIO()
+        call_command('sync_campaign_counters', '--check', stdout=out)
+        self.assertIn('consistent', out.getvalue())
+        for donation in donations.select_related('campaign')[:50]:
+            self.assertGreaterEqual(donation.created_at, donation.campaign.created_at)
+
+    def test_same_seed_gives_same_donations(self):
+        first = list(self.seed('one').order_by('pk').values_list('amount', 'campaign__slug'))
+        second = list(self.seed('two').order_by('pk').values_list('amount', 'campaign__slug'))
+
+        self.assertEqual([amount for amount, _ in first], [amount for amount, _ in second])
+        self.assertEqual(
+            [slug.split('-campaign-')[1] for _, slug in first],
+            [slug.split('-campaign-')[1] for _, slug in second],
+        )
+
+    def test_secondary_indexes_are_restored(self):
+        with connection.cursor() as cursor:
+            before = connection.introspection.get_constraints(cursor, Donation._meta.db_table)
+        self.seed('test')
+        with connection.cursor() as cursor:
+            after = connection.introspection.get_constraints(cursor, Donation._meta.db_table)
+
+        self.assertEqual(
+            {name: info['columns'] for name, info in before.items() if info['index']},
+            {name: info['columns'] for name, info in after.items() if info['index']},
+        )
+
+    def test_refuses_to_reuse_a_prefix(self):
+        self.seed('test')
+        with self.assertRaises(CommandError):
+            self.seed('test')
+
+
+# The test runner has already set up the test environment
+@mock.patch('core.management.commands.benchmark.teardown_test_environment')
+@mock.patch('core.management.commands.benchmark.setup_test_environment')
+class BenchmarkCommandTests(TestCase):
+
+    def test_reports_each_endpoint_as_json(self, *mocks):
+        out = StringIO()
+        call_command(
+            'benchmark', scales='200', iterations=2, use_current_database=True,
+            endpoints='campaign_list,campaign_detail,export_donations_csv',
+            stdout=out, stderr=StringIO(),
+        )
+        report = json.loads(out.getvalue())
+
+        self.assertEqual(report['meta']['iterations'], 2)
+        scale = report['scales']['200']
+        self.assertEqual(scale['dataset']['donations'], 200)
+        self.assertEqual(set(scale['endpoints']), {'campaign_list', 'campaign_detail', 'export_donations_csv'})
+        for result in scale['endpoints'].values():
+            self.assertEqual(result['status'], 200)
+            self.assertGreater(result['queries'], 0)
+            self.assertGreater(result['bytes'], 0)
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+            self.assertGreater(result['peak_memory_kib'], 0)
+            self.assertEqual(result['session_writes'], 0)
+
+    def test_rejects_unknown_endpoints(self, *mocks):
+        with self.assertRaises(CommandError):
+            call_command('benchmark', endpoints='nope', use_current_database=True)
+
+
+class PathMatcherTests(TestCase):
+
+    def setUp(self):
+        get_path_matcher.cache_clear()
+        self.matcher = get_path_matcher()
+
+    def test_agrees_with_resolve(self):
+        paths = [
+            '/', '/accounts/login/', '/accounts/register/org/', '/accounts/password_reset/',
+            '/accounts/reset/MQ/set-password/', '/accounts/profile/', '/campaigns/',
+            '/__django_admin__/', '/__django_admin__/campaigns/campaign/', '/admin/donors/', '/no/such/page/',
+        ]
+        for path in paths:
+            try:
+                resolved = resolve(path)
+            except Resolver404:
+                exempt = admin = False
+            else:
+                exempt = resolved.view_name in settings.LOGIN_EXEMPT_URL_NAMES
+                admin = resolved.namespace == 'admin'
+            with self.subTest(path=path):
+                self.assertEqual(self.matcher.is_exempt(path), exempt or path.startswith('/__django_admin__/'))
+                self.assertEqual(self.matcher.is_admin(path), admin)
+
+    def test_static_and_unmatched_paths_skip_resolve(self):
+        with mock.patch('core.paths.resolve') as resolve_mock:
+            self.assertTrue(self.matcher.is_exempt('/accounts/login/'))
+            self.assertFalse(self.matcher.is_exempt('/campaigns/42/'))
+            self.assertFalse(self.matcher.is_admin('/wp-login.php'))
+        resolve_mock.assert_not_called()
+
+    def test_results_are_memoized(self):
+        with mock.patch('core.paths.resolve', wraps=resolve) as resolve_mock:
+            for _ in range(3):
+                self.assertTrue(self.matcher.is_exempt('/accounts/reset/MQ/set-password/'))
+        self.assertEqual(resolve_mock.call_count, 1)
+
+    @override_settings(PATH_MATCHER_CACHE_SIZE=2)
+    def test_memo_is_bounded(self):
+        matcher = get_path_matcher()
+        for n in range(10):
+            matcher.is_admin(f'/__django_admin__/page-{n}/')
+        self.assertEqual(matcher.match.cache_info().currsize, 2)
+
+    def test_anonymous_requests_follow_exemptions(self):
+        self.assertEqual(self.client.get(reverse('accounts:login')).status_code, 200)
+        self.assertRedirects(
+            self.client.get(reverse('campaigns:list')), reverse('home'), fetch_redirect_response=False,
+        )
+
+
+class AdminIPAllowlistTests(TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_matches_addresses_and_ranges(self):
+        allowlist = IPAllowlist(['10.0.0.0/8', ' 192.168.1.7 ', '', '10.2.0.0/16', '2001:db8::/32', '172.16.0.1/12'])
+
+        for address in ['10.255.0.1', '192.168.1.7', '2001:db8::1', '::ffff:10.1.2.3', '172.31.255.255']:
+            self.assertIn(address, allowlist)
+        for address in ['11.0.0.0', '192.168.1.8', '2001:db9::', 'not-an-ip', '', '9.255.255.255']:
+            self.assertNotIn(address, allowlist)
+
+    def test_rejects_invalid_entries(self):
+        with self.assertRaises(ImproperlyConfigured):
+            IPAllowlist(['10.0.0.0/33'])
+
+    def test_client_ip_counts_trusted_proxies_from_the_right(self):
+        request = self.factory.get('/', REMOTE_ADDR='10.0.0.2', HTTP_X_FORWARDED_FOR='6.6.6.6, 203.0.113.9, 10.0.0.1')
+
+        self.assertEqual(client_ip(request), '10.0.0.2')
+        self.assertEqual(client_ip(request, trusted_proxies=2), '203.0.113.9')
+        # A request that skipped the proxies cannot vouch for its header
+        self.assertEqual(client_ip(request, trusted_proxies=5), '10.0.0.2')
+
+    def get(self, path, **extra):
+        middleware = AdminIPRestrictionMiddleware(lambda request: HttpResponse('ok'))
+        return middleware(self.factory.get(path, **extra))
+
+    @override_settings(ADMIN_IP_ALLOWLIST=['203.0.113.0/24'], ADMIN_TRUSTED_PROXY_COUNT=1)
+    def test_restricts_admin_paths_only(self):
+        admin_path = '/__django_admin__/'
+        self.assertEqual(
+            self.get(admin_path, REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='203.0.113.40').status_code, 200,
+        )
+        with self.assertRaises(PermissionDenied):
+            self.get(admin_path, REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='203.0.113.40, 198.51.100.1')
+        self.assertEqual(self.get('/campaigns/', REMOTE_ADDR='198.51.100.1').status_code, 200)
+
+    @override_settings(ADMIN_IP_ALLOWLIST=[''])
+    def test_unused_without_allowlist(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            AdminIPRestrictionMiddleware(lambda request: HttpResponse('ok'))
+
+
+class ImageUploadValidationTests(TestCase):
+
+    def upload(self, size=(100, 100), image_format='PNG', padding=0):
+        buffer = BytesIO()
+        Image.new('RGB', size).save(buffer, format=image_format)
+        return SimpleUploadedFile(f'logo.{image_format.lower()}', buffer.getvalue() + b'\0' * padding)
+
+    def validate(self, upload, field='logo'):
+        model_field = Organisation._meta.get_field(field)
+        model_field.run_validators(model_field.formfield().clean(upload))
+
+    def test_one_header_parse_per_upload(self):
+        with mock.patch('PIL.Image.open', wraps=Image.open) as image_open:
+            self.validate(self.upload())
+        self.assertEqual(image_open.call_count, 1)
+
+    def test_oversize_rejected_before_pillow_opens_it(self):
+        with mock.patch('PIL.Image.open', wraps=Image.open) as image_open:
+            with self.assertRaises(ValidationError) as raised:
+                self.validate(self.upload(padding=3 * 1024 * 1024))
+        image_open.assert_not_called()
+        self.assertEqual(raised.exception.code, 'file_too_large')
+
+    def test_reports_format_and_dimension_errors_together(self):
+        validator = ImageUploadValidator(1, 300, 50, ['JPEG'])
+        with self.assertRaises(ValidationError) as raised:
+            validator(self.upload(size=(400, 100)))
+
+        self.assertEqual(
+            [error.code for error in raised.exception.error_list],
+            ['invalid_image_format', 'invalid_image_dimensions'],
+        )
+
+    def test_unreadable_file_reported_once(self):
+        with self.assertRaises(ValidationError) as raised:
+            ImageUploadValidator(1, 300, 300)(SimpleUploadedFile('logo.png', b'not an image'))
+        self.assertEqual(len(raised.exception.error_list), 1)
+
+    def test_inspection_is_cached_per_file(self):
+        upload = self.upload(size=(120, 80))
+        with mock.patch('PIL.Image.open', wraps=Image.open) as image_open:
+            self.assertEqual(inspect_image(upload), ImageInfo('PNG', 120, 80))
+            self.assertEqual(inspect_image(upload), ImageInfo('PNG', 120, 80))
+        self.assertEqual(image_open.call_count, 1)
+
+
+class ImageVariantTests(DonationFixturesMixin, TestCase):
+
+    def setUp(self):
+        self.create_fixtures()
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root, IMAGE_VARIANT_BACKEND='worker', IMAGE_VARIANT_PROCESSES=0,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def upload_cover(self, size=(1000, 500)):
+        buffer = BytesIO()
+        Image.new('RGB', size, 'blue').save(buffer, format='JPEG')
+        self.campaign.cover_image = SimpleUploadedFile('cover.jpg', buffer.getvalue())
+        self.campaign.save()
+        return self.campaign.cover_image.name
+
+    def render(self, prefetched=None):
+        template = Template("{% load image_tags %}{% responsive_image image 'card' prefetched=prefetched alt='Cover' %}")
+        return template.render(Context({'image': self.campaign.cover_image, 'prefetched': prefetched}))
+
+    def test_upload_queues_and_worker_renders_variants(self):
+        source = self.upload_cover()
+        self.assertEqual(ImageVariantSet.objects.get().status, ImageVariantSet.STATUS_PENDING)
+        # Pages use the original until the variants exist
+        self.assertIn(f'src="{self.campaign.cover_image.url}"', self.render())
+
+        call_command('process_image_variants', '--once', stdout=StringIO())
+
+        variant_set = ImageVariantSet.objects.get()
+        self.assertEqual(variant_set.status, ImageVariantSet.STATUS_COMPLETE)
+        root = os.path.splitext(source)[0]
+        names = {variant['name'] for variant in variant_set.variants}
+        self.assertEqual(names, {
+            f'{root}.{variant_set.content_hash[:16]}.{variant}.{extension}'
+            for variant in ('thumbnail', 'card', 'hero') for extension in ('webp', 'jpg')
+        })
+        for name in names:
+            self.assertTrue(os.path.exists(os.path.join(self.media_root, name)))
+
+        html = self.render()
+        self.assertIn('<source type="image/webp" srcset="', html)
+        self.assertIn('.card.webp 480w', html)
+        self.assertIn('.hero.jpg 1000w', html)
+        self.assertIn('.card.jpg" srcset=', html)
+
+    def test_prefetch_fills_the_cache_in_one_query(self):
+        source = self.upload_cover()
+        process_pending()
+        cache.clear()
+
+        with self.assertNumQueries(1):
+            prefetch_variants([source, 'campaign_covers/never-uploaded.jpg'])
+        with self.assertNumQueries(0):
+            self.assertEqual(len(variants_for(source)), 6)
+            self.assertEqual(variants_for('campaign_covers/never-uploaded.jpg'), [])
+
+    def test_prefetched_variants_are_passed_to_the_tag(self):
+        source = self.upload_cover()
+        process_pending()
+        prefetched = prefetch_variants([source])
+
+        with mock.patch('core.templatetags.image_tags.variants_for') as lookup:
+            html = self.render(prefetched)
+        lookup.assert_not_called()
+        self.assertIn('.card.webp 480w', html)
+
+    def test_new_upload_reusing_a_deleted_name_is_rendered_again(self):
+        source = self.upload_cover()
+        process_pending()
+        old_hash = ImageVariantSet.objects.get().content_hash
+        self.assertIn('<picture>', self.render())
+        os.remove(os.path.join(self.media_root, source))
+
+        self.assertEqual(self.upload_cover(size=(800, 800)), source)
+
+        self.assertEqual(ImageVariantSet.objects.get().status, ImageVariantSet.STATUS_PENDING)
+        self.assertIn(f'src="{self.campaign.cover_image.url}"', self.render())
+        process_pending()
+        self.assertNotEqual(ImageVariantSet.objects.get().content_hash, old_hash)
+
+    def test_ordinary_saves_do_not_queue(self):
+        self.upload_cover()
+        self.campaign.title = 'Renamed'
+        self.campaign.save()
+        self.assertEqual(ImageVariantSet.objects.count(), 1)
+
+    def test_variants_are_never_upscaled(self):
+        buffer = BytesIO()
+        Image.new('RGBA', (300, 100)).save(buffer, format='PNG')
+
+        rendered = render_variants(buffer.getvalue())
+        self.assertEqual(
+            [(variant, image_format, width, height) for variant, image_format, _, width, height, _ in rendered],
+            [('thumbnail', 'WEBP', 160, 53), ('thumbnail', 'JPEG', 160, 53), ('card', 'WEBP', 300, 100),
+             ('card', 'JPEG', 300, 100)],
+        )
+
+    @override_settings(IMAGE_VARIANT_PROCESSES=1)
+    def test_renders_on_process_pool(self):
+        self.upload_cover(size=(200, 200))
+
+        self.assertEqual(process_pending(), 1)
+        self.assertEqual(ImageVariantSet.objects.get().status, ImageVariantSet.STATUS_COMPLETE)
+
+    def test_missing_source_fails_and_can_be_requeued(self):
+        source = self.upload_cover()
+        os.remove(os.path.join(self.media_root, source))
+
+        with self.assertLogs('core.image_variants', 'ERROR'):
+            self.assertEqual(process_pending(), 0)
+        self.assertEqual(ImageVariantSet.objects.get().status, ImageVariantSet.STATUS_FAILED)
+        queue_variants(source)
+        self.assertEqual(ImageVariantSet.objects.get().status, ImageVariantSet.STATUS_PENDING)
@@ -1,3 +1,5 @@
+from typing import NamedTuple
+
 from django.core.exceptions import ValidationError
 from django.core.validators import BaseValidator
 from django.utils.translation import gettext_lazy as _
@@ -5,6 +7,55 @@ from django.utils.deconstruct import deconstructible
 from PIL import Image
 import os
 
+
+class ImageInfo(NamedTuple):
+    """What the image validators need from an upload's header."""
+    format: str = None
+    width: int = None
+    height: int = None
+    error: str = None  # None when the header parsed
+
+
+def inspect_image(file):
+    """
+    Parse an image file's header once and cache the result on the file.
+
+    Image.open() only reads the header; pixel data is never decoded. If a
+    forms.ImageField has already opened the upload (it leaves the Pillow
+    image on the file as `image`), that is reused instead of parsing again.
+    The cache is keyed on the file's name and size, so a FieldFile that is
+    pointed at another file is inspected afresh.
+    """
+    key = (getattr(file, 'name', None), getattr(file, 'size', None))
+    cached = getattr(file, '_image_info', None)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    image = getattr(file, 'image', None) or getattr(getattr(file, 'file', None), 'image', None)
+    if image is not None:
+        info = ImageInfo(image.format, *image.size)
+    else:
+        try:
+            file.seek(0)
+            with Image.open(file) as image:
+                info = ImageInfo(image.format, *image.size)
+        except Image.DecompressionBombError as e:
+            info = ImageInfo(error=str(e))
+        except Exception as e:
+            # If Pillow can't open it, it's probably not a valid image
+            info = ImageInfo(error='invalid' if 'cannot identify image file' in str(e) else str(e))
+        finally:
+            try:
+                file.seek(0)
+            except Exception:
+                pass
+
+    try:
+        file._image_info = (key, info)
+    except AttributeError:
+        pass
+    return info
+
 @deconstructible
 class FileSizeValidator(BaseValidator):
     """
@@ -54,38 +105,26 @@ class ImageDimensionsValidator:
     def __call__(self, file):
         if not file:
             return
-            
-        try:
-            # Reset file pointer
-            file.seek(0)
-            img = Image.open(file)
-            width, height = img.size
-            
-            if width > self.max_width:
-                raise ValidationError(
-                    self.message_width,
-                    code=self.code,
-                    params={'max_width': self.max_width, 'width': width}
-                )
-                
-            if height > self.max_height:
-                raise ValidationError(
-                    self.message_height,
-                    code=self.code,
-                    params={'max_height': self.max_height, 'height': height}
-                )
-                
-            # Reset file pointer again for other validators
-            file.seek(0)
-        except ValidationError:
-            # Re-raise validation errors
-            raise
-        except Exception as e:
-            # If Pillow can't open it, it's probably not a valid image
-            if "cannot identify image file" in str(e):
-                raise ValidationError(self.message_invalid, code=self.code)
-            else:
-                raise ValidationError(f'Error validating image: {e}', code=self.code)
+        
+        info = inspect_image(file)
+        if info.error == 'invalid':
+            raise ValidationError(self.message_invalid, code=self.code)
+        if info.error:
+            raise ValidationError(f'Error validating image: {info.error}', code=self.code)
+        
+        if info.width > self.max_width:
+            raise ValidationError(
+                self.message_width,
+                code=self.code,
+                params={'max_width': self.max_width, 'width': info.width}
+            )
+        
+        if info.height > self.max_height:
+            raise ValidationError(
+                self.message_height,
+                code=self.code,
+                params={'max_height': self.max_height, 'height': info.height}
+            )
     
     def __eq__(self, other):
         return (
@@ -112,35 +151,83 @@ class ImageFormatValidator:
     def __call__(self, file):
         if not file:
             return
-            
-        try:
-            # Reset file pointer
-            file.seek(0)
-            img = Image.open(file)
-            if img.format not in self.allowed_formats:
-                raise ValidationError(
-                    self.message,
-                    code=self.code,
-                    params={
-                        'allowed_formats': ', '.join(self.allowed_formats),
-                        'format': img.format or 'unknown'
-                    }
-                )
-                
-            # Reset file pointer again for other validators
-            file.seek(0)
-        except ValidationError:
-            # Re-raise validation errors
-            raise
-        except Exception as e:
-            # If Pillow can't open it, it's probably not a valid image
-            if "cannot identify image file" in str(e):
-                raise ValidationError(self.message_invalid, code=self.code)
-            else:
-                raise ValidationError(f'Error validating image format: {e}', code=self.code)
+        
+        info = inspect_image(file)
+        if info.error == 'invalid':
+            raise ValidationError(self.message_invalid, code=self.code)
+        if info.error:
+            raise ValidationError(f'Error validating image format: {info.error}', code=self.code)
+        
+        if info.format not in self.allowed_formats:
+            raise ValidationError(
+                self.message,
+                code=self.code,
+                params={
+                    'allowed_formats': ', '.join(self.allowed_formats),
+                    'format': info.format or 'unknown'
+                }
+            )
     
     def __eq__(self, other):
         return (
             isinstance(other, self.__class__) and
             self.allowed_formats == other.allowed_formats
         )
+
+
+@deconstructible
+class ImageUploadValidator:
+    """
+    Validates an image upload's size, format and dimensions in one pass.
+    
+    The size is checked first, from the upload's byte count, so an
+    oversize file is rejected without Pillow reading it. Otherwise the
+    header is parsed once (see inspect_image) and every format and
+    dimension problem is reported together, with the same messages and
+    codes as the individual validators.
+    """
+    
+    def __init__(self, max_size_mb, max_width, max_height, allowed_formats=None):
+        self.max_size_mb = max_size_mb
+        self.max_width = max_width
+        self.max_height = max_height
+        self.allowed_formats = allowed_formats or ['JPEG', 'PNG']
+        self.size_validator = FileSizeValidator(max_size_mb)
+        self.dimensions_validator = ImageDimensionsValidator(max_width, max_height)
+        self.format_validator = ImageFormatValidator(self.allowed_formats)
+    
+    @property
+    def max_size_bytes(self):
+        return self.size_validator._limit_bytes
+    
+    def check_size(self, file):
+        """Reject the file if it is over the size limit; reads nothing."""
+        self.size_validator(file)
+    
+    def __call__(self, file):
+        if not file:
+            return
+        
+        self.check_size(file)
+        
+        if inspect_image(file).error:
+            # An unreadable file is reported once, not once per check
+            self.format_validator(file)
+        
+        errors = []
+        for validator in (self.format_validator, self.dimensions_validator):
+            try:
+                validator(file)
+            except ValidationError as e:
+                errors.extend(e.error_list)
+        if errors:
+            raise ValidationError(errors)
+    
+    def __eq__(self, other):
+        return (
+            isinstance(other, self.__class__) and
+            self.max_size_mb == other.max_size_mb and
+            self.max_width == other.max_width and
+            self.max_height == other.max_height and
+            self.allowed_formats == other.allowed_formats
+        )
@@ -34,6 +34,7 @@ INSTALLED_APPS = [
     'organizations.apps.OrganizationsConfig',
     'donations.apps.DonationsConfig',
     'tags.apps.TagsConfig',
+    'search.apps.SearchConfig',
     # Third-party apps
     'django.contrib.humanize',
     'rest_framework',
@@ -41,6 +42,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryProfilingMiddleware',  # Inactive unless QUERY_PROFILING is set
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,6 +56,26 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'crowdfund.urls'
 
+# URL names and path prefixes anonymous users may reach (see accounts.middleware)
+LOGIN_EXEMPT_URL_NAMES = [
+    'home',
+    'accounts:login',
+    'accounts:logout',
+    'password_reset',
+    'password_reset_done',
+    'password_reset_confirm',
+    'password_reset_complete',
+    'accounts:register_donor',
+    'accounts:register_org',
+]
+LOGIN_EXEMPT_PATH_PREFIXES = [
+    '/__django_admin__/',
+]
+PATH_MATCHER_CACHE_SIZE = 4096  # distinct paths whose classification is memoized (see core.paths)
+
+# Signed cookie holding the server start time (see accounts.middleware.ServerRestartMiddleware)
+RESTART_EPOCH_COOKIE_NAME = 'server_epoch'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -131,5 +153,42 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Background donation exports (see donations.export_jobs)
+# 'worker' leaves queued jobs for `manage.py process_donation_exports`;
+# 'thread' runs them in a small in-process thread pool instead
+DONATION_EXPORT_BACKEND = 'worker'
+DONATION_EXPORT_TTL = 60 * 60 * 24  # seconds a finished export stays downloadable
+DONATION_EXPORT_STALE_AFTER = 60 * 60  # seconds before a running job is presumed dead
+
+# Host id (0-1023) embedded in donation reference numbers, unique per host or
+# container; each process adds a slot it claims with flock in
+# DONATION_REFERENCE_SLOT_DIR (see donations.references). None derives one
+# from the host name, which DONATION_REFERENCE_REQUIRE_HOST_ID turns into an error
+DONATION_REFERENCE_HOST_ID = os.environ.get('DONATION_REFERENCE_HOST_ID')
+DONATION_REFERENCE_REQUIRE_HOST_ID = False
+DONATION_REFERENCE_SLOT_DIR = os.environ.get('DONATION_REFERENCE_SLOT_DIR')  # None: a temp directory
+
+# Seconds a donation POST's Idempotency-Key and stored response are kept
+# (see donations.idempotency); `manage.py expire_idempotency_keys` deletes them
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+
+# Counter shards per campaign for donation totals (see campaigns.counters);
+# 0 updates the campaign row directly. With shards, run
+# `manage.py fold_campaign_counters` to fold them back periodically
+CAMPAIGN_COUNTER_SHARDS = 0
+CAMPAIGN_COUNTER_CACHE_TTL = 5  # seconds live (row + shard) totals are cached
+
+# Responsive image variants (see core.image_variants): 'worker' leaves them
+# for `manage.py process_image_variants`; 'thread' renders them in-process
+IMAGE_VARIANT_BACKEND = 'worker'
+IMAGE_VARIANT_PROCESSES = 2  # process pool size for resizing; 0 renders in the calling thread
+
+# Per-request query counts, DB time and N+1 warnings (see core.middleware)
+QUERY_PROFILING = False
+QUERY_PROFILING_REPEAT_THRESHOLD = 10  # repeats of one SQL shape before warning
+
+# Seconds the admin dashboard's platform counters are cached (see core.counters)
+PLATFORM_COUNTERS_TTL = 30
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -22,6 +22,13 @@ DATABASES = {
     }
 }
 
+# Run background exports in-process so no worker is needed locally
+DONATION_EXPORT_BACKEND = 'thread'
+IMAGE_VARIANT_BACKEND = 'thread'
+
+# Report query counts and N+1 patterns on every response
+QUERY_PROFILING = True
+
 # Email settings for development (prints emails to console)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
@@ -29,6 +29,10 @@ DATABASES = {
     }
 }
 
+# Donation references must not fall back to a host id derived from the host
+# name, which can collide between hosts (see donations.references)
+DONATION_REFERENCE_REQUIRE_HOST_ID = True
+
 # Static files config
 # Static files should be served by Nginx or similar in production
 STATIC_ROOT = os.environ.get('STATIC_ROOT', os.path.join(BASE_DIR, 'staticfiles'))
@@ -141,6 +141,12 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20,
 }
 
+# --- Write Contention ---
+
+# Counter shards per campaign, so donations to a viral campaign do not
+# queue on its row lock (see campaigns.counters); needs fold_campaign_counters
+CAMPAIGN_COUNTER_SHARDS = int(os.environ.get('CAMPAIGN_COUNTER_SHARDS', '0'))
+
 # --- Admin Optimizations ---
 
 # Limit admin site functionality for production
@@ -148,8 +154,10 @@ ADMIN_SITE_HEADER = "CrowdFund Administration"
 ADMIN_SITE_TITLE = "CrowdFund Admin Portal"
 ADMIN_INDEX_TITLE = "Site Administration"
 
-# Restrict admin access by IP if needed
+# Restrict admin access by IP if needed: comma-separated addresses and CIDR ranges
 ADMIN_IP_ALLOWLIST = os.environ.get('ADMIN_IP_ALLOWLIST', '').split(',')
+# Reverse proxies in front of the app that append to X-Forwarded-For
+ADMIN_TRUSTED_PROXY_COUNT = int(os.environ.get('ADMIN_TRUSTED_PROXY_COUNT', '0'))
 
 if ADMIN_IP_ALLOWLIST and ADMIN_IP_ALLOWLIST[0]:
     # Add middleware to restrict admin access by IP
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Donation
+from .models import Donation, DonationExport
+
+# Fields the campaign funding counters are derived from
+COUNTED_FIELDS = ('amount', 'campaign', 'donor')
 
 
 @admin.register(Donation)
@@ -18,11 +21,30 @@ class DonationAdmin(admin.ModelAdmin):
         ('Relationships', {
             'fields': ('campaign', 'donor')
         }),
+        ('Attribution', {
+            'fields': ('source', 'referrer')
+        }),
         ('Metadata', {
             'fields': ('created_at',)
         }),
     )
     
+    def get_readonly_fields(self, request, obj=None):
+        # Donations are immutable once made (see Donation); editing these
+        # would leave the campaign funding counters wrong
+        if obj is not None:
+            return self.readonly_fields + COUNTED_FIELDS
+        return self.readonly_fields
+    
     def get_queryset(self, request):
         # Optimize query with select_related to avoid N+1 queries
         return super().get_queryset(request).select_related('campaign', 'donor')
+
+
+@admin.register(DonationExport)
+class DonationExportAdmin(admin.ModelAdmin):
+    """Admin interface for background donation exports"""
+    list_display = ('pk', 'organisation', 'status', 'compress', 'rows_written', 'total_rows', 'created_at', 'expires_at')
+    list_filter = ('status', 'compress')
+    readonly_fields = ('created_at', 'started_at', 'finished_at', 'rows_written', 'total_rows')
+    raw_id_fields = ('organisation', 'requested_by')
@@ -5,3 +5,8 @@ class DonationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'donations'
     verbose_name = 'Donation Management'
+
+    def ready(self):
+        # Register signal handlers that maintain campaign funding counters
+        from . import signals  # noqa: F401
+        from . import checks  # noqa: F401
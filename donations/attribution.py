@@ -0,0 +1,44 @@
+"""
+Donation attribution.
+
+Records where a donor came from: an explicit source tag (?utm_source= or
+?source= on the donation form URL) and the external page that referred
+them. The referrer is remembered in the session when the donation form is
+shown, because by the time the form is posted the browser's Referer header
+points at our own form.
+"""
+from urllib.parse import urlsplit
+
+SESSION_KEY = 'donation_referrer'
+SOURCE_PARAMS = ('utm_source', 'source')
+
+SOURCE_MAX_LENGTH = 50
+REFERRER_MAX_LENGTH = 500
+
+
+def external_referrer(request):
+    """Return the Referer header, or '' if it is missing or points at this site."""
+    referrer = request.META.get('HTTP_REFERER', '')
+    if not referrer:
+        return ''
+    if urlsplit(referrer).netloc.lower() == request.get_host().lower():
+        return ''
+    return referrer[:REFERRER_MAX_LENGTH]
+
+
+def remember_referrer(request):
+    """Keep an external referrer in the session until the donation is posted."""
+    referrer = external_referrer(request)
+    if referrer:
+        request.session[SESSION_KEY] = referrer
+
+
+def apply_attribution(request, donation):
+    """Fill `donation.source` and `donation.referrer` from the request."""
+    for param in SOURCE_PARAMS:
+        value = request.GET.get(param) or request.POST.get(param)
+        if value:
+            donation.source = value.strip()[:SOURCE_MAX_LENGTH]
+            break
+
+    donation.referrer = external_referrer(request) or request.session.pop(SESSION_KEY, '')
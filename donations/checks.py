@@ -0,0 +1,21 @@
+"""
+System checks for the donations app.
+"""
+from django.core import checks
+from django.core.exceptions import ImproperlyConfigured
+
+from .references import host_id
+
+
+@checks.register()
+def check_reference_host_id(app_configs, **kwargs):
+    """Donation references need a valid per-host id where one is required."""
+    try:
+        host_id()
+    except (ImproperlyConfigured, ValueError) as exc:
+        return [checks.Error(
+            str(exc),
+            hint='Give every host or container that creates donations its own DONATION_REFERENCE_HOST_ID.',
+            id='donations.E001',
+        )]
+    return []
@@ -0,0 +1,187 @@
+"""
+Background donation export jobs.
+
+Org owners queue a DonationExport with `request_export`. The job is then
+produced off the request path, either by the `process_donation_exports`
+management command (DONATION_EXPORT_BACKEND = 'worker') or by a small
+in-process thread pool ('thread'), and written to MEDIA_ROOT/exports in
+chunks. Finished files stay downloadable for DONATION_EXPORT_TTL seconds
+before `expire_exports` removes them.
+"""
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from .exports import ORGANISATION_EXPORT_HEADER, QUERYSET_CHUNK_SIZE, iter_csv, iter_gzip, organisation_export_rows
+from .models import Donation, DonationExport
+
+logger = logging.getLogger(__name__)
+
+EXPORT_DIRECTORY = 'exports'
+
+_executor = None
+
+
+def request_export(organisation, user, compress=False):
+    """
+    Queue an export of `organisation`'s donations, or join an identical one.
+
+    Returns `(job, created)`. If a matching export is already pending or
+    running that job is returned instead of queueing a duplicate; the
+    partial unique constraint on DonationExport makes this safe under
+    concurrent requests.
+    """
+    for _ in range(3):
+        try:
+            with transaction.atomic():
+                job = DonationExport.objects.create(organisation=organisation, requested_by=user, compress=compress)
+        except IntegrityError:
+            job = DonationExport.objects.filter(
+                organisation=organisation,
+                compress=compress,
+                status__in=DonationExport.IN_FLIGHT_STATUSES,
+            ).first()
+            if job is not None:
+                return job, False
+            # The in-flight job finished between our insert and lookup; retry
+            continue
+
+        transaction.on_commit(lambda: dispatch(job.pk))
+        return job, True
+
+    raise RuntimeError('Could not queue donation export')
+
+
+def dispatch(job_id):
+    """Hand a freshly queued job to the configured backend."""
+    if getattr(settings, 'DONATION_EXPORT_BACKEND', 'worker') != 'thread':
+        # Picked up by `manage.py process_donation_exports`
+        return
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='donation-export')
+    _executor.submit(_run_in_thread, job_id)
+
+
+def _run_in_thread(job_id):
+    close_old_connections()
+    try:
+        run_export(job_id)
+    finally:
+        close_old_connections()
+
+
+def claim(job_id):
+    """Atomically move a pending job to running; False if someone else won."""
+    return bool(DonationExport.objects.filter(
+        pk=job_id, status=DonationExport.STATUS_PENDING
+    ).update(status=DonationExport.STATUS_RUNNING, started_at=timezone.now()))
+
+
+def run_export(job_id):
+    """
+    Claim and produce a pending export. Returns the job, or None if it was
+    not pending (already claimed by another worker, or cancelled).
+    """
+    if not claim(job_id):
+        return None
+
+    job = DonationExport.objects.select_related('organisation').get(pk=job_id)
+    extension = 'csv.gz' if job.compress else 'csv'
+    name = f'{EXPORT_DIRECTORY}/{uuid.uuid4().hex}.{extension}'
+    path = os.path.join(settings.MEDIA_ROOT, name)
+    partial_path = f'{path}.part'
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        total_rows = Donation.objects.filter(campaign__organisation=job.organisation).count()
+        DonationExport.objects.filter(pk=job.pk).update(total_rows=total_rows)
+
+        rows = _track_progress(job.pk, organisation_export_rows(job.organisation))
+        chunks = iter_csv(ORGANISATION_EXPORT_HEADER, rows)
+        chunks = iter_gzip(chunks) if job.compress else (chunk.encode('utf-8') for chunk in chunks)
+
+        with open(partial_path, 'wb') as output:
+            for chunk in chunks:
+                output.write(chunk)
+        # Only expose the file under its final name once it is complete
+        os.replace(partial_path, path)
+    except Exception as exc:
+        logger.exception('Donation export %s failed', job.pk)
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        DonationExport.objects.filter(pk=job.pk).update(
+            status=DonationExport.STATUS_FAILED, error=str(exc), finished_at=timezone.now()
+        )
+    else:
+        finished_at = timezone.now()
+        DonationExport.objects.filter(pk=job.pk).update(
+            status=DonationExport.STATUS_COMPLETE,
+            file=name,
+            finished_at=finished_at,
+            expires_at=finished_at + timedelta(seconds=settings.DONATION_EXPORT_TTL),
+        )
+
+    job.refresh_from_db()
+    return job
+
+
+def _track_progress(job_id, rows):
+    """Pass rows through, recording rows_written once per database chunk."""
+    written = 0
+    for row in rows:
+        yield row
+        written += 1
+        if written % QUERYSET_CHUNK_SIZE == 0:
+            DonationExport.objects.filter(pk=job_id).update(rows_written=written)
+    DonationExport.objects.filter(pk=job_id).update(rows_written=written)
+
+
+def process_pending(limit=None):
+    """Run queued exports oldest first; returns the number produced."""
+    pending = DonationExport.objects.filter(
+        status=DonationExport.STATUS_PENDING
+    ).order_by('created_at').values_list('pk', flat=True)
+    if limit:
+        pending = pending[:limit]
+
+    processed = 0
+    for job_id in list(pending):
+        if run_export(job_id) is not None:
+            processed += 1
+    return processed
+
+
+def fail_stale_exports(now=None):
+    """
+    Mark jobs that have been running longer than DONATION_EXPORT_STALE_AFTER
+    as failed, so a crashed worker does not block new identical requests.
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=settings.DONATION_EXPORT_STALE_AFTER)
+    return DonationExport.objects.filter(
+        status=DonationExport.STATUS_RUNNING, started_at__lt=cutoff
+    ).update(status=DonationExport.STATUS_FAILED, error='Export worker stopped responding', finished_at=now)
+
+
+def expire_exports(now=None):
+    """Delete files of finished exports past their expiry; returns the count."""
+    now = now or timezone.now()
+    expired = DonationExport.objects.filter(
+        status=DonationExport.STATUS_COMPLETE, expires_at__lte=now
+    )
+
+    count = 0
+    for job in expired:
+        if job.file:
+            job.file.delete(save=False)
+        job.status = DonationExport.STATUS_EXPIRED
+        job.save(update_fields=['status', 'file'])
+        count += 1
+    return count
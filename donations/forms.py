@@ -2,6 +2,9 @@ from django import forms
 from django.core.exceptions import ValidationError
 from .models import Donation
 
+MIN_DONATION_AMOUNT = 5
+MAX_DONATION_AMOUNT = 1000000
+
 
 class DonationForm(forms.ModelForm):
     """
@@ -16,7 +19,7 @@ class DonationForm(forms.ModelForm):
         fields = ['amount', 'comment']
         widgets = {
             'amount': forms.NumberInput(attrs={
-                'min': 5,  # Minimum donation amount
+                'min': MIN_DONATION_AMOUNT,
                 'step': 1,
                 'placeholder': 'Enter donation amount'
             }),
@@ -30,10 +33,32 @@ class DonationForm(forms.ModelForm):
         """Validate donation amount is within acceptable range"""
         amount = self.cleaned_data.get('amount')
         
-        if amount < 5:
-            raise ValidationError("Minimum donation amount is $5.")
+        if amount < MIN_DONATION_AMOUNT:
+            raise ValidationError(f"Minimum donation amount is ${MIN_DONATION_AMOUNT:,}.")
             
-        if amount > 1000000:
-            raise ValidationError("Maximum donation amount is $1,000,000.")
+        if amount > MAX_DONATION_AMOUNT:
+            raise ValidationError(f"Maximum donation amount is ${MAX_DONATION_AMOUNT:,}.")
             
         return amount
+
+
+class DonationImportForm(forms.Form):
+    """
+    Validates one row of a bulk donation import (see donations.ingest)
+
+    Only the shape of the row is checked here; whether the campaign, donor
+    and reference number exist is checked for a whole chunk at once.
+    """
+    campaign = forms.IntegerField(min_value=1)
+    donor = forms.IntegerField(min_value=1, required=False)
+    donor_email = forms.EmailField(required=False)
+    amount = forms.IntegerField(min_value=MIN_DONATION_AMOUNT, max_value=MAX_DONATION_AMOUNT)
+    reference_number = forms.SlugField(max_length=50, required=False)
+    comment = forms.CharField(required=False)
+    source = forms.CharField(max_length=50, required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get('donor') and not cleaned_data.get('donor_email'):
+            raise ValidationError("Either donor or donor_email is required.")
+        return cleaned_data
@@ -0,0 +1,183 @@
+"""
+Idempotency-Key support for donation creation.
+
+Clients that may retry a POST (mobile apps on flaky networks) send an
+Idempotency-Key header. The first request with a key claims it and runs;
+its response is stored against the key and every retry gets that response
+back without reaching the write path again. Keys are per user and per
+endpoint (the scope) and are kept for IDEMPOTENCY_KEY_TTL seconds.
+
+Lookups go to the cache first, so retries of a finished request cost one
+cache round trip; the IdempotencyKey table is the source of truth and its
+unique constraint settles races between concurrent retries. A retry that
+arrives while the first request is still running gets 409 Conflict, and a
+key reused with a different request body gets 422.
+"""
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse, RawPostDataException
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+# Response headers worth replaying
+STORED_HEADERS = ('Content-Type', 'Location')
+
+# Seconds before an unfinished claim is presumed abandoned (the worker
+# died mid-request) and may be taken over by a retry
+STALE_AFTER = 60 * 5
+
+
+def get_ttl():
+    return getattr(settings, 'IDEMPOTENCY_KEY_TTL', 60 * 60 * 24)
+
+
+def cache_key(user_id, scope, key):
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f'idempotency:{scope}:{user_id}:{digest}'
+
+
+def _remember(cached_key, stored, expires_at):
+    """Cache a stored response until its row expires and no longer, so replays end with the key."""
+    timeout = int((expires_at - timezone.now()).total_seconds())
+    if timeout > 0:
+        cache.set(cached_key, stored, timeout)
+
+
+def fingerprint(request):
+    try:
+        body = request.body
+    except RawPostDataException:
+        # Multipart bodies are consumed once parsed; use the parsed form
+        body = request.POST.urlencode().encode()
+    digest = hashlib.sha256()
+    for part in (request.method.encode(), request.get_full_path().encode(), body):
+        digest.update(part)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _error(status, message):
+    return JsonResponse({'detail': message}, status=status)
+
+
+def _in_progress():
+    response = _error(409, f'A request with this {HEADER} is already in progress.')
+    response['Retry-After'] = '1'
+    return response
+
+
+def _replay(status_code, headers, body):
+    response = HttpResponse(bytes(body), status=status_code)
+    for name, value in headers.items():
+        response[name] = value
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def _claim(user, scope, key, request_fingerprint, expires_at):
+    """
+    Claim the key for this request until `expires_at`. Returns (claimed,
+    existing row).
+
+    An expired row, or an unfinished one whose request has stalled, is
+    replaced rather than honoured.
+    """
+    now = timezone.now()
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                IdempotencyKey.objects.create(
+                    user=user,
+                    scope=scope,
+                    key=key,
+                    fingerprint=request_fingerprint,
+                    expires_at=expires_at,
+                )
+            return True, None
+        except IntegrityError:
+            existing = IdempotencyKey.objects.filter(user=user, scope=scope, key=key).first()
+            if existing is None:
+                continue
+            abandoned = not existing.is_complete and existing.created_at < now - timedelta(seconds=STALE_AFTER)
+            if existing.expires_at > now and not abandoned:
+                return False, existing
+            IdempotencyKey.objects.filter(pk=existing.pk).delete()
+    return False, None
+
+
+def idempotent(request, user, scope, handler, prepare=None):
+    """
+    Run `handler()` at most once per Idempotency-Key and return its response.
+
+    Requests without the header, or from anonymous users, just run the
+    handler. `prepare(response)` is called on a fresh response before it is
+    stored, for views whose responses are rendered late (DRF).
+    """
+    key = request.headers.get(HEADER)
+    if key is None or not user.is_authenticated:
+        return handler()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return _error(400, f'{HEADER} must be 1 to {MAX_KEY_LENGTH} characters long.')
+
+    request_fingerprint = fingerprint(request)
+    cached_key = cache_key(user.pk, scope, key)
+    stored = cache.get(cached_key)
+    expires_at = timezone.now() + timedelta(seconds=get_ttl())
+    if stored is None:
+        claimed, existing = _claim(user, scope, key, request_fingerprint, expires_at)
+        if existing is not None:
+            stored = (
+                existing.fingerprint, existing.status_code, existing.response_headers, bytes(existing.response_body)
+            )
+            if existing.is_complete:
+                _remember(cached_key, stored, existing.expires_at)
+        elif not claimed:
+            return _in_progress()
+
+    if stored is not None:
+        stored_fingerprint, status_code, headers, body = stored
+        if status_code is None:
+            return _in_progress()
+        if stored_fingerprint != request_fingerprint:
+            return _error(422, f'This {HEADER} was already used with a different request.')
+        return _replay(status_code, headers, body)
+
+    try:
+        response = handler()
+        if prepare is not None:
+            response = prepare(response)
+        if hasattr(response, 'render') and not response.is_rendered:
+            response.render()
+    except Exception:
+        # Let the client retry with the same key
+        IdempotencyKey.objects.filter(user=user, scope=scope, key=key).delete()
+        raise
+
+    if response.status_code >= 500 or response.streaming:
+        IdempotencyKey.objects.filter(user=user, scope=scope, key=key).delete()
+        return response
+
+    headers = {name: response[name] for name in STORED_HEADERS if response.has_header(name)}
+    IdempotencyKey.objects.filter(user=user, scope=scope, key=key).update(
+        status_code=response.status_code,
+        response_headers=headers,
+        response_body=response.content,
+    )
+    _remember(cached_key, (request_fingerprint, response.status_code, headers, response.content), expires_at)
+    return response
+
+
+def expire_keys(now=None):
+    """Delete keys past their expiry; returns the number deleted."""
+    now = now or timezone.now()
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=now).delete()
+    return deleted
@@ -0,0 +1,213 @@
+"""
+Bulk donation ingestion.
+
+Offline and partner donations arrive as batches of rows (from the API's
+bulk action or `manage.py import_donations`). Rows are processed in
+chunks: each chunk is validated with a handful of queries rather than a
+few per row, inserted with one bulk_create and applied to the campaign
+funding counters with one grouped UPDATE, all in a single transaction.
+
+A row that fails validation is reported with its errors and skipped; the
+rest of the batch carries on. bulk_create sends no post_save signals, so
+the work of donations.signals and campaigns.signals is done here for the
+whole chunk.
+"""
+import csv
+import io
+import json
+from collections import Counter, defaultdict
+from functools import partial
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from campaigns.caching import bump_version
+from campaigns.counters import fold_counter_shards, per_campaign, unfolded
+from campaigns.models import Campaign
+
+from .forms import DonationImportForm
+from .models import Donation
+from .references import next_reference
+
+# Rows validated and inserted per transaction
+CHUNK_SIZE = 500
+
+FORMATS = ('csv', 'ndjson')
+
+
+class IngestResult:
+    """Running totals for one batch: rows seen, donations created and per-row errors."""
+
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        # [{'row': 1-based row number, 'errors': {field: [messages]}}, ...]
+        self.errors = []
+
+    def add_error(self, row, errors):
+        self.errors.append({'row': row, 'errors': errors})
+
+    def as_dict(self):
+        return {'rows': self.rows, 'created': self.created, 'failed': len(self.errors), 'errors': self.errors}
+
+
+def read_rows(file, file_format):
+    """Yield the rows of a CSV (with a header) or NDJSON text stream as dicts."""
+    if file_format == 'csv':
+        yield from csv.DictReader(file)
+    elif file_format == 'ndjson':
+        for line in file:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                row = {'__all__': f'Invalid JSON: {exc}'}
+            yield row if isinstance(row, dict) else {'__all__': 'Each line must be a JSON object.'}
+    else:
+        raise ValueError(f'Unknown format {file_format!r}; expected one of {", ".join(FORMATS)}')
+
+
+def ingest(rows, chunk_size=CHUNK_SIZE):
+    """Validate and insert an iterable of row dicts; returns an IngestResult."""
+    result = IngestResult()
+    seen_references = set()
+    rows = iter(rows)
+    while chunk := list(islice(rows, chunk_size)):
+        _ingest_chunk(chunk, result.rows + 1, result, seen_references)
+        result.rows += len(chunk)
+    return result
+
+
+def ingest_file(file, file_format, chunk_size=CHUNK_SIZE):
+    """ingest() the rows of a binary or text CSV/NDJSON file."""
+    if not isinstance(file, io.TextIOBase):
+        file = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    return ingest(read_rows(file, file_format), chunk_size)
+
+
+def _ingest_chunk(chunk, first_row, result, seen_references):
+    # Shape of each row
+    cleaned = []
+    for number, row in enumerate(chunk, start=first_row):
+        if '__all__' in row:
+            result.add_error(number, {'__all__': [row['__all__']]})
+            continue
+        form = DonationImportForm(row)
+        if form.is_valid():
+            cleaned.append((number, form.cleaned_data))
+        else:
+            result.add_error(number, {
+                field: [error['message'] for error in errors]
+                for field, errors in form.errors.get_json_data().items()
+            })
+
+    # References to other tables, one query each for the whole chunk
+    campaigns = set(Campaign.objects.filter(
+        pk__in={data['campaign'] for _, data in cleaned}
+    ).values_list('pk', flat=True))
+    donors_by_id = set(get_user_model().objects.filter(
+        pk__in={data['donor'] for _, data in cleaned if data['donor']}
+    ).values_list('pk', flat=True))
+    # Emails are not unique; an email shared by several users is ambiguous
+    donors_by_email = defaultdict(list)
+    for email, pk in get_user_model().objects.filter(
+        email__in={data['donor_email'] for _, data in cleaned if data['donor_email'] and not data['donor']}
+    ).values_list('email', 'pk'):
+        donors_by_email[email].append(pk)
+    references = {data['reference_number'] for _, data in cleaned if data['reference_number']}
+    taken = set(Donation.objects.filter(reference_number__in=references).values_list('reference_number', flat=True))
+
+    donations = []
+    for number, data in cleaned:
+        errors = {}
+        if data['campaign'] not in campaigns:
+            errors['campaign'] = ['No campaign with this id.']
+        matches = donors_by_email.get(data['donor_email'], [])
+        donor_id = data['donor'] or (matches[0] if len(matches) == 1 else None)
+        if data['donor'] and data['donor'] not in donors_by_id:
+            errors['donor'] = ['No user with this id.']
+        elif len(matches) > 1 and not data['donor']:
+            errors['donor_email'] = ['Several users have this email address; give the donor id instead.']
+        elif not donor_id:
+            errors['donor_email'] = ['No user with this email address.']
+        reference = data['reference_number']
+        if reference and (reference in taken or reference in seen_references):
+            errors['reference_number'] = ['A donation with this reference number already exists.']
+        if errors:
+            result.add_error(number, errors)
+            continue
+        reference = reference or next_reference()
+        seen_references.add(reference)
+        donations.append((number, Donation(
+            campaign_id=data['campaign'],
+            donor_id=donor_id,
+            amount=data['amount'],
+            reference_number=reference,
+            comment=data['comment'] or None,
+            source=data['source'],
+        )))
+
+    if not donations:
+        return
+    try:
+        with transaction.atomic():
+            Donation.objects.bulk_create([donation for _, donation in donations])
+            _add_to_campaign_totals([donation for _, donation in donations])
+    except IntegrityError:
+        # Something changed since the checks above (a concurrent import took
+        # a reference, or a campaign or donor was deleted): find the rows
+        # at fault one at a time and keep the rest
+        with transaction.atomic():
+            saved = [donation for number, donation in donations if _insert_row(number, donation, result)]
+            if saved:
+                _add_to_campaign_totals(saved)
+        result.created += len(saved)
+        return
+    result.created += len(donations)
+
+
+def _insert_row(number, donation, result):
+    """Insert one donation in a savepoint; reports the row and returns False if it conflicts."""
+    try:
+        with transaction.atomic():
+            Donation.objects.bulk_create([donation])
+    except IntegrityError:
+        if Donation.objects.filter(reference_number=donation.reference_number).exists():
+            errors = {'reference_number': ['A donation with this reference number already exists.']}
+        else:
+            errors = {'__all__': ['The campaign or donor no longer exists.']}
+        result.add_error(number, errors)
+        return False
+    return True
+
+
+def _add_to_campaign_totals(donations):
+    """Apply a chunk of new donations to the campaign counters in one UPDATE."""
+    raised, counts = Counter(), Counter()
+    for donation in donations:
+        raised[donation.campaign_id] += donation.amount
+        counts[donation.campaign_id] += 1
+
+    # Donors are recounted rather than incremented, as several rows in a
+    # chunk may come from one new donor; the recount is absolute, so any
+    # counter shards are folded in first (locking the campaign rows) and
+    # shards added since are left out of it
+    fold_counter_shards(list(raised))
+    donors = Donation.objects.filter(
+        campaign=OuterRef('pk')
+    ).order_by().values('campaign').annotate(
+        donors=Count('donor', distinct=True)
+    ).values('donors')
+
+    Campaign.objects.filter(pk__in=raised).update(
+        total_raised=F('total_raised') + per_campaign(raised),
+        donation_count=F('donation_count') + per_campaign(counts),
+        donor_count=Greatest(Coalesce(Subquery(donors), 0) - unfolded('donor_count'), 0),
+    )
+    for campaign_id in raised:
+        bump_version(campaign_id)
+        transaction.on_commit(partial(bump_version, campaign_id))
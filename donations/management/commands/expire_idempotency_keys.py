@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from donations.idempotency import expire_keys
+
+
+class Command(BaseCommand):
+    help = 'Deletes donation Idempotency-Keys and stored responses past IDEMPOTENCY_KEY_TTL.'
+
+    def handle(self, *args, **options):
+        deleted = expire_keys()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired idempotency key(s).'))
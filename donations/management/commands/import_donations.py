@@ -0,0 +1,69 @@
+import json
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from donations.ingest import CHUNK_SIZE, FORMATS, ingest_file
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports offline or partner donations from a CSV (with a header row) '
+        'or NDJSON file. Invalid rows are reported and skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for standard input.")
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='File format (default: guessed from the extension).',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help=f'Rows validated and inserted per transaction (default: {CHUNK_SIZE}).',
+        )
+        parser.add_argument(
+            '--errors',
+            help='Write the per-row errors to this file as JSON.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+
+        file_format = options['format']
+        if not file_format:
+            extension = os.path.splitext(path)[1].lower().lstrip('.')
+            file_format = {'jsonl': 'ndjson'}.get(extension, extension)
+            if file_format not in FORMATS:
+                raise CommandError('Cannot tell the format from the file name; pass --format.')
+
+        if path == '-':
+            result = ingest_file(sys.stdin, file_format, options['chunk_size'])
+        else:
+            try:
+                with open(path, 'rb') as file:
+                    result = ingest_file(file, file_format, options['chunk_size'])
+            except OSError as exc:
+                raise CommandError(f'Cannot read {path}: {exc}')
+
+        for error in result.errors[:20]:
+            messages = '; '.join(
+                f'{field}: {" ".join(messages)}' for field, messages in error['errors'].items()
+            )
+            self.stdout.write(self.style.WARNING(f'Row {error["row"]}: {messages}'))
+        if len(result.errors) > 20:
+            self.stdout.write(self.style.WARNING(f'... and {len(result.errors) - 20} more.'))
+
+        if options['errors']:
+            with open(options['errors'], 'w') as file:
+                json.dump(result.errors, file, indent=2)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.created} of {result.rows} row(s); {len(result.errors)} failed.'
+        ))
@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from donations.export_jobs import expire_exports, fail_stale_exports, process_pending
+
+
+class Command(BaseCommand):
+    help = (
+        'Produces queued background donation exports, fails exports whose '
+        'worker has died and deletes finished exports past their expiry.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the queue once and exit instead of polling.',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5.0,
+            help='Seconds to wait between polls when the queue is empty (default: 5).',
+        )
+        parser.add_argument(
+            '--expire-only',
+            action='store_true',
+            help='Only expire old exports; do not produce queued ones.',
+        )
+
+    def handle(self, *args, **options):
+        poll_interval = options['poll_interval']
+        if poll_interval <= 0:
+            raise CommandError('--poll-interval must be positive.')
+
+        if options['expire_only']:
+            self._housekeeping()
+            return
+
+        while True:
+            self._housekeeping()
+            processed = process_pending()
+            if processed:
+                self.stdout.write(self.style.SUCCESS(f'Produced {processed} export(s).'))
+            if options['once']:
+                return
+            if not processed:
+                time.sleep(poll_interval)
+
+    def _housekeeping(self):
+        stale = fail_stale_exports()
+        if stale:
+            self.stdout.write(self.style.WARNING(f'Marked {stale} stalled export(s) as failed.'))
+        expired = expire_exports()
+        if expired:
+            self.stdout.write(f'Expired {expired} export(s).')
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 18:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0002_donationexport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='donation',
+            name='referrer',
+            field=models.CharField(blank=True, default='', help_text='External page that referred the donor', max_length=500),
+        ),
+        migrations.AddField(
+            model_name='donation',
+            name='source',
+            field=models.CharField(blank=True, default='', help_text='Explicit source tag, e.g. from ?utm_source=', max_length=50),
+        ),
+    ]
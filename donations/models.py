@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
-from django.utils import timezone
+
+from .references import next_reference
 
 
 class Donation(models.Model):
@@ -10,6 +11,11 @@ class Donation(models.Model):
     Each donation is associated with a specific campaign and donor.
     Donations include amount, reference number, optional comment,
     and timestamp information.
+    
+    Once created, a donation's amount, campaign and donor never change:
+    the campaign funding counters (donations.signals) only account for
+    created and deleted rows. Correct a mistake by deleting the donation
+    and recording a new one.
     """
     # Relationships
     campaign = models.ForeignKey(
@@ -38,6 +44,20 @@ class Donation(models.Model):
         help_text="Comments from the donor"
     )
     
+    # Attribution - captured from the request by donations.attribution
+    source = models.CharField(
+        max_length=50,
+        blank=True,
+        default='',
+        help_text="Explicit source tag, e.g. from ?utm_source="
+    )
+    referrer = models.CharField(
+        max_length=500,
+        blank=True,
+        default='',
+        help_text="External page that referred the donor"
+    )
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -45,16 +65,23 @@ class Donation(models.Model):
         verbose_name = "Donation"
         verbose_name_plural = "Donations"
         ordering = ['-created_at']
+        indexes = [
+            # Recent donations per campaign and per donor, newest first
+            models.Index(fields=['campaign', 'created_at'], name='donation_campaign_created_idx'),
+            models.Index(fields=['donor', 'created_at'], name='donation_donor_created_idx'),
+        ]
         
     def __str__(self):
         return f'${self.amount} by {self.donor.get_full_name() or self.donor.username} for {self.campaign.title}'
         
     def save(self, *args, **kwargs):
-        # Generate a reference number if not provided
+        # Generate a reference number if not provided (see donations.references)
         if not self.reference_number:
-            timestamp = int(timezone.now().timestamp())
-            self.reference_number = f"DON-{timestamp}-{self.donor.id if self.donor_id else 0}"
-        super().save(*args, **kwargs)
+            self.reference_number = next_reference()
+        # Run the insert and the post_save counter update (donations.signals)
+        # in one transaction so campaign totals never disagree with the rows
+        with transaction.atomic():
+            super().save(*args, **kwargs)
     
     @property
     def formatted_amount(self):
@@ -71,3 +98,137 @@ class Donation(models.Model):
         """Determine if this is an anonymous donation"""
         # For future use if anonymous donations are implemented
         return False
+
+
+class DonationExport(models.Model):
+    """
+    A background CSV export of an organisation's donations
+
+    Jobs are queued by org owners, written to MEDIA_ROOT by a worker
+    (see donations.export_jobs) and kept for download until they expire.
+    Only one identical job may be pending or running at a time.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETE = 'complete'
+    STATUS_FAILED = 'failed'
+    STATUS_EXPIRED = 'expired'
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETE, 'Complete'),
+        (STATUS_FAILED, 'Failed'),
+        (STATUS_EXPIRED, 'Expired'),
+    ]
+    IN_FLIGHT_STATUSES = (STATUS_PENDING, STATUS_RUNNING)
+
+    organisation = models.ForeignKey(
+        'organizations.Organisation',
+        on_delete=models.CASCADE,
+        related_name='donation_exports'
+    )
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='donation_exports'
+    )
+    compress = models.BooleanField(default=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+
+    # Output and progress
+    file = models.FileField(upload_to='exports/', blank=True)
+    total_rows = models.PositiveIntegerField(default=0)
+    rows_written = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Donation Export"
+        verbose_name_plural = "Donation Exports"
+        ordering = ['-created_at']
+        constraints = [
+            # Deduplicates identical in-flight requests at the database level
+            models.UniqueConstraint(
+                fields=['organisation', 'compress'],
+                condition=models.Q(status__in=['pending', 'running']),
+                name='unique_in_flight_donation_export',
+            ),
+        ]
+
+    def __str__(self):
+        return f'Donation export #{self.pk} for {self.organisation} ({self.status})'
+
+    @property
+    def progress(self):
+        """Return the percentage of rows written, 0-100"""
+        if self.status == self.STATUS_COMPLETE:
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(100, self.rows_written * 100 // self.total_rows)
+
+    @property
+    def is_downloadable(self):
+        """True if the export finished and its file has not expired"""
+        return self.status == self.STATUS_COMPLETE and bool(self.file)
+
+    @property
+    def download_name(self):
+        """Filename offered to the browser"""
+        name = f'{self.organisation.name}_donations.csv'
+        return f'{name}.gz' if self.compress else name
+
+
+class IdempotencyKey(models.Model):
+    """
+    A client-supplied Idempotency-Key and the response it produced
+
+    A row is claimed before the donation is written, so a concurrent
+    retry sees it in progress, and filled in with the response afterwards
+    so later retries are replayed (see donations.idempotency). Rows are
+    deleted by `manage.py expire_idempotency_keys` once they expire.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    # Which endpoint the key was used with, e.g. 'donations.create'
+    scope = models.CharField(max_length=50)
+    key = models.CharField(max_length=255)
+    # SHA-256 of the method, path and body, so a reused key with a
+    # different request is refused rather than replayed
+    fingerprint = models.CharField(max_length=64)
+
+    # The stored response; status_code is null while the request is running
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_headers = models.JSONField(default=dict, blank=True)
+    response_body = models.BinaryField(blank=True, default=b'')
+
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Idempotency Key"
+        verbose_name_plural = "Idempotency Keys"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'scope', 'key'], name='unique_idempotency_key'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at'], name='idempotency_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f'Idempotency key {self.key} for {self.scope}'
+
+    @property
+    def is_complete(self):
+        return self.status_code is not None
@@ -0,0 +1,216 @@
+"""
+Donation reference numbers.
+
+References are snowflake-style: a millisecond timestamp, a worker id and a
+per-worker sequence, written in Crockford base32 as
+
+    DON-<time, 9 chars>-<worker, 4 chars>-<sequence, 3 chars>
+
+e.g. DON-01HZX3K7Q-0Z4M-002. No coordination is needed: each process has
+its own worker id, and within a process a lock hands out the sequence, so
+two references can only collide if two live processes share a worker id.
+
+The worker id is a host id in the high bits and a process slot in the low
+ones. DONATION_REFERENCE_HOST_ID (0-1023) is set once per host (or
+container) and must differ between hosts sharing a database. Each process
+then claims one of 1024 slot files under DONATION_REFERENCE_SLOT_DIR with a
+non-blocking exclusive flock and holds it for its lifetime; the kernel
+drops the lock when the process exits, so a slot is never shared by two
+live processes and is free again once its holder is gone. Unlike a pid,
+which containers reuse freely and which can match another's modulo 1024,
+a claimed slot is checked against every other process on the host.
+
+What can still collide is configuration: two hosts given the same host id,
+or two processes on one host pointed at different slot directories. With
+DONATION_REFERENCE_REQUIRE_HOST_ID set (as the production settings do) a
+missing host id is an ImproperlyConfigured error and a failed system check
+rather than a guess. Otherwise, as in development, the host id is derived
+from the host name, which is only safe while one host writes references.
+When all 1024 slots are held, or flock is unavailable, getting a
+reference raises ImproperlyConfigured instead of risking a duplicate.
+
+References from one worker are strictly increasing. If the clock steps
+backwards the generator keeps counting from the last timestamp it issued
+rather than waiting for the clock to catch up.
+"""
+import hashlib
+import os
+import socket
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+PREFIX = 'DON'
+
+# Crockford base32: no I, L, O or U, so references survive being read aloud
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+
+TIME_CHARS, WORKER_CHARS, SEQUENCE_CHARS = 9, 4, 3
+WORKER_BITS = WORKER_CHARS * 5
+SEQUENCE_BITS = SEQUENCE_CHARS * 5
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+# Worker ids are <host id, 10 bits><process slot, 10 bits>
+PROCESS_BITS = 10
+MAX_PROCESS_SLOT = (1 << PROCESS_BITS) - 1
+MAX_HOST_ID = (1 << (WORKER_BITS - PROCESS_BITS)) - 1
+
+# Milliseconds are counted from 2024-01-01 UTC; 45 bits last ~1100 years
+EPOCH_MS = 1704067200000
+
+
+def encode(value, width):
+    """`value` in fixed-width Crockford base32."""
+    chars = []
+    for _ in range(width):
+        value, digit = divmod(value, 32)
+        chars.append(ALPHABET[digit])
+    if value:
+        raise ValueError(f'{value} does not fit in {width} base32 digits')
+    return ''.join(reversed(chars))
+
+
+def decode(text):
+    """The integer written as Crockford base32 in `text`."""
+    value = 0
+    for char in text.upper():
+        value = value * 32 + ALPHABET.index(char)
+    return value
+
+
+def host_id():
+    """
+    The configured host id. Without one it is derived from the host name,
+    unless DONATION_REFERENCE_REQUIRE_HOST_ID makes that an error.
+    """
+    configured = getattr(settings, 'DONATION_REFERENCE_HOST_ID', None)
+    if configured not in (None, ''):
+        configured = int(configured)
+        if not 0 <= configured <= MAX_HOST_ID:
+            raise ImproperlyConfigured(f'DONATION_REFERENCE_HOST_ID must be between 0 and {MAX_HOST_ID}')
+        return configured
+    if getattr(settings, 'DONATION_REFERENCE_REQUIRE_HOST_ID', False):
+        raise ImproperlyConfigured(
+            'DONATION_REFERENCE_HOST_ID must be set to a per-host id between 0 and '
+            f'{MAX_HOST_ID}; a derived one can collide between hosts and duplicate donation references'
+        )
+    digest = hashlib.blake2b(socket.gethostname().encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') & MAX_HOST_ID
+
+
+def slot_dir():
+    """The directory holding this host's process slot files."""
+    return getattr(settings, 'DONATION_REFERENCE_SLOT_DIR', None) or os.path.join(
+        tempfile.gettempdir(), 'crowdfund-reference-slots'
+    )
+
+
+def claim_process_slot(directory=None):
+    """
+    Claim a free process slot; returns (slot, file descriptor).
+
+    The slot is held until the descriptor is closed or the process exits.
+    """
+    if fcntl is None:
+        raise ImproperlyConfigured('Donation references need flock to claim a process slot')
+    directory = directory or slot_dir()
+    os.makedirs(directory, exist_ok=True)
+    for slot in range(MAX_PROCESS_SLOT + 1):
+        fd = os.open(os.path.join(directory, f'slot-{slot}'), os.O_RDWR | os.O_CREAT | os.O_CLOEXEC, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            continue
+        return slot, fd
+    raise ImproperlyConfigured(f'All {MAX_PROCESS_SLOT + 1} donation reference slots in {directory} are in use')
+
+
+def worker_id_for(host, slot):
+    """The worker id of process slot `slot` on host `host`."""
+    return host << PROCESS_BITS | slot
+
+
+class ReferenceGenerator:
+    """Thread-safe source of monotonic references for one worker id."""
+
+    def __init__(self, worker_id, clock=time.time_ns):
+        if not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f'worker_id must be between 0 and {MAX_WORKER_ID}')
+        self.worker_id = worker_id
+        self._worker = encode(worker_id, WORKER_CHARS)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+
+    def _now_ms(self):
+        return self._clock() // 1_000_000 - EPOCH_MS
+
+    def next(self):
+        with self._lock:
+            now = self._now_ms()
+            if now > self._last_ms:
+                self._last_ms, self._sequence = now, 0
+            elif self._sequence < MAX_SEQUENCE:
+                # Same millisecond, or the clock went backwards
+                self._sequence += 1
+            else:
+                # Sequence exhausted: borrow the next millisecond
+                self._last_ms, self._sequence = self._last_ms + 1, 0
+            timestamp, sequence = self._last_ms, self._sequence
+        return f'{PREFIX}-{encode(timestamp, TIME_CHARS)}-{self._worker}-{encode(sequence, SEQUENCE_CHARS)}'
+
+
+def parse_reference(reference):
+    """(milliseconds since the Unix epoch, worker id, sequence) of a reference."""
+    prefix, timestamp, worker, sequence = reference.split('-')
+    if prefix != PREFIX:
+        raise ValueError(f'Not a donation reference: {reference!r}')
+    return decode(timestamp) + EPOCH_MS, decode(worker), decode(sequence)
+
+
+_generator = None
+_generator_lock = threading.Lock()
+_slot_fd = None
+
+
+def get_generator():
+    """This process's generator, created on first use."""
+    global _generator, _slot_fd
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                host = host_id()
+                slot, _slot_fd = claim_process_slot()
+                _generator = ReferenceGenerator(worker_id_for(host, slot))
+    return _generator
+
+
+def next_reference():
+    """A new donation reference number."""
+    return get_generator().next()
+
+
+def _reset_after_fork():
+    # A forked child must not keep issuing its parent's worker id; it
+    # closes its copy of the parent's slot, which the parent keeps holding
+    global _generator, _generator_lock, _slot_fd
+    if _slot_fd is not None:
+        os.close(_slot_fd)
+    _generator = None
+    _generator_lock = threading.Lock()
+    _slot_fd = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,76 @@
+"""
+Signal handlers for the donations app.
+
+Keeps the denormalised funding counters on Campaign (total_raised,
+donation_count, donor_count) in step with the donations table, so campaign
+pages can read them directly instead of aggregating over every donation.
+With CAMPAIGN_COUNTER_SHARDS set, increments go to a counter shard instead
+of the campaign row (see campaigns.counters). Only creates and deletes are
+handled: donations are immutable once made (see Donation).
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from campaigns.counters import add_to_counters, fold_counter_shards, lock_counter_row, unfolded
+from campaigns.models import Campaign
+from .models import Donation
+
+
+@receiver(post_save, sender=Donation)
+def add_donation_to_campaign_totals(sender, instance, created, raw=False, **kwargs):
+    """Increment the campaign counters when a donation is created."""
+    if not created or raw:
+        return
+
+    # Only the donor's first donation to this campaign adds a new donor.
+    # Donation.save runs this in the insert's transaction; locking the
+    # counter row this donation adds to (keyed by donor, so the same one
+    # for all of a donor's donations) makes two concurrent first donations
+    # (a double submit) take turns, so the second sees the first and is
+    # not counted again
+    lock_counter_row(instance.campaign_id, shard_key=instance.donor_id)
+    is_new_donor = not Donation.objects.filter(
+        campaign_id=instance.campaign_id,
+        donor_id=instance.donor_id,
+    ).exclude(pk=instance.pk).exists()
+
+    add_to_counters(
+        instance.campaign_id,
+        total_raised=instance.amount,
+        donation_count=1,
+        donor_count=int(is_new_donor),
+        shard_key=instance.donor_id,
+    )
+
+
+@receiver(post_delete, sender=Donation)
+def remove_donation_from_campaign_totals(sender, instance, **kwargs):
+    """
+    Decrement the campaign counters when a donation is deleted.
+
+    The donor count is recounted rather than decremented: cascading deletes
+    remove all of a donor's rows before any post_delete fires, so a
+    per-instance "was this their last donation?" check would over-count.
+    """
+    remaining_donors = Donation.objects.filter(
+        campaign=OuterRef('pk')
+    ).order_by().values('campaign').annotate(
+        donors=Count('donor', distinct=True)
+    ).values('donors')
+
+    # The donor count below is absolute, so pending shard increments must
+    # be in the campaign row first; folding also locks the row. Shards that
+    # donations add after the fold are left out of the recount, as they
+    # are folded in later
+    fold_counter_shards([instance.campaign_id])
+
+    # Clamp at zero so a campaign that has not been backfilled yet cannot
+    # violate the positive-integer constraints; sync_campaign_counters
+    # repairs any drift this leaves behind
+    Campaign.objects.filter(pk=instance.campaign_id).update(
+        total_raised=Greatest(F('total_raised') - instance.amount, 0),
+        donation_count=Greatest(F('donation_count') - 1, 0),
+        donor_count=Greatest(Coalesce(Subquery(remaining_donors), 0) - unfolded('donor_count'), 0),
+    )
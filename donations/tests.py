@@ -0,0 +1,684 @@
+import csv
+import gzip
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.http import HttpResponseRedirect
+from django.db import OperationalError, close_old_connections, connection
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from campaigns.models import Campaign
+from donations.admin import DonationAdmin
+from donations.analytics import bucket_starts, bucketed_totals, source_breakdown
+from donations.idempotency import expire_keys, idempotent
+from donations.ingest import ingest
+from donations.export_jobs import expire_exports, fail_stale_exports, request_export, run_export
+from donations.exports import iter_csv, iter_gzip, parse_range, streaming_csv_response
+from donations.models import DonationExport, IdempotencyKey
+from donations.models import Donation
+from donations.references import (
+    MAX_SEQUENCE, PROCESS_BITS, ReferenceGenerator, claim_process_slot, host_id, next_reference, parse_reference,
+    worker_id_for,
+)
+from organizations.models import Organisation
+
+CustomUser = get_user_model()
+
+
+class DonationFixturesMixin:
+    """Helpers for creating an organisation, campaign and dated donations."""
+
+    def create_fixtures(self):
+        self.organisation = Organisation.objects.create(name='Analytics Org')
+        self.donor = CustomUser.objects.create_user(username='donor1', password='password123', role='donor')
+        self.campaign = Campaign.objects.create(
+            title='Analytics Campaign',
+            slug='analytics-campaign',
+            description='Campaign for analytics tests',
+            funding_goal=5000,
+            category='education',
+            organisation=self.organisation,
+            status='active',
+        )
+        self._reference = 0
+
+    def donate_at(self, created_at, amount, campaign=None):
+        self._reference += 1
+        donation = Donation.objects.create(
+            campaign=campaign or self.campaign,
+            donor=self.donor,
+            amount=amount,
+            reference_number=f'REF-{self._reference}',
+        )
+        # created_at is auto_now_add, so backdate it with an update
+        Donation.objects.filter(pk=donation.pk).update(created_at=created_at)
+        return donation
+
+
+class BucketStartsTests(TestCase):
+    NOW = datetime(2025, 3, 12, 15, 30, tzinfo=dt_timezone.utc)  # a Wednesday
+
+    def test_daily_buckets_end_today(self):
+        starts = bucket_starts('day', 3, now=self.NOW)
+        self.assertEqual([d.isoformat() for d in starts], ['2025-03-10', '2025-03-11', '2025-03-12'])
+
+    def test_weekly_buckets_start_on_monday(self):
+        starts = bucket_starts('week', 2, now=self.NOW)
+        self.assertEqual([d.isoformat() for d in starts], ['2025-03-03', '2025-03-10'])
+
+    def test_monthly_buckets_cross_year_boundary(self):
+        starts = bucket_starts('month', 4, now=self.NOW)
+        self.assertEqual([d.isoformat() for d in starts], ['2024-12-01', '2025-01-01', '2025-02-01', '2025-03-01'])
+
+    def test_unknown_granularity_is_rejected(self):
+        with self.assertRaises(ValueError):
+            bucket_starts('hour', 3)
+
+
+class BucketedTotalsTests(DonationFixturesMixin, TestCase):
+    NOW = datetime(2025, 3, 12, 15, 30, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        self.create_fixtures()
+
+    def test_empty_buckets_are_filled_with_zero(self):
+        self.donate_at(self.NOW - timedelta(days=2), 40)
+
+        buckets = bucketed_totals(self.organisation, 'day', 4, now=self.NOW)
+
+        self.assertEqual([bucket.total for bucket in buckets], [0, 40, 0, 0])
+
+    def test_totals_are_summed_per_bucket(self):
+        self.donate_at(self.NOW, 10)
+        self.donate_at(self.NOW - timedelta(hours=1), 15)
+        self.donate_at(self.NOW - timedelta(days=40), 100)
+
+        buckets = bucketed_totals(self.organisation, 'month', 3, now=self.NOW)
+
+        self.assertEqual([bucket.total for bucket in buckets], [100, 0, 25])
+
+    def test_other_organisations_are_excluded(self):
+        other_org = Organisation.objects.create(name='Other Org')
+        other_campaign = Campaign.objects.create(
+            title='Other Campaign', slug='other-campaign', description='x',
+            funding_goal=100, category='other', organisation=other_org, status='active',
+        )
+        self.donate_at(self.NOW, 10)
+        self.donate_at(self.NOW, 99, campaign=other_campaign)
+
+        buckets = bucketed_totals(self.organisation, 'day', 1, now=self.NOW)
+
+        self.assertEqual(buckets[0].total, 10)
+
+    def test_series_is_a_single_query(self):
+        for days_ago in range(30):
+            self.donate_at(self.NOW - timedelta(days=days_ago), 5)
+
+        with self.assertNumQueries(1):
+            bucketed_totals(self.organisation, 'day', 30, now=self.NOW)
+
+    @override_settings(TIME_ZONE='America/New_York')
+    def test_buckets_follow_the_current_time_zone(self):
+        # 02:00 UTC on the 12th is still the evening of the 11th in New York
+        self.donate_at(datetime(2025, 3, 12, 2, 0, tzinfo=dt_timezone.utc), 30)
+
+        with timezone.override('America/New_York'):
+            buckets = bucketed_totals(self.organisation, 'day', 2, now=self.NOW)
+
+        self.assertEqual([bucket.start.isoformat() for bucket in buckets], ['2025-03-11', '2025-03-12'])
+        self.assertEqual([bucket.total for bucket in buckets], [30, 0])
+
+
+class StreamingCSVTests(TestCase):
+    HEADER = ['Reference', 'Amount', 'Comment']
+
+    def rows(self, count):
+        return ([f'REF-{i}', i, 'says "thanks", twice'] for i in range(count))
+
+    def test_rows_are_batched_into_chunks(self):
+        chunks = list(iter_csv(self.HEADER, self.rows(500), chunk_bytes=1024))
+
+        self.assertGreater(len(chunks), 1)
+        parsed = list(csv.reader(''.join(chunks).splitlines()))
+        self.assertEqual(parsed[0], self.HEADER)
+        self.assertEqual(len(parsed), 501)
+        self.assertEqual(parsed[-1], ['REF-499', '499', 'says "thanks", twice'])
+
+    def test_gzip_stream_round_trips(self):
+        plain = ''.join(iter_csv(self.HEADER, self.rows(100)))
+        compressed = b''.join(iter_gzip(iter_csv(self.HEADER, self.rows(100))))
+
+        self.assertEqual(gzip.decompress(compressed).decode('utf-8'), plain)
+
+    def test_response_is_streamed_and_named(self):
+        response = streaming_csv_response('export.csv', self.HEADER, self.rows(3))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('filename="export.csv"', response['Content-Disposition'])
+
+        response = streaming_csv_response('export.csv', self.HEADER, self.rows(3), compress=True)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('filename="export.csv.gz"', response['Content-Disposition'])
+
+
+class ParseRangeTests(TestCase):
+    def test_absent_or_multiple_ranges_mean_whole_file(self):
+        self.assertIsNone(parse_range(None, 100))
+        self.assertIsNone(parse_range('bytes=0-10,20-30', 100))
+
+    def test_single_ranges(self):
+        self.assertEqual(parse_range('bytes=0-9', 100), (0, 9))
+        self.assertEqual(parse_range('bytes=90-', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=-10', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=50-500', 100), (50, 99))
+
+    def test_unsatisfiable_range(self):
+        with self.assertRaises(ValueError):
+            parse_range('bytes=100-', 100)
+
+
+class DonationExportJobTests(DonationFixturesMixin, TestCase):
+    def setUp(self):
+        self.create_fixtures()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, DONATION_EXPORT_BACKEND='worker')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_identical_in_flight_requests_are_deduplicated(self):
+        first, created = request_export(self.organisation, self.donor)
+        second, created_again = request_export(self.organisation, self.donor)
+        compressed, _ = request_export(self.organisation, self.donor, compress=True)
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(first.pk, second.pk)
+        self.assertNotEqual(first.pk, compressed.pk)
+
+        run_export(first.pk)
+        third, created = request_export(self.organisation, self.donor)
+        self.assertTrue(created)
+        self.assertNotEqual(third.pk, first.pk)
+
+    def test_export_is_written_to_media_root(self):
+        for days_ago in range(3):
+            self.donate_at(timezone.now() - timedelta(days=days_ago), 10)
+        job, _ = request_export(self.organisation, self.donor)
+
+        job = run_export(job.pk)
+
+        self.assertEqual(job.status, DonationExport.STATUS_COMPLETE)
+        self.assertEqual((job.total_rows, job.rows_written, job.progress), (3, 3, 100))
+        self.assertIsNotNone(job.expires_at)
+        self.assertTrue(job.file.path.startswith(self.media_root))
+        with open(job.file.path) as exported:
+            self.assertEqual(len(exported.read().splitlines()), 4)
+        self.assertIsNone(run_export(job.pk))
+
+    def test_compressed_export(self):
+        self.donate_at(timezone.now(), 10)
+        job, _ = request_export(self.organisation, self.donor, compress=True)
+
+        job = run_export(job.pk)
+
+        with open(job.file.path, 'rb') as exported:
+            self.assertIn('Analytics Campaign', gzip.decompress(exported.read()).decode('utf-8'))
+
+    def test_expired_exports_are_deleted(self):
+        job, _ = request_export(self.organisation, self.donor)
+        job = run_export(job.pk)
+        path = job.file.path
+
+        self.assertEqual(expire_exports(now=job.expires_at - timedelta(seconds=1)), 0)
+        self.assertEqual(expire_exports(now=job.expires_at), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, DonationExport.STATUS_EXPIRED)
+        self.assertFalse(job.file)
+        self.assertFalse(os.path.exists(path))
+
+    def test_stalled_exports_are_failed(self):
+        job, _ = request_export(self.organisation, self.donor)
+        DonationExport.objects.filter(pk=job.pk).update(
+            status=DonationExport.STATUS_RUNNING, started_at=timezone.now() - timedelta(days=1)
+        )
+
+        self.assertEqual(fail_stale_exports(), 1)
+        _, created = request_export(self.organisation, self.donor)
+        self.assertTrue(created)
+
+    def test_worker_command_drains_queue(self):
+        self.donate_at(timezone.now(), 10)
+        job, _ = request_export(self.organisation, self.donor)
+
+        call_command('process_donation_exports', '--once', stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, DonationExport.STATUS_COMPLETE)
+
+
+class SourceBreakdownTests(DonationFixturesMixin, TestCase):
+    def setUp(self):
+        self.create_fixtures()
+
+    def donate_from(self, amount, source='', referrer=''):
+        donation = self.donate_at(timezone.now(), amount)
+        Donation.objects.filter(pk=donation.pk).update(source=source, referrer=referrer)
+
+    def test_donations_are_categorised_in_one_query(self):
+        self.donate_from(10)
+        self.donate_from(20, referrer='https://www.Facebook.com/story')
+        self.donate_from(5, referrer='https://mail.example.com/newsletter?id=3')
+        self.donate_from(7, referrer='https://blog.example.org/post')
+        self.donate_from(30, source='Gala', referrer='https://twitter.com/x')
+
+        with CaptureQueriesContext(connection) as queries:
+            breakdown = source_breakdown(self.organisation)
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(breakdown, [('Gala', 30), ('Social Media', 20), ('Direct', 10), ('Referral', 7), ('Email', 5)])
+
+
+class DonationAttributionTests(DonationFixturesMixin, TestCase):
+    def setUp(self):
+        self.create_fixtures()
+        self.client.login(username='donor1', password='password123')
+        self.url = reverse('donations:create', args=[self.campaign.pk])
+
+    def test_source_and_external_referrer_are_recorded(self):
+        self.client.get(self.url, HTTP_REFERER='https://facebook.com/post/1')
+        # The form posts back to itself, so the browser now sends our own URL
+        self.client.post(
+            f'{self.url}?utm_source=spring-appeal',
+            {'amount': 25},
+            HTTP_REFERER=f'http://testserver{self.url}',
+        )
+
+        donation = Donation.objects.get()
+        self.assertEqual(donation.source, 'spring-appeal')
+        self.assertEqual(donation.referrer, 'https://facebook.com/post/1')
+
+    def test_direct_donation_has_no_attribution(self):
+        self.client.post(self.url, {'amount': 25})
+
+        donation = Donation.objects.get()
+        self.assertEqual((donation.source, donation.referrer), ('', ''))
+
+
+class DonationIngestTests(DonationFixturesMixin, TestCase):
+    def setUp(self):
+        self.create_fixtures()
+        self.donor.email = 'donor1@example.com'
+        self.donor.save()
+        self.other_donor = CustomUser.objects.create_user(username='donor2', password='password123', role='donor')
+        Donation.objects.create(campaign=self.campaign, donor=self.donor, amount=10, reference_number='EXISTING')
+
+    def rows(self, count, **overrides):
+        return [{'campaign': self.campaign.pk, 'donor': self.other_donor.pk, 'amount': 20, **overrides}] * count
+
+    def test_invalid_rows_are_reported_without_aborting_the_batch(self):
+        rows = [
+            {'campaign': self.campaign.pk, 'donor_email': 'donor1@example.com', 'amount': 25, 'reference_number': 'P-1'},
+            {'campaign': self.campaign.pk, 'donor': self.other_donor.pk, 'amount': 2},
+            {'campaign': 999999, 'donor': self.other_donor.pk, 'amount': 25},
+            {'campaign': self.campaign.pk, 'amount': 25},
+            {'campaign': self.campaign.pk, 'donor': self.other_donor.pk, 'amount': 25, 'reference_number': 'EXISTING'},
+            {'campaign': self.campaign.pk, 'donor': self.other_donor.pk, 'amount': 25, 'reference_number': 'P-1'},
+            {'campaign': self.campaign.pk, 'donor': self.other_donor.pk, 'amount': 30, 'source': 'partner'},
+        ]
+
+        result = ingest(rows, chunk_size=3)
+
+        self.assertEqual((result.rows, result.created), (7, 2))
+        self.assertEqual(
+            [(error['row'], sorted(error['errors'])) for error in result.errors],
+            [(2, ['amount']), (3, ['campaign']), (4, ['__all__']), (5, ['reference_number']), (6, ['reference_number'])],
+        )
+        self.assertTrue(Donation.objects.filter(reference_number='P-1', donor=self.donor, amount=25).exists())
+
+    def test_reference_taken_after_the_check_fails_only_its_row(self):
+        def take_reference():
+            # A concurrent import claims 'RACE' between the check and the insert
+            Donation.objects.get_or_create(
+                reference_number='RACE', defaults={'campaign': self.campaign, 'donor': self.donor, 'amount': 10}
+            )
+            return next_reference()
+        rows = self.rows(2) + self.rows(1, reference_number='RACE') + self.rows(2)
+
+        with mock.patch('donations.ingest.next_reference', side_effect=take_reference):
+            result = ingest(rows)
+
+        self.assertEqual(result.created, 4)
+        self.assertEqual(
+            result.errors,
+            [{'row': 3, 'errors': {'reference_number': ['A donation with this reference number already exists.']}}],
+        )
+        self.campaign.refresh_from_db()
+        self.assertEqual((self.campaign.total_raised, self.campaign.donation_count), (100, 6))
+
+    def test_email_shared_by_several_users_is_ambiguous(self):
+        CustomUser.objects.create_user(username='donor3', email='donor1@example.com', role='donor')
+
+        result = ingest([{'campaign': self.campaign.pk, 'donor_email': 'donor1@example.com', 'amount': 25}])
+
+        self.assertEqual(result.created, 0)
+        self.assertEqual(list(result.errors[0]['errors']), ['donor_email'])
+
+    def test_campaign_counters_are_updated_per_chunk(self):
+        result = ingest(self.rows(40) + self.rows(10, donor=self.donor.pk), chunk_size=25)
+
+        self.assertEqual(result.created, 50)
+        self.campaign.refresh_from_db()
+        self.assertEqual(
+            (self.campaign.total_raised, self.campaign.donation_count, self.campaign.donor_count), (1010, 51, 2)
+        )
+        call_command('sync_campaign_counters', '--check', stdout=StringIO())
+
+    def test_queries_per_chunk_do_not_grow_with_rows(self):
+        with CaptureQueriesContext(connection) as small:
+            ingest(self.rows(5))
+        with CaptureQueriesContext(connection) as large:
+            ingest(self.rows(100))
+
+        self.assertEqual(len(large), len(small))
+
+    def test_import_command_reads_csv_and_ndjson(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        csv_path = os.path.join(directory, 'donations.csv')
+        with open(csv_path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['campaign', 'donor_email', 'amount', 'comment'])
+            writer.writerow([self.campaign.pk, 'donor1@example.com', 50, 'Cheque'])
+            writer.writerow([self.campaign.pk, 'nobody@example.com', 50, ''])
+        ndjson_path = os.path.join(directory, 'donations.ndjson')
+        with open(ndjson_path, 'w') as file:
+            file.write(f'{{"campaign": {self.campaign.pk}, "donor": {self.other_donor.pk}, "amount": 15}}\n')
+            file.write('not json\n')
+
+        out = StringIO()
+        call_command('import_donations', csv_path, stdout=out)
+        call_command('import_donations', ndjson_path, stdout=out)
+
+        self.assertIn('Row 2: donor_email: No user with this email address.', out.getvalue())
+        self.assertIn('Row 2: __all__: Invalid JSON', out.getvalue())
+        self.assertEqual(Donation.objects.filter(comment='Cheque', amount=50).count(), 1)
+        self.assertEqual(Donation.objects.count(), 3)
+
+    def test_api_bulk_action_is_staff_only(self):
+        url = reverse('api:donation-bulk')
+        self.client.force_login(self.donor)
+        self.assertEqual(self.client.post(url, self.rows(2), content_type='application/json').status_code, 403)
+
+        staff = CustomUser.objects.create_user(username='staff', password='password123', is_staff=True)
+        self.client.logout()
+        self.client.force_login(staff)
+        response = self.client.post(url, self.rows(2) + [{'amount': 'ten'}], content_type='application/json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.json()['created'], response.json()['failed']), (2, 1))
+        self.assertEqual(response.json()['errors'][0]['row'], 3)
+        self.assertEqual(
+            self.client.post(url, {'amount': 10}, content_type='application/json').status_code, 400
+        )
+
+
+class IdempotencyKeyTests(DonationFixturesMixin, TestCase):
+    def setUp(self):
+        self.create_fixtures()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client.login(username='donor1', password='password123')
+        self.url = reverse('donations:create', args=[self.campaign.pk])
+
+    def donate(self, key, amount=25):
+        return self.client.post(self.url, {'amount': amount}, HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retries_replay_the_first_response(self):
+        first = self.donate('retry-1')
+        retry = self.donate('retry-1')
+
+        self.assertEqual(Donation.objects.count(), 1)
+        self.assertEqual((retry.status_code, retry['Location']), (first.status_code, first['Location']))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.donation_count, 1)
+
+        # Without the cache the table still stops the duplicate
+        cache.clear()
+        self.assertEqual(self.donate('retry-1')['Location'], first['Location'])
+        self.assertEqual(Donation.objects.count(), 1)
+
+    def test_requests_without_a_key_are_not_deduplicated(self):
+        self.client.post(self.url, {'amount': 25})
+        self.client.post(self.url, {'amount': 25})
+
+        self.assertEqual(Donation.objects.count(), 2)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_key_reused_for_another_request_is_refused(self):
+        self.donate('reused')
+
+        self.assertEqual(self.donate('reused', amount=50).status_code, 422)
+        self.assertEqual(Donation.objects.count(), 1)
+
+    def test_retry_during_the_first_request_conflicts(self):
+        IdempotencyKey.objects.create(
+            user=self.donor, scope='donations.create', key='running', fingerprint='',
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+
+        response = self.donate('running')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Donation.objects.exists())
+
+    def test_cached_replay_skips_the_database(self):
+        request = RequestFactory().post('/donate/', {'amount': 25}, HTTP_IDEMPOTENCY_KEY='cached')
+        idempotent(request, self.donor, 'test', lambda: HttpResponseRedirect('/done/'))
+
+        def write_path():
+            raise AssertionError('The retry reached the write path')
+
+        with self.assertNumQueries(0):
+            response = idempotent(request, self.donor, 'test', write_path)
+        self.assertEqual(response['Location'], '/done/')
+
+    def test_expired_keys_are_deleted_and_reusable(self):
+        self.donate('old')
+        key = IdempotencyKey.objects.get()
+
+        self.assertEqual(expire_keys(now=key.expires_at - timedelta(seconds=1)), 0)
+        self.assertEqual(expire_keys(now=key.expires_at), 1)
+        cache.clear()
+        self.donate('old')
+        self.assertEqual(Donation.objects.count(), 2)
+
+    @override_settings(IDEMPOTENCY_KEY_TTL=60)
+    def test_cached_replay_does_not_outlive_the_key(self):
+        now = [timezone.now()]
+        request = RequestFactory().post('/donate/', {'amount': 25}, HTTP_IDEMPOTENCY_KEY='slow')
+
+        def slow_handler():
+            now[0] += timedelta(seconds=50)
+            return HttpResponseRedirect('/done/')
+
+        with mock.patch('donations.idempotency.timezone.now', lambda: now[0]), \
+                mock.patch('donations.idempotency.cache.set', wraps=cache.set) as cache_set:
+            idempotent(request, self.donor, 'test', slow_handler)
+
+        # Cached until the row expires, 60 seconds after the claim
+        self.assertLessEqual(cache_set.call_args.args[2], 10)
+
+    def test_api_create_replays_the_first_response(self):
+        url = reverse('api:donation-list')
+        payload = {'campaign': self.campaign.pk, 'amount': 25}
+
+        first = self.client.post(url, payload, content_type='application/json', HTTP_IDEMPOTENCY_KEY='api-1')
+        retry = self.client.post(url, payload, content_type='application/json', HTTP_IDEMPOTENCY_KEY='api-1')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(first.json()['donor'], self.donor.pk)
+        self.assertEqual((retry.status_code, retry.json()), (201, first.json()))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Donation.objects.filter(donor=self.donor).count(), 1)
+
+
+class DonationApiTests(DonationFixturesMixin, TestCase):
+    def setUp(self):
+        self.create_fixtures()
+        self.other_donor = CustomUser.objects.create_user(username='donor2', password='password123', role='donor')
+        self.own = self.donate_at(timezone.now(), 25)
+        self.other = Donation.objects.create(campaign=self.campaign, donor=self.other_donor, amount=40)
+        self.client.login(username='donor1', password='password123')
+
+    def test_donors_only_see_their_own_donations(self):
+        response = self.client.get(reverse('api:donation-list'), HTTP_ACCEPT='application/json')
+
+        self.assertEqual([row['id'] for row in response.json()['results']], [self.own.pk])
+        other_url = reverse('api:donation-detail', kwargs={'pk': self.other.pk})
+        self.assertEqual(self.client.get(other_url, HTTP_ACCEPT='application/json').status_code, 404)
+
+    def test_donations_cannot_be_edited_or_deleted(self):
+        url = reverse('api:donation-detail', kwargs={'pk': self.own.pk})
+
+        self.assertEqual(self.client.patch(url, {'amount': 1000}, content_type='application/json').status_code, 405)
+        self.assertEqual(self.client.delete(url).status_code, 405)
+        self.own.refresh_from_db()
+        self.assertEqual(self.own.amount, 25)
+
+    def test_only_donors_can_donate(self):
+        CustomUser.objects.create_user(username='owner', password='password123', role='org_owner')
+        self.client.login(username='owner', password='password123')
+
+        response = self.client.post(
+            reverse('api:donation-list'), {'campaign': self.campaign.pk, 'amount': 25},
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Donation.objects.count(), 2)
+
+
+class DonationAdminTests(DonationFixturesMixin, TestCase):
+    def setUp(self):
+        self.create_fixtures()
+        self.admin = CustomUser.objects.create_superuser(username='admin', password='password123', email='a@example.com')
+        self.model_admin = DonationAdmin(Donation, admin.site)
+        self.request = RequestFactory().get('/')
+        self.request.user = self.admin
+
+    def test_counted_fields_are_read_only_once_created(self):
+        donation = self.donate_at(timezone.now(), 25)
+
+        change_form = self.model_admin.get_form(self.request, donation)
+        add_form = self.model_admin.get_form(self.request)
+
+        for field in ('amount', 'campaign', 'donor'):
+            self.assertNotIn(field, change_form.base_fields)
+            self.assertIn(field, add_form.base_fields)
+
+
+class DonationReferenceTests(DonationFixturesMixin, TransactionTestCase):
+    def setUp(self):
+        self.create_fixtures()
+
+    def test_same_donor_donations_from_a_thread_pool_do_not_collide(self):
+        def create_donation():
+            while True:
+                try:
+                    return Donation.objects.create(campaign=self.campaign, donor=self.donor, amount=1)
+                except OperationalError as exc:
+                    # SQLite's in-memory test database takes one writer at a
+                    # time; anything else, a collision included, is a failure
+                    if 'locked' not in str(exc):
+                        raise
+
+        def donate(count):
+            try:
+                return [create_donation().reference_number for _ in range(count)]
+            finally:
+                close_old_connections()
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            batches = list(pool.map(donate, [125] * 8))
+
+        references = [reference for batch in batches for reference in batch]
+        self.assertEqual(len(set(references)), 1000)
+        self.assertEqual(Donation.objects.count(), 1000)
+        # Each thread's references are in creation order
+        for batch in batches:
+            self.assertEqual(batch, sorted(batch))
+
+    def test_generator_is_unique_and_monotonic_across_threads(self):
+        generator = ReferenceGenerator(worker_id=7)
+
+        def generate(count):
+            return [generator.next() for _ in range(count)]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            batches = list(pool.map(generate, [5000] * 8))
+
+        references = [reference for batch in batches for reference in batch]
+        self.assertEqual(len(set(references)), 40000)
+        for batch in batches:
+            self.assertEqual(batch, sorted(batch))
+
+    @override_settings(DONATION_REFERENCE_HOST_ID='5')
+    def test_processes_sharing_a_host_id_get_their_own_worker_ids(self):
+        # Each claim stands in for a process: a held slot is never handed out again
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        claims = [claim_process_slot(directory) for _ in range(16)]
+        for _, fd in claims:
+            self.addCleanup(os.close, fd)
+        worker_ids = {worker_id_for(host_id(), slot) for slot, _ in claims}
+
+        self.assertEqual(len(worker_ids), 16)
+        self.assertEqual({worker_id >> PROCESS_BITS for worker_id in worker_ids}, {5})
+
+    def test_released_process_slot_is_claimed_again(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        first, fd = claim_process_slot(directory)
+        os.close(fd)  # as when the process exits
+
+        slot, fd = claim_process_slot(directory)
+        self.addCleanup(os.close, fd)
+
+        self.assertEqual(slot, first)
+
+    @override_settings(DONATION_REFERENCE_HOST_ID=None, DONATION_REFERENCE_REQUIRE_HOST_ID=True)
+    def test_missing_host_id_fails_fast_where_required(self):
+        from donations.checks import check_reference_host_id
+
+        with self.assertRaises(ImproperlyConfigured):
+            host_id()
+        self.assertEqual([error.id for error in check_reference_host_id(None)], ['donations.E001'])
+
+    def test_backwards_clock_and_exhausted_sequence(self):
+        now = [1_750_000_000_000 * 1_000_000]
+        generator = ReferenceGenerator(worker_id=1, clock=lambda: now[0])
+
+        first = generator.next()
+        now[0] -= 5_000 * 1_000_000  # the clock steps back five seconds
+        references = [first] + [generator.next() for _ in range(MAX_SEQUENCE + 1)]
+
+        self.assertEqual(references, sorted(set(references)))
+        issued_at, worker_id, sequence = parse_reference(references[-1])
+        # The last one had to borrow the next millisecond
+        self.assertEqual((issued_at, worker_id, sequence), (1_750_000_000_001, 1, 0))
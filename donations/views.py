@@ -1,3 +1,5 @@
+from functools import partial
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.generic import ListView, DetailView, CreateView, View
 from django.contrib.auth.mixins import LoginRequiredMixin
@@ -8,6 +10,8 @@ from django.utils import timezone
 
 from core.mixins import DonorRequiredMixin, OrganisationOwnerRequiredMixin
 from .models import Donation
+from .attribution import apply_attribution, remember_referrer
+from .idempotency import idempotent
 from .forms import DonationForm
 from campaigns.models import Campaign
 from utils.message_utils import add_success, add_error
@@ -25,6 +29,15 @@ class DonationCreateView(LoginRequiredMixin, DonorRequiredMixin, CreateView):
     form_class = DonationForm
     template_name = 'donations/create.html'
     
+    def get(self, request, *args, **kwargs):
+        remember_referrer(request)
+        return super().get(request, *args, **kwargs)
+    
+    def post(self, request, *args, **kwargs):
+        # Retries carrying the same Idempotency-Key replay the first response
+        handler = partial(super().post, request, *args, **kwargs)
+        return idempotent(request, request.user, 'donations.create', handler)
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         # Get the campaign for this donation
@@ -39,6 +52,7 @@ class DonationCreateView(LoginRequiredMixin, DonorRequiredMixin, CreateView):
         campaign = get_object_or_404(Campaign, pk=campaign_id, status='active')
         form.instance.campaign = campaign
         form.instance.donor = self.request.user
+        apply_attribution(self.request, form.instance)
         
         # Save the form
         self.object = form.save()
@@ -1,6 +1,6 @@
 from django.contrib import messages
 from django.contrib.auth import login
-from django.db.models import Count, Sum, Q, Max, Subquery, OuterRef
+from django.db.models import Sum, Q, Max, Subquery, OuterRef
 from django.http import HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse, reverse_lazy
@@ -8,26 +8,36 @@ from django.views.generic import ListView, TemplateView, View, UpdateView, Delet
 
 from accounts.decorators import role_required
 from accounts.models import CustomUser
+from core.counters import platform_counters
 from core.mixins import StaffRequiredMixin
+from core.pagination import KeysetPaginationMixin
+from search.index import search_ids
 
 from .forms import CampaignAdminReviewForm
 from .models import Campaign, Donation, Organisation
 
 
-class AdminActiveCampaignsListView(StaffRequiredMixin, ListView):
+class AdminActiveCampaignsListView(StaffRequiredMixin, KeysetPaginationMixin, ListView):
     model = Campaign
     template_name = 'admin_dashboard/active_campaigns.html'
     context_object_name = 'campaigns'
     paginate_by = 20
 
     def get_queryset(self):
-        queryset = super().get_queryset().filter(status='active').select_related('organisation', 'creator').order_by('-created_at')
+        queryset = super().get_queryset().filter(status='active').select_related('organisation', 'creator')
         query = self.request.GET.get('q')
         if query:
-            queryset = queryset.filter(
-                Q(title__icontains=query) |
-                Q(organisation__name__icontains=query)
-            )
+            campaign_ids = search_ids('campaign', query, candidates=queryset)
+            if campaign_ids is None:
+                queryset = queryset.filter(
+                    Q(title__icontains=query) |
+                    Q(organisation__name__icontains=query)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(pk__in=campaign_ids) |
+                    Q(organisation__in=search_ids('organisation', query))
+                )
         return queryset
 
     def get_context_data(self, **kwargs):
@@ -52,17 +62,17 @@ class AdminOrganisationsListView(StaffRequiredMixin, ListView):
             organisation=OuterRef('pk'), role='org_owner'
         ).values('id')[:1]
 
-        queryset = super().get_queryset().annotate(
-            campaign_count=Count('campaigns', distinct=True),
-            total_raised=Sum('campaigns__donations__amount', default=0),
+        queryset = super().get_queryset().with_stats().annotate(
             owner_username=Subquery(owner_username_subquery),
             owner_id=Subquery(owner_id_subquery)
         ).order_by('-created_at')
 
         query = self.request.GET.get('q')
         if query:
+            organisation_ids = search_ids('organisation', query)
+            name_match = Q(name__icontains=query) if organisation_ids is None else Q(pk__in=organisation_ids)
             queryset = queryset.filter(
-                Q(name__icontains=query) |
+                name_match |
                 Q(owner_username__icontains=query)
             )
         return queryset
@@ -108,10 +118,7 @@ class AdminDashboardView(StaffRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['page_title'] = 'Admin Dashboard'
-        context['pending_campaigns_count'] = Campaign.objects.filter(status='pending').count()
-        context['active_campaigns_count'] = Campaign.objects.filter(status='active').count()
-        context['total_organisations_count'] = Organisation.objects.count()
-        context['total_donors_count'] = CustomUser.objects.filter(role='donor').count()
+        context.update(platform_counters())
         return context
 
 
@@ -181,13 +188,7 @@ class AdminCampaignReviewView(StaffRequiredMixin, UpdateView):
 
 class AdminMetricsSummaryView(StaffRequiredMixin, View):
     def get(self, request, *args, **kwargs):
-        data = {
-            'pending_campaigns_count': Campaign.objects.filter(status='pending').count(),
-            'active_campaigns_count': Campaign.objects.filter(status='active').count(),
-            'total_organisations_count': Organisation.objects.count(),
-            'total_donors_count': CustomUser.objects.filter(role='donor').count(),
-        }
-        return JsonResponse(data)
+        return JsonResponse(platform_counters())
 
 
 @role_required('org_owner')
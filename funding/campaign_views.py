@@ -6,6 +6,7 @@ from django.http import HttpResponseRedirect, JsonResponse, HttpResponseForbidde
 from django.utils import timezone
 
 from core.mixins import OrganisationOwnerRequiredMixin
+from campaigns.counters import live_counters
 from .models import Campaign, Organisation, Donation
 from .forms import CampaignForm
 
@@ -47,12 +48,14 @@ class CampaignDetailView(DetailView):
         
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        campaign = self.get_object()
+        campaign = self.object
         
-        # Add donation stats
+        # Donation stats come from the campaign's denormalised counters
+        # (plus any unfolded counter shards, see campaigns.counters)
         donations = Donation.objects.filter(campaign=campaign)
-        total_raised = donations.aggregate(Sum('amount'))['total'] or 0
-        donor_count = donations.values('donor').distinct().count()
+        counters = live_counters(campaign)
+        total_raised = counters['total_raised']
+        donor_count = counters['donor_count']
         
         # Calculate progress percentage
         progress_percent = 0
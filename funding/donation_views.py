@@ -3,11 +3,12 @@ from django.views.generic import ListView, DetailView, CreateView, UpdateView, D
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy, reverse
 from django.http import HttpResponseRedirect, Http404
-from django.db.models import Sum
 
 from core.mixins import DonorRequiredMixin
+from campaigns.counters import live_counters
 from .models import Campaign, Organisation, Donation
 from .forms import DonationForm
+from donations.attribution import apply_attribution, remember_referrer
 
 from utils.message_utils import add_success, add_error
 from utils.constants import Messages
@@ -20,6 +21,10 @@ class CreateDonationView(LoginRequiredMixin, DonorRequiredMixin, CreateView):
     form_class = DonationForm
     template_name = 'donation/create.html'
     
+    def get(self, request, *args, **kwargs):
+        remember_referrer(request)
+        return super().get(request, *args, **kwargs)
+    
     def get_success_url(self):
         return reverse('donor:donation_detail', kwargs={
             'reference_number': self.object.reference_number
@@ -33,9 +38,8 @@ class CreateDonationView(LoginRequiredMixin, DonorRequiredMixin, CreateView):
         # Add campaign details to context
         context['campaign'] = campaign
         
-        # Calculate campaign progress
-        donations = Donation.objects.filter(campaign=campaign)
-        total_raised = donations.aggregate(total=Sum('amount'))['total'] or 0
+        # Calculate campaign progress, including unfolded counter shards
+        total_raised = live_counters(campaign)['total_raised']
         progress_percent = 0
         if campaign.funding_goal > 0:
             progress_percent = min(100, int((total_raised / campaign.funding_goal) * 100))
@@ -55,6 +59,7 @@ class CreateDonationView(LoginRequiredMixin, DonorRequiredMixin, CreateView):
         form.instance.campaign = campaign
         form.instance.donor = self.request.user
         form.instance.reference_number = str(uuid.uuid4())[:12].upper()
+        apply_attribution(self.request, form.instance)
         
         response = super().form_valid(form)
         
@@ -72,9 +77,8 @@ class DonationDetailView(DetailView):
         context = super().get_context_data(**kwargs)
         donation = self.get_object()
         
-        # Calculate campaign progress
-        donations = Donation.objects.filter(campaign=donation.campaign)
-        total_raised = donations.aggregate(total=Sum('amount'))['total'] or 0
+        # Calculate campaign progress, including unfolded counter shards
+        total_raised = live_counters(donation.campaign)['total_raised']
         progress_percent = 0
         if donation.campaign.funding_goal > 0:
             progress_percent = min(100, int((total_raised / donation.campaign.funding_goal) * 100))
@@ -90,7 +90,7 @@ class CampaignForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Set the queryset for tags
-        from .models import Tag
+        from tags.models import Tag
         self.fields['tags'].queryset = Tag.objects.all().order_by('name')
         
         # Make sure the fields are properly initialized with instance data
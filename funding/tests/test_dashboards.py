@@ -1,6 +1,13 @@
+import json
+from datetime import timedelta
+
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from accounts.models import CustomUser, Organisation
+from donations.tests import DonationFixturesMixin
 from funding.models import Campaign, Donation
 
 
@@ -110,3 +117,60 @@ class DashboardContentTest(TestCase):
         self.assertIn(self.campaign, response.context['campaigns'])
         self.assertEqual(response.context['kpis']['total_raised'], 50)
 
+
+
+class OrgDashboardQueryBudgetTest(DonationFixturesMixin, TestCase):
+    """The legacy org dashboard must cost a constant number of queries."""
+
+    def setUp(self):
+        self.create_fixtures()
+        self.owner = CustomUser.objects.create_user(
+            username='budgetowner', password='password123', role='org_owner', organisation=self.organisation
+        )
+        self.client.login(username='budgetowner', password='password123')
+        self.url = reverse('org:dashboard')
+        # The first request stamps the session (ServerRestartMiddleware)
+        self.client.get(self.url)
+
+    def count_dashboard_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_query_count_is_constant_in_donation_history(self):
+        now = timezone.now()
+        self.donate_at(now, 10)
+        baseline, _ = self.count_dashboard_queries()
+
+        for days_ago in range(1, 400, 3):
+            self.donate_at(now - timedelta(days=days_ago), 5)
+        with_history, response = self.count_dashboard_queries()
+
+        self.assertEqual(with_history, baseline)
+        self.assertLessEqual(with_history, 15)
+        self.assertEqual(response.context['kpis']['total_raised'], 10 + 5 * len(range(1, 400, 3)))
+        sources = json.loads(response.context['kpis']['donation_sources'])
+        self.assertEqual(sources, {'labels': ['Direct'], 'values': [10 + 5 * len(range(1, 400, 3))]})
+
+
+class OrgDonationExportTest(DonationFixturesMixin, TestCase):
+    def setUp(self):
+        self.create_fixtures()
+        self.owner = CustomUser.objects.create_user(
+            username='exportowner', password='password123', role='org_owner', organisation=self.organisation
+        )
+        self.client.login(username='exportowner', password='password123')
+
+    def test_export_streams_filtered_donations(self):
+        self.donate_at(timezone.now(), 30)
+        self.donate_at(timezone.now() - timedelta(days=1), 20)
+
+        response = self.client.get(reverse('org:export_donations'), {'donor': 'donor1'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(lines[0], 'Date,Campaign,Donor,Amount')
+        self.assertEqual(len(lines), 3)
+        self.assertIn('Analytics Campaign,donor1,30', lines[1])
@@ -1,17 +1,21 @@
 from django.shortcuts import redirect, get_object_or_404, render
 from django.urls import reverse_lazy, reverse
-from django.db.models import Sum, Value, F, Q
-from django.db.models.functions import Coalesce
-from django.http import HttpResponse
-import csv
-from datetime import datetime, timedelta
+from django.db.models import Count, Sum, F, Q
 from django.contrib import messages
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, View, TemplateView
 from django.db.models import Prefetch
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.utils import timezone
 
+from campaigns.counters import live_counters
 from core.mixins import DonorRequiredMixin, OrganisationOwnerRequiredMixin
 from accounts.models import CustomUser
+from donations.analytics import bucketed_totals, source_breakdown
+from donations.attribution import apply_attribution
+from search.index import search_ids
+from tags.matching import filter_by_all_tags
+from tags.models import Tag
+from donations.exports import QUERYSET_CHUNK_SIZE, streaming_csv_response, wants_gzip
 from .models import Campaign, Organisation, Donation
 from .forms import CampaignForm, DonationForm, OrganisationSettingsForm
 
@@ -24,20 +28,15 @@ class CampaignListView(ListView):
     def get_queryset(self):
         queryset = Campaign.objects.filter(status='active')
         
-        # Get tag filter parameters
-        tag_slugs = self.request.GET.getlist('tags')
-        if tag_slugs:
-            # Filter by selected tags - campaigns must have ALL selected tags
-            for tag_slug in tag_slugs:
-                queryset = queryset.filter(tags__slug=tag_slug)
+        # Campaigns must have ALL selected tags
+        queryset = filter_by_all_tags(queryset, self.request.GET.getlist('tags'))
         
-        return queryset.order_by('-created_at').distinct()
+        return queryset.order_by('-created_at')
         
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
         # Get all tags for the filter UI
-        from .models import Tag
         context['all_tags'] = Tag.objects.all().order_by('name')
         
         # Get selected tags for the template
@@ -93,8 +92,10 @@ class CampaignDetailView(DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        campaign = self.get_object()
-        total_donations = campaign.donations.aggregate(total=Sum('amount'))['total'] or 0
+        campaign = self.object
+        # Stored counters plus any unfolded shards (see campaigns.counters)
+        counters = live_counters(campaign)
+        total_donations = counters['total_raised']
 
         if campaign.goal > 0:
             width_percentage = min(int((total_donations / campaign.goal) * 100), 100)
@@ -107,7 +108,7 @@ class CampaignDetailView(DetailView):
         context['total_raised'] = total_donations  # For active campaign template
         
         # For active campaign template
-        context['num_donations'] = campaign.donations.count()
+        context['num_donations'] = counters['donation_count']
         context['recent_donations'] = campaign.donations.order_by('-created_at')[:5]
 
         user = self.request.user
@@ -138,6 +139,7 @@ class CreateDonationView(LoginRequiredMixin, DonorRequiredMixin, View):
             donation = form.save(commit=False)
             donation.campaign = campaign
             donation.user = request.user
+            apply_attribution(request, donation)
             donation.save()
             messages.success(request, f'Thank you for your generous donation of ${donation.amount}!')
         else:
@@ -273,17 +275,11 @@ class OrgCampaignsListView(OrganisationOwnerRequiredMixin, ListView):
         if status_filter and status_filter in ['draft', 'pending', 'active', 'rejected', 'closed']:
             queryset = queryset.filter(status=status_filter)
         
-        # Get tag filter parameters
-        tag_ids = self.request.GET.getlist('tags')
-        if tag_ids:
-            # Filter by selected tags
-            for tag_id in tag_ids:
-                queryset = queryset.filter(tags__id=tag_id)
+        # Filter by selected tags - campaigns must have ALL of them
+        queryset = filter_by_all_tags(queryset, self.request.GET.getlist('tags'), field='id')
             
-        # Annotate with total raised
-        return queryset.annotate(
-            total_raised=Coalesce(Sum('donations__amount'), Value(0))
-        ).order_by('-created_at').distinct()
+        # total_raised is a stored counter on Campaign, no annotation needed
+        return queryset.order_by('-created_at')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -293,12 +289,10 @@ class OrgCampaignsListView(OrganisationOwnerRequiredMixin, ListView):
         context['current_status'] = self.request.GET.get('status', 'all')
         
         # Get all tags for the filter UI
-        from .models import Tag
         context['all_tags'] = Tag.objects.all().order_by('name')
         
         # Get selected tags for the template (convert to strings for comparison)
         context['selected_tags'] = [str(tag_id) for tag_id in self.request.GET.getlist('tags')]
-        print(f"DEBUG: Selected tags: {context['selected_tags']}")
         
         return context
 
@@ -311,16 +305,21 @@ class OrgDashboardView(OrganisationOwnerRequiredMixin, TemplateView):
         org = self.request.user.organisation
         import json
         import random
-        from datetime import datetime, timedelta
 
-        # KPI Calculations
-        total_raised = Donation.objects.filter(campaign__organisation=org).aggregate(Sum('amount'))['amount__sum'] or 0
-        active_campaigns = Campaign.objects.filter(organisation=org, status='active').count()
+        # KPI Calculations - campaign KPIs come from one conditional aggregate
+        # over the organisation's campaigns and their stored funding counters
+        campaign_stats = Campaign.objects.filter(organisation=org).aggregate(
+            total_raised=Sum('total_raised'),
+            active_campaigns=Count('pk', filter=Q(status='active')),
+            campaigns_pending=Count('pk', filter=Q(status='pending')),
+        )
+        total_raised = campaign_stats['total_raised'] or 0
+        active_campaigns = campaign_stats['active_campaigns']
+        campaigns_pending = campaign_stats['campaigns_pending']
         total_donors = Donation.objects.filter(campaign__organisation=org).values('donor').distinct().count()
-        campaigns_pending = Campaign.objects.filter(organisation=org, status='pending').count()
         
-        # Get the number of new donors this month
-        first_day_of_month = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        # Get the number of new donors this month (in the active time zone)
+        first_day_of_month = timezone.localtime().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         new_donors_this_month = Donation.objects.filter(
             campaign__organisation=org,
             created_at__gte=first_day_of_month
@@ -336,79 +335,20 @@ class OrgDashboardView(OrganisationOwnerRequiredMixin, TemplateView):
                 data.append(int(val))
             return json.dumps(data)
 
-        # Get period-based donation data for the chart
-        now = datetime.now()
-        current_year = now.year
-        current_month = now.month
-        current_day = now.day
-        
-        # Weekly data - last 7 days
-        days_of_week = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-        weekly_labels = []
-        weekly_values = []
-        
-        for i in range(7):
-            day = now - timedelta(days=i)
-            day_name = day.strftime('%a')
-            weekly_labels.insert(0, day_name)
-            
-            # Get donations for this day
-            day_start = day.replace(hour=0, minute=0, second=0, microsecond=0)
-            day_end = day.replace(hour=23, minute=59, second=59, microsecond=999999)
-            
-            day_donations = Donation.objects.filter(
-                campaign__organisation=org,
-                created_at__gte=day_start,
-                created_at__lte=day_end
-            ).aggregate(Sum('amount'))['amount__sum'] or 0
-            weekly_values.insert(0, day_donations)
+        # Period-based donation data for the chart: one grouped query per series
+        daily = bucketed_totals(org, 'day', 7)
+        weekly_labels = [bucket.start.strftime('%a') for bucket in daily]
+        weekly_values = [bucket.total for bucket in daily]
         
         # Monthly data - last 4 weeks
-        weekly_labels_month = []
-        weekly_values_month = []
-        
-        for i in range(4):
-            week_end = now - timedelta(days=i*7)
-            week_start = week_end - timedelta(days=6)
-            week_label = f"Week {4-i}"
-            weekly_labels_month.insert(0, week_label)
-            
-            week_donations = Donation.objects.filter(
-                campaign__organisation=org,
-                created_at__gte=week_start,
-                created_at__lte=week_end
-            ).aggregate(Sum('amount'))['amount__sum'] or 0
-            weekly_values_month.insert(0, week_donations)
+        weeks = bucketed_totals(org, 'week', 4)
+        weekly_labels_month = [f"Week {i}" for i in range(1, len(weeks) + 1)]
+        weekly_values_month = [bucket.total for bucket in weeks]
             
         # Yearly data - last 12 months
-        months = []
-        monthly_values = []
-        
-        # Try to get actual monthly donation data
-        for i in range(12):
-            month = current_month - i
-            year = current_year
-            if month <= 0:
-                month += 12
-                year -= 1
-        
-            start_date = datetime(year, month, 1)
-            if month == 12:
-                end_date = datetime(year + 1, 1, 1) - timedelta(days=1)
-            else:
-                end_date = datetime(year, month + 1, 1) - timedelta(days=1)
-        
-            month_name = start_date.strftime('%b')
-            months.insert(0, month_name)
-        
-            # Get actual donations for this month
-            month_donations = Donation.objects.filter(
-                campaign__organisation=org,
-                created_at__gte=start_date,
-                created_at__lte=end_date
-            ).aggregate(Sum('amount'))['amount__sum'] or 0
-        
-            monthly_values.insert(0, month_donations)
+        monthly = bucketed_totals(org, 'month', 12)
+        months = [bucket.start.strftime('%b') for bucket in monthly]
+        monthly_values = [bucket.total for bucket in monthly]
     
         # Check if we have real data or need sample data
         if sum(monthly_values) == 0:
@@ -428,35 +368,12 @@ class OrgDashboardView(OrganisationOwnerRequiredMixin, TemplateView):
         prev_month_donations = monthly_values[-2] if len(monthly_values) > 1 and monthly_values[-2] > 0 else 1
         raised_percentage = int((current_month_donations / prev_month_donations - 1) * 100) if prev_month_donations else 0
     
-        # Get donation sources data (try real data first, then fallback to samples)
-        source_categories = {}
-        source_donations = Donation.objects.filter(campaign__organisation=org)
-        
-        # Try to analyze real donation sources if we have data
-        if source_donations.exists():
-            # Sample logic for categorizing sources - adapt to your actual data model
-            for donation in source_donations:
-                source = 'Direct'  # Default category
-                
-                # Example logic - replace with your actual referral source logic
-                if hasattr(donation, 'source') and donation.source:
-                    source = donation.source
-                elif hasattr(donation, 'referrer') and donation.referrer:
-                    if 'facebook' in donation.referrer.lower() or 'twitter' in donation.referrer.lower() or 'instagram' in donation.referrer.lower():
-                        source = 'Social Media'
-                    elif 'email' in donation.referrer.lower() or 'newsletter' in donation.referrer.lower():
-                        source = 'Email'
-                    elif donation.referrer != '':
-                        source = 'Referral'
-                
-                if source not in source_categories:
-                    source_categories[source] = 0
-                source_categories[source] += donation.amount
-            
-            # Convert to format needed for the chart
+        # Donation sources, categorised and summed in the database
+        source_totals = source_breakdown(org)
+        if source_totals:
             sources = {
-                'labels': list(source_categories.keys()),
-                'values': list(source_categories.values())
+                'labels': [label for label, _ in source_totals],
+                'values': [total for _, total in source_totals]
             }
         else:
             # Sample data if no real data
@@ -500,8 +417,6 @@ class OrgDashboardView(OrganisationOwnerRequiredMixin, TemplateView):
     
         context['campaigns'] = Campaign.objects.filter(
             organisation=self.request.user.organisation
-        ).annotate(
-            total_raised=Coalesce(Sum('donations__amount'), Value(0))
         ).order_by('-created_at')
     
         return context
@@ -723,9 +638,14 @@ class DonationsListView(OrganisationOwnerRequiredMixin, ListView):
         # Handle search filter if provided
         search_query = self.request.GET.get('q')
         if search_query:
+            campaign_ids = search_ids('campaign', search_query, candidates=Campaign.objects.filter(organisation=org))
+            campaign_match = (
+                Q(campaign__title__icontains=search_query) if campaign_ids is None
+                else Q(campaign__in=campaign_ids)
+            )
             queryset = queryset.filter(
-                Q(campaign__title__icontains=search_query) | 
-                Q(user__username__icontains=search_query)
+                campaign_match | 
+                Q(donor__username__icontains=search_query)
             )
             
         # Handle campaign filter if provided
@@ -733,7 +653,7 @@ class DonationsListView(OrganisationOwnerRequiredMixin, ListView):
         if campaign_filter:
             queryset = queryset.filter(campaign__pk=campaign_filter)
         
-        return queryset.select_related('campaign', 'user').order_by('-created_at')
+        return queryset.select_related('campaign', 'donor').order_by('-created_at')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -771,8 +691,10 @@ class OrgCampaignDetailView(OrganisationOwnerRequiredMixin, DetailView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        campaign = self.get_object()
-        total_donations = campaign.donations.aggregate(total=Sum('amount'))['total'] or 0
+        campaign = self.object
+        # Stored counters plus any unfolded shards (see campaigns.counters)
+        counters = live_counters(campaign)
+        total_donations = counters['total_raised']
 
         if campaign.goal > 0:
             width_percentage = min(int((total_donations / campaign.goal) * 100), 100)
@@ -786,7 +708,7 @@ class OrgCampaignDetailView(OrganisationOwnerRequiredMixin, DetailView):
         
         # Only show donation details for active campaigns
         if campaign.status == 'active':
-            context['num_donations'] = campaign.donations.count()
+            context['num_donations'] = counters['donation_count']
             context['recent_donations'] = campaign.donations.order_by('-created_at')[:5]
         else:
             context['num_donations'] = 0
@@ -846,30 +768,29 @@ class ExportDonationsCSVView(OrganisationOwnerRequiredMixin, View):
         if search_query:
             queryset = queryset.filter(
                 Q(campaign__title__icontains=search_query) | 
-                Q(user__username__icontains=search_query)
+                Q(donor__username__icontains=search_query)
             )
             
         campaign_filter = request.GET.get('campaign')
         if campaign_filter:
             queryset = queryset.filter(campaign__pk=campaign_filter)
         
-        # Prepare CSV response
-        response = HttpResponse(content_type='text/csv')
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        response['Content-Disposition'] = f'attachment; filename="donations_{timestamp}.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow(['Date', 'Campaign', 'Donor', 'Amount'])
-        
-        for donation in queryset.select_related('campaign', 'user'):
-            writer.writerow([
-                donation.created_at.strftime('%Y-%m-%d %H:%M'),
-                donation.campaign.title,
-                donation.user.username,
-                donation.amount
-            ])
-            
-        return response
+        # Stream plain tuples straight from the cursor instead of caching
+        # model instances, so memory stays flat for any number of rows
+        rows = (
+            (timezone.localtime(created_at).strftime('%Y-%m-%d %H:%M'), campaign_title, donor_username, amount)
+            for created_at, campaign_title, donor_username, amount in queryset.order_by('-created_at').values_list(
+                'created_at', 'campaign__title', 'donor__username', 'amount'
+            ).iterator(chunk_size=QUERYSET_CHUNK_SIZE)
+        )
+        
+        timestamp = timezone.localtime().strftime('%Y%m%d_%H%M%S')
+        return streaming_csv_response(
+            f'donations_{timestamp}.csv',
+            ['Date', 'Campaign', 'Donor', 'Amount'],
+            rows,
+            compress=wants_gzip(request),
+        )
 
 
 class OrganisationSettingsView(OrganisationOwnerRequiredMixin, View):
@@ -920,14 +841,15 @@ class DonorCampaignsView(LoginRequiredMixin, DonorRequiredMixin, ListView):
     paginate_by = 12
     
     def get_queryset(self):
-        return Campaign.objects.filter(status='active').order_by('-created_at')
+        queryset = Campaign.objects.filter(status='active')
+        queryset = filter_by_all_tags(queryset, self.request.GET.getlist('tags'))
+        return queryset.order_by('-created_at')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['page_title'] = 'Browse Campaigns'
         
         # Get all tags for the filter UI
-        from .models import Tag
         context['all_tags'] = Tag.objects.all().order_by('name')
         
         # Get selected tags for the template
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:32
+
+import core.fields
+import core.validators
+import organizations.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0002_organisation_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='organisation',
+            name='banner',
+            field=core.fields.LimitedImageField(blank=True, help_text='Organization banner (max 1920x480px, 3MB, formats: JPEG, PNG)', null=True, upload_to=organizations.models.org_banner_path, validators=[core.validators.ImageUploadValidator(3, 1920, 480, ['JPEG', 'PNG'])]),
+        ),
+        migrations.AlterField(
+            model_name='organisation',
+            name='logo',
+            field=core.fields.LimitedImageField(blank=True, help_text='Organization logo (max 800x800px, 2MB, formats: JPEG, PNG, SVG)', null=True, upload_to=organizations.models.org_logo_path, validators=[core.validators.ImageUploadValidator(2, 800, 800, ['JPEG', 'PNG', 'SVG'])]),
+        ),
+    ]
@@ -1,6 +1,9 @@
 from django.db import models
+from django.db.models import Count, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.conf import settings
-from core.validators import FileSizeValidator, ImageDimensionsValidator, ImageFormatValidator
+from core.fields import LimitedImageField
+from core.validators import ImageUploadValidator
 
 
 def org_logo_path(instance, filename):
@@ -21,6 +24,46 @@ def org_banner_path(instance, filename):
     return f'org_banners/org_{instance.id}/{filename}'
 
 
+class OrganisationQuerySet(models.QuerySet):
+    """QuerySet with list-page statistics for organizations"""
+
+    def with_stats(self):
+        """
+        Annotate campaign_count, active_campaign_count, owner_count and
+        total_raised in the same query, so list pages do not run one query
+        per organization. Owners are counted in a subquery to avoid
+        multiplying the campaign join.
+        """
+        from django.contrib.auth import get_user_model
+
+        owner_counts = get_user_model().objects.filter(
+            organisation=OuterRef('pk'), role='org_owner'
+        ).order_by().values('organisation').annotate(count=Count('pk')).values('count')
+
+        return self.annotate(
+            campaign_count=Count('campaigns'),
+            active_campaign_count=Count('campaigns', filter=Q(campaigns__status='active')),
+            total_raised=Coalesce(Sum('campaigns__total_raised'), 0),
+            owner_count=Coalesce(Subquery(owner_counts), 0),
+        )
+
+    def cache_validators(self, campaigns=True):
+        """
+        Summarise what organization pages and payloads depend on, in one
+        query: the organizations' own changes and, with campaigns=True,
+        their campaigns' changes and donation counters.
+        """
+        validators = {'count': Count('pk', distinct=True), 'modified': Max('updated_at')}
+        if campaigns:
+            validators.update(
+                campaigns_modified=Max('campaigns__updated_at'),
+                campaign_count=Count('campaigns'),
+                donations=Sum('campaigns__donation_count'),
+                raised=Sum('campaigns__total_raised'),
+            )
+        return self.order_by().aggregate(**validators)
+
+
 class Organisation(models.Model):
     """
     Organisation model represents charitable or non-profit organizations
@@ -36,25 +79,22 @@ class Organisation(models.Model):
     contact_phone = models.CharField(max_length=20, blank=True, null=True)
     
     # Branding assets
-    logo = models.ImageField(
+    logo = LimitedImageField(
         upload_to=org_logo_path, 
         blank=True, 
         null=True, 
         validators=[
-            FileSizeValidator(2),  # 2 MB limit
-            ImageDimensionsValidator(800, 800),  # 800x800px max
-            ImageFormatValidator(['JPEG', 'PNG', 'SVG']),  # Allow common logo formats
+            # 2 MB, 800x800px max, common logo formats
+            ImageUploadValidator(2, 800, 800, ['JPEG', 'PNG', 'SVG']),
         ],
         help_text="Organization logo (max 800x800px, 2MB, formats: JPEG, PNG, SVG)"
     )
-    banner = models.ImageField(
+    banner = LimitedImageField(
         upload_to=org_banner_path, 
         blank=True, 
         null=True,
         validators=[
-            FileSizeValidator(3),  # 3 MB limit
-            ImageDimensionsValidator(1920, 480),  # 1920x480px max
-            ImageFormatValidator(['JPEG', 'PNG']),  # Banner formats
+            ImageUploadValidator(3, 1920, 480, ['JPEG', 'PNG']),  # 3 MB, 1920x480px max
         ],
         help_text="Organization banner (max 1920x480px, 3MB, formats: JPEG, PNG)"
     )
@@ -62,10 +102,13 @@ class Organisation(models.Model):
     # Status and metadata
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     # The related CustomUser objects are linked via related_name='organisation'
     # on the CustomUser model's organisation field
     
+    objects = OrganisationQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Organisation"
         verbose_name_plural = "Organisations"
@@ -74,17 +117,54 @@ class Organisation(models.Model):
     def __str__(self):
         return self.name
         
+    # The statistics below use values annotated by
+    # OrganisationQuerySet.with_stats() when present and query otherwise.
+    # The setters let those annotations be assigned onto the instance.
+    
+    @property
+    def _annotated_stats(self):
+        return self.__dict__.setdefault('_stats', {})
+    
+    def _stat(self, name, compute):
+        if name not in self._annotated_stats:
+            return compute()
+        return self._annotated_stats[name]
+    
     @property
     def owner_count(self):
         """Returns the number of users associated with this organization"""
-        return self.users.filter(role='org_owner').count()
+        return self._stat('owner_count', lambda: self.users.filter(role='org_owner').count())
+    
+    @owner_count.setter
+    def owner_count(self, value):
+        self._annotated_stats['owner_count'] = value
         
     @property
     def campaign_count(self):
         """Returns the number of campaigns created by this organization"""
-        return self.campaigns.count()
+        return self._stat('campaign_count', lambda: self.campaigns.count())
+    
+    @campaign_count.setter
+    def campaign_count(self, value):
+        self._annotated_stats['campaign_count'] = value
         
     @property
     def active_campaign_count(self):
         """Returns the number of active campaigns by this organization"""
-        return self.campaigns.filter(status='active').count()
+        return self._stat('active_campaign_count', lambda: self.campaigns.filter(status='active').count())
+    
+    @active_campaign_count.setter
+    def active_campaign_count(self, value):
+        self._annotated_stats['active_campaign_count'] = value
+    
+    @property
+    def total_raised(self):
+        """Returns the total raised across this organization's campaigns"""
+        return self._stat(
+            'total_raised',
+            lambda: self.campaigns.aggregate(total=Coalesce(Sum('total_raised'), 0))['total']
+        )
+    
+    @total_raised.setter
+    def total_raised(self, value):
+        self._annotated_stats['total_raised'] = value
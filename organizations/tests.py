@@ -0,0 +1,243 @@
+import gzip
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from donations.export_jobs import run_export
+from donations.models import DonationExport
+from donations.tests import DonationFixturesMixin
+from organizations.models import Organisation
+
+CustomUser = get_user_model()
+
+
+class OrgDashboardQueryBudgetTests(DonationFixturesMixin, TestCase):
+    """The org dashboard must cost the same number of queries at any history size."""
+
+    url = reverse('organizations:dashboard')
+
+    def setUp(self):
+        self.create_fixtures()
+        self.owner = CustomUser.objects.create_user(
+            username='owner', password='password123', role='org_owner', organisation=self.organisation
+        )
+        self.client.login(username='owner', password='password123')
+        # The first request stamps the session (ServerRestartMiddleware)
+        self.client.get(self.url)
+
+    def count_dashboard_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_query_count_is_constant_in_donation_history(self):
+        now = timezone.now()
+        self.donate_at(now, 10)
+        baseline, _ = self.count_dashboard_queries()
+
+        for days_ago in range(1, 400, 3):
+            self.donate_at(now - timedelta(days=days_ago), 5)
+        with_history, response = self.count_dashboard_queries()
+
+        self.assertEqual(with_history, baseline)
+        self.assertLessEqual(with_history, 15)
+
+    def test_trend_series_cover_every_bucket(self):
+        self.donate_at(timezone.now(), 25)
+
+        _, response = self.count_dashboard_queries()
+        trends = response.context['donation_trends']
+
+        self.assertEqual(len(trends['weekly']['values']), 7)
+        self.assertEqual(len(trends['monthly']['values']), 4)
+        self.assertEqual(len(trends['yearly']['values']), 12)
+        self.assertEqual(trends['weekly']['values'][-1], 25)
+        self.assertEqual(response.context['total_raised'], 25)
+
+
+class ExportDonationsCSVTests(DonationFixturesMixin, TestCase):
+    url = reverse('organizations:export_donations')
+
+    def setUp(self):
+        self.create_fixtures()
+        self.owner = CustomUser.objects.create_user(
+            username='owner', password='password123', role='org_owner', organisation=self.organisation
+        )
+        self.client.login(username='owner', password='password123')
+
+    def test_export_streams_every_donation(self):
+        for days_ago in range(5):
+            self.donate_at(timezone.now() - timedelta(days=days_ago), 10 + days_ago)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(lines[0], 'Reference,Date,Campaign,Donor Name,Donor Email,Amount,Comment')
+        self.assertEqual(len(lines), 6)
+        self.assertTrue(lines[1].startswith('REF-1,'))
+
+    def test_export_can_be_gzipped(self):
+        self.donate_at(timezone.now(), 42)
+
+        response = self.client.get(self.url, {'compress': 'gzip'})
+
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        content = gzip.decompress(b''.join(response.streaming_content)).decode('utf-8')
+        self.assertIn('Analytics Campaign', content)
+        self.assertIn('42', content)
+
+
+class DonationExportViewTests(DonationFixturesMixin, TestCase):
+    def setUp(self):
+        self.create_fixtures()
+        self.owner = CustomUser.objects.create_user(
+            username='owner', password='password123', role='org_owner', organisation=self.organisation
+        )
+        self.client.login(username='owner', password='password123')
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, DONATION_EXPORT_BACKEND='worker')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def finished_export(self):
+        for days_ago in range(20):
+            self.donate_at(timezone.now() - timedelta(days=days_ago), 10)
+        self.client.post(reverse('organizations:export_create'))
+        return run_export(DonationExport.objects.get().pk)
+
+    def test_request_is_queued_once(self):
+        response = self.client.post(reverse('organizations:export_create'))
+        self.client.post(reverse('organizations:export_create'))
+
+        self.assertRedirects(response, reverse('organizations:exports'))
+        job = DonationExport.objects.get()
+        self.assertEqual(job.status, DonationExport.STATUS_PENDING)
+        self.assertEqual(job.requested_by, self.owner)
+        self.assertContains(self.client.get(reverse('organizations:exports')), 'Pending')
+
+    @override_settings(DONATION_EXPORT_TTL=60 * 60 * 2)
+    def test_retention_comes_from_the_setting(self):
+        response = self.client.get(reverse('organizations:exports'))
+
+        self.assertContains(response, 'kept for 2\xa0hours.')
+
+    def test_status_reports_progress(self):
+        job = self.finished_export()
+
+        data = self.client.get(reverse('organizations:export_status', args=[job.pk])).json()
+
+        self.assertEqual(data['status'], 'complete')
+        self.assertEqual(data['progress'], 100)
+        self.assertEqual(data['rows_written'], 20)
+        self.assertEqual(data['download_url'], reverse('organizations:export_download', args=[job.pk]))
+
+    def test_download_supports_ranges(self):
+        job = self.finished_export()
+        url = reverse('organizations:export_download', args=[job.pk])
+
+        full = self.client.get(url)
+        body = b''.join(full.streaming_content)
+        self.assertEqual(full.status_code, 200)
+        self.assertEqual(full['Accept-Ranges'], 'bytes')
+
+        partial = self.client.get(url, HTTP_RANGE='bytes=10-')
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial['Content-Range'], f'bytes 10-{len(body) - 1}/{len(body)}')
+        self.assertEqual(b''.join(partial.streaming_content), body[10:])
+
+        stale = self.client.get(url, HTTP_RANGE='bytes=10-', HTTP_IF_RANGE='"outdated"')
+        self.assertEqual(stale.status_code, 200)
+        b''.join(stale.streaming_content)
+
+        unsatisfiable = self.client.get(url, HTTP_RANGE=f'bytes={len(body)}-')
+        self.assertEqual(unsatisfiable.status_code, 416)
+
+    def test_other_organisations_cannot_see_export(self):
+        job = self.finished_export()
+        other = Organisation.objects.create(name='Other Org')
+        CustomUser.objects.create_user(username='other', password='password123', role='org_owner', organisation=other)
+        self.client.login(username='other', password='password123')
+
+        response = self.client.get(reverse('organizations:export_download', args=[job.pk]))
+
+        self.assertEqual(response.status_code, 404)
+
+
+class OrganisationStatsTests(DonationFixturesMixin, TestCase):
+    """with_stats() annotates list-page statistics without per-row queries."""
+
+    def setUp(self):
+        self.create_fixtures()
+        CustomUser.objects.create_user(
+            username='owner', password='password123', role='org_owner', organisation=self.organisation
+        )
+        self.campaign.__class__.objects.create(
+            title='Pending Campaign', slug='pending-campaign', description='Pending',
+            funding_goal=100, category='education', organisation=self.organisation, status='pending',
+        )
+        self.donate_at(timezone.now(), 40)
+        self.donate_at(timezone.now(), 60)
+
+    def add_organisations(self, count):
+        for index in range(count):
+            organisation = Organisation.objects.create(name=f'Extra Org {index}')
+            CustomUser.objects.create_user(
+                username=f'extra_owner_{index}', password='password123', role='org_owner', organisation=organisation
+            )
+
+    def test_annotated_values_are_used_without_queries(self):
+        organisation = Organisation.objects.with_stats().get(pk=self.organisation.pk)
+
+        with self.assertNumQueries(0):
+            stats = (
+                organisation.campaign_count, organisation.active_campaign_count,
+                organisation.owner_count, organisation.total_raised,
+            )
+
+        self.assertEqual(stats, (2, 1, 1, 100))
+
+    def test_properties_fall_back_to_queries(self):
+        organisation = Organisation.objects.get(pk=self.organisation.pk)
+
+        self.assertEqual(organisation.campaign_count, 2)
+        self.assertEqual(organisation.active_campaign_count, 1)
+        self.assertEqual(organisation.owner_count, 1)
+        self.assertEqual(organisation.total_raised, 100)
+
+    def assert_constant_queries(self, url):
+        with CaptureQueriesContext(connection) as before:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.add_organisations(5)
+        with CaptureQueriesContext(connection) as after:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(len(after), len(before))
+
+    def test_public_list_query_count_is_constant(self):
+        self.client.login(username='donor1', password='password123')
+        url = reverse('organizations:list')
+        self.client.get(url)
+        self.assert_constant_queries(url)
+
+    def test_donor_list_query_count_is_constant(self):
+        self.client.login(username='donor1', password='password123')
+        url = reverse('donor:organizations')
+        self.client.get(url)
+        self.assert_constant_queries(url)
+
+    def test_admin_list_query_count_is_constant(self):
+        CustomUser.objects.create_superuser(username='admin', password='password123', email='admin@example.com')
+        self.client.login(username='admin', password='password123')
+        url = reverse('core_admin:admin_organisations')
+        self.client.get(url)
+        self.assert_constant_queries(url)
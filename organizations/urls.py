@@ -14,4 +14,8 @@ urlpatterns = [
     
     # Utility routes
     path('export-donations/', views.ExportDonationsCSVView.as_view(), name='export_donations'),
+    path('exports/', views.DonationExportListView.as_view(), name='exports'),
+    path('exports/new/', views.DonationExportCreateView.as_view(), name='export_create'),
+    path('exports/<int:pk>/status/', views.DonationExportStatusView.as_view(), name='export_status'),
+    path('exports/<int:pk>/download/', views.DonationExportDownloadView.as_view(), name='export_download'),
 ]
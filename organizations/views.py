@@ -1,21 +1,31 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import Http404, JsonResponse
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, TemplateView, View
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.urls import reverse_lazy, reverse
-from django.http import HttpResponse
-from django.db.models import Sum, Count
-import csv
+from django.db.models import Sum, Count, Q
+from django.conf import settings
+from django.utils import timezone
+from django.utils.timesince import timeuntil
+import json
+from datetime import timedelta
 
+from core.conditional import ConditionalGetMixin
 from core.mixins import OrganisationOwnerRequiredMixin
 from .models import Organisation
 from .forms import OrganisationSettingsForm
 from campaigns.models import Campaign
-from donations.models import Donation
-from utils.message_utils import add_success, add_error
+from donations.models import Donation, DonationExport
+from donations.analytics import bucketed_totals
+from donations.exports import (
+    ORGANISATION_EXPORT_HEADER, organisation_export_rows, ranged_file_response, streaming_csv_response, wants_gzip,
+)
+from donations.export_jobs import request_export
+from utils.message_utils import add_success, add_error, add_info
 from utils.constants import Messages
 
 
-class OrganisationDetailView(DetailView):
+class OrganisationDetailView(ConditionalGetMixin, DetailView):
     """
     Public view for organization profiles
     
@@ -29,10 +39,13 @@ class OrganisationDetailView(DetailView):
     def get_queryset(self):
         # Only show active organizations
         return Organisation.objects.filter(is_active=True)
+
+    def get_validators(self):
+        return self.get_queryset().filter(pk=self.kwargs['pk']).cache_validators()
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        organisation = self.get_object()
+        organisation = self.object
         
         # Get active campaigns for this org
         active_campaigns = Campaign.objects.filter(
@@ -93,28 +106,48 @@ class OrgDashboardView(OrganisationOwnerRequiredMixin, TemplateView):
             campaign__organisation=organisation
         ).order_by('-created_at')[:5]
         
-        # Get donation stats
-        total_raised = Donation.objects.filter(
-            campaign__organisation=organisation
-        ).aggregate(total=Sum('amount'))['total'] or 0
+        # Campaign stats and funding totals in one conditional aggregate over
+        # the organisation's campaigns and their stored funding counters
+        campaign_stats = Campaign.objects.filter(organisation=organisation).aggregate(
+            total_raised=Sum('total_raised'),
+            campaign_count=Count('pk'),
+            active_count=Count('pk', filter=Q(status='active')),
+            pending_count=Count('pk', filter=Q(status='pending')),
+        )
         
-        # Get campaign stats
-        campaign_count = Campaign.objects.filter(organisation=organisation).count()
-        active_count = active_campaigns.count()
-        pending_count = pending_campaigns.count()
+        # Donation trends for the chart, one grouped query per series
+        daily = bucketed_totals(organisation, 'day', 7)
+        weekly = bucketed_totals(organisation, 'week', 4)
+        monthly = bucketed_totals(organisation, 'month', 12)
+        donation_trends = {
+            'weekly': {
+                'labels': [bucket.start.strftime('%a') for bucket in daily],
+                'values': [bucket.total for bucket in daily],
+            },
+            'monthly': {
+                'labels': [f"Week {i}" for i in range(1, len(weekly) + 1)],
+                'values': [bucket.total for bucket in weekly],
+            },
+            'yearly': {
+                'labels': [bucket.start.strftime('%b') for bucket in monthly],
+                'values': [bucket.total for bucket in monthly],
+            },
+        }
         
         context.update({
             'organisation': organisation,
             'active_campaigns': active_campaigns[:3],
             'pending_campaigns': pending_campaigns[:3],
             'recent_donations': recent_donations,
-            'total_raised': total_raised,
-            'campaign_count': campaign_count,
-            'active_count': active_count,
-            'pending_count': pending_count,
+            'total_raised': campaign_stats['total_raised'] or 0,
+            'campaign_count': campaign_stats['campaign_count'],
+            'active_count': campaign_stats['active_count'],
+            'pending_count': campaign_stats['pending_count'],
             'donor_count': Donation.objects.filter(
                 campaign__organisation=organisation
             ).values('donor').distinct().count(),
+            'donation_trends': donation_trends,
+            'donations_chart_data': json.dumps(donation_trends),
         })
         
         return context
@@ -174,26 +207,20 @@ class OrganizationListView(ListView):
     paginate_by = 12
     
     def get_queryset(self):
-        # Only show active organizations
-        return Organisation.objects.filter(is_active=True).order_by('name')
+        # Only show active organizations, with their campaign counts annotated
+        return Organisation.objects.filter(is_active=True).with_stats().order_by('name')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Add campaign counts for each organization
-        orgs_with_counts = []
-        for org in context['organizations']:
-            active_campaigns = Campaign.objects.filter(
-                organisation=org,
-                status='active'
-            ).count()
-            
-            orgs_with_counts.append({
+        # Active campaign counts come from with_stats(), so no per-org queries
+        context['organizations_with_counts'] = [
+            {
                 'organization': org,
-                'campaign_count': active_campaigns
-            })
-            
-        context['organizations_with_counts'] = orgs_with_counts
+                'campaign_count': org.active_campaign_count
+            }
+            for org in context['organizations']
+        ]
         
         return context
 
@@ -203,34 +230,84 @@ class ExportDonationsCSVView(OrganisationOwnerRequiredMixin, View):
     Export donations data as CSV
     
     Allows organization owners to download all donation records
-    for their campaigns in CSV format for external analysis.
+    for their campaigns in CSV format for external analysis. The file is
+    streamed from a database iterator so memory use does not grow with the
+    number of donations; pass ?compress=gzip for a gzip-compressed download.
     """
     def get(self, request, *args, **kwargs):
-        # Get all donations for this organization
         user_org = request.user.organisation
-        donations = Donation.objects.filter(
-            campaign__organisation=user_org
-        ).select_related('campaign', 'donor').order_by('-created_at')
-        
-        # Create the HttpResponse object with CSV header
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="{user_org.name}_donations.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow([
-            'Reference', 'Date', 'Campaign', 'Donor Name', 'Donor Email', 'Amount', 'Comment'
-        ])
-        
-        # Add donation data
-        for donation in donations:
-            writer.writerow([
-                donation.reference_number,
-                donation.created_at.strftime('%Y-%m-%d %H:%M'),
-                donation.campaign.title,
-                f"{donation.donor.first_name} {donation.donor.last_name}",
-                donation.donor.email,
-                donation.amount,
-                donation.comment if donation.comment else ''
-            ])
-        
-        return response
+        return streaming_csv_response(
+            f'{user_org.name}_donations.csv',
+            ORGANISATION_EXPORT_HEADER,
+            organisation_export_rows(user_org),
+            compress=wants_gzip(request),
+        )
+
+
+class DonationExportListView(OrganisationOwnerRequiredMixin, ListView):
+    """
+    Background donation exports for the organization
+
+    Lists recent export jobs with their progress and lets the owner queue
+    a new one, which is produced off the request path.
+    """
+    template_name = 'organizations/exports.html'
+    context_object_name = 'exports'
+
+    def get_queryset(self):
+        return DonationExport.objects.filter(
+            organisation=self.request.user.organisation
+        ).order_by('-created_at')[:20]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # How long finished exports stay downloadable, e.g. "1 day"
+        now = timezone.now()
+        context['export_retention'] = timeuntil(now + timedelta(seconds=settings.DONATION_EXPORT_TTL), now)
+        return context
+
+
+class DonationExportCreateView(OrganisationOwnerRequiredMixin, View):
+    """Queue a background export, reusing an identical one already in flight"""
+    def post(self, request, *args, **kwargs):
+        job, created = request_export(
+            request.user.organisation,
+            request.user,
+            compress=request.POST.get('compress') == 'gzip',
+        )
+        if created:
+            add_success(request, 'EXPORT_REQUESTED')
+        else:
+            add_info(request, 'EXPORT_IN_PROGRESS')
+        return redirect('organizations:exports')
+
+
+class DonationExportStatusView(OrganisationOwnerRequiredMixin, View):
+    """JSON progress report for polling an export job"""
+    def get(self, request, pk, *args, **kwargs):
+        job = get_object_or_404(DonationExport, pk=pk, organisation=request.user.organisation)
+        return JsonResponse({
+            'id': job.pk,
+            'status': job.status,
+            'progress': job.progress,
+            'rows_written': job.rows_written,
+            'total_rows': job.total_rows,
+            'expires_at': job.expires_at.isoformat() if job.expires_at else None,
+            'download_url': reverse('organizations:export_download', args=[job.pk]) if job.is_downloadable else None,
+        })
+
+
+class DonationExportDownloadView(OrganisationOwnerRequiredMixin, View):
+    """
+    Download a finished export
+
+    Supports HTTP Range requests so large downloads can be resumed.
+    """
+    def get(self, request, pk, *args, **kwargs):
+        job = get_object_or_404(DonationExport, pk=pk, organisation=request.user.organisation)
+        if not job.is_downloadable:
+            raise Http404("This export is not available for download.")
+
+        content_type = 'application/gzip' if job.compress else 'text/csv'
+        etag = f'"donation-export-{job.pk}-{job.finished_at.timestamp():.0f}"'
+        return ranged_file_response(request, job.file, job.download_name, content_type, etag)
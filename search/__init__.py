@@ -0,0 +1,8 @@
+"""
+Full-text search for campaigns and organisations.
+
+Documents are kept in a single `search_index` table, an FTS5 virtual table
+on SQLite or a tsvector/GIN table on PostgreSQL, and updated by model
+signals. Use `search.index.search_ids()` or `search_queryset()` from
+views, or `search.filters.FullTextSearchFilter` from DRF viewsets.
+"""
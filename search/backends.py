@@ -0,0 +1,123 @@
+"""
+Database-specific storage for the search index.
+
+SQLite uses an FTS5 virtual table ranked with bm25(); PostgreSQL uses a
+table with a generated, weighted tsvector column behind a GIN index, ranked
+with ts_rank(). Both give titles more weight than bodies and match every
+query term as a prefix. Other databases have no backend, and callers fall
+back to plain filtering.
+"""
+import re
+
+TABLE = 'search_index'
+
+# Cap on query terms, so pathological input cannot build huge queries
+MAX_TERMS = 8
+
+
+def query_terms(query):
+    """Split user input into lower-case word terms, dropping punctuation."""
+    return re.findall(r'\w+', (query or '').lower())[:MAX_TERMS]
+
+
+class SQLiteBackend:
+    vendor = 'sqlite'
+
+    def create(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+            "kind UNINDEXED, title, body, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+
+    def drop(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+    def upsert(self, cursor, doc_id, kind, title, body):
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [doc_id])
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, kind, title, body) VALUES (%s, %s, %s, %s)',
+            [doc_id, kind, title, body],
+        )
+
+    def delete(self, cursor, doc_id):
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [doc_id])
+
+    def clear(self, cursor, kind):
+        cursor.execute(f'DELETE FROM {TABLE} WHERE kind = %s', [kind])
+
+    def match(self, terms):
+        # Every term must match, each as a prefix ("camp"* finds "campaign")
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    def matching_sql(self, kind, terms):
+        """SQL and params selecting every `kind` match as `doc_id`, unranked."""
+        return f'SELECT rowid AS doc_id FROM {TABLE} WHERE {TABLE} MATCH %s AND kind = %s', [self.match(terms), kind]
+
+    def search(self, cursor, kind, terms, limit, candidates=None):
+        sql, params = self.matching_sql(kind, terms)
+        if candidates is not None:
+            sql, params = f'{sql} AND rowid IN ({candidates[0]})', params + list(candidates[1])
+        cursor.execute(f'{sql} ORDER BY bm25({TABLE}, 0.0, 10.0, 1.0) LIMIT %s', params + [limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+class PostgreSQLBackend:
+    vendor = 'postgresql'
+
+    def create(self, cursor):
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {TABLE} ("
+            "id bigint PRIMARY KEY, "
+            "kind varchar(20) NOT NULL, "
+            "title text NOT NULL, "
+            "body text NOT NULL, "
+            "document tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', title), 'A') || "
+            "setweight(to_tsvector('simple', body), 'B')) STORED)"
+        )
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {TABLE}_document_idx ON {TABLE} USING GIN (document)')
+
+    def drop(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+    def upsert(self, cursor, doc_id, kind, title, body):
+        cursor.execute(
+            f'INSERT INTO {TABLE} (id, kind, title, body) VALUES (%s, %s, %s, %s) '
+            'ON CONFLICT (id) DO UPDATE SET kind = EXCLUDED.kind, title = EXCLUDED.title, body = EXCLUDED.body',
+            [doc_id, kind, title, body],
+        )
+
+    def delete(self, cursor, doc_id):
+        cursor.execute(f'DELETE FROM {TABLE} WHERE id = %s', [doc_id])
+
+    def clear(self, cursor, kind):
+        cursor.execute(f'DELETE FROM {TABLE} WHERE kind = %s', [kind])
+
+    def match(self, terms):
+        return ' & '.join(f'{term}:*' for term in terms)
+
+    def matching_sql(self, kind, terms):
+        """SQL and params selecting every `kind` match as `doc_id`, unranked."""
+        return (
+            f"SELECT id AS doc_id FROM {TABLE} WHERE kind = %s AND document @@ to_tsquery('simple', %s)",
+            [kind, self.match(terms)],
+        )
+
+    def search(self, cursor, kind, terms, limit, candidates=None):
+        sql, params = (
+            f"SELECT id FROM {TABLE}, to_tsquery('simple', %s) query WHERE kind = %s AND document @@ query",
+            [self.match(terms), kind],
+        )
+        if candidates is not None:
+            sql, params = f'{sql} AND id IN ({candidates[0]})', params + list(candidates[1])
+        cursor.execute(f'{sql} ORDER BY ts_rank(document, query) DESC, id LIMIT %s', params + [limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+BACKENDS = {backend.vendor: backend for backend in (SQLiteBackend(), PostgreSQLBackend())}
+
+
+def get_backend(connection):
+    """Return the search backend for `connection`, or None if unsupported."""
+    return BACKENDS.get(connection.vendor)
@@ -0,0 +1,44 @@
+"""
+What gets indexed.
+
+Each searchable model is registered under a short kind with a numeric code.
+Index rows are keyed by `object_id * KIND_SLOTS + code`, so one integer
+identifies a document, and deleting or replacing it is a primary-key
+lookup on every backend.
+"""
+from collections import namedtuple
+
+from django.utils.html import strip_tags
+
+KIND_SLOTS = 8
+
+Document = namedtuple('Document', ['kind', 'code', 'model', 'title', 'body'])
+
+
+def campaign_body(campaign):
+    return ' '.join(filter(None, [strip_tags(campaign.description or ''), campaign.category]))
+
+
+def organisation_body(organisation):
+    return strip_tags(organisation.mission or '')
+
+
+DOCUMENTS = {
+    'campaign': Document('campaign', 1, 'campaigns.Campaign', lambda campaign: campaign.title, campaign_body),
+    'organisation': Document('organisation', 2, 'organizations.Organisation', lambda org: org.name, organisation_body),
+}
+
+MODEL_KINDS = {document.model: kind for kind, document in DOCUMENTS.items()}
+
+
+def kind_for_model(model):
+    """Return the registered kind for a model class, or None."""
+    return MODEL_KINDS.get(model._meta.label)
+
+
+def document_id(kind, object_id):
+    return int(object_id) * KIND_SLOTS + DOCUMENTS[kind].code
+
+
+def object_id(doc_id):
+    return doc_id // KIND_SLOTS
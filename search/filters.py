@@ -0,0 +1,47 @@
+"""
+DRF filter backend over the full-text index.
+"""
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
+
+from .index import search_queryset
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Drop-in replacement for rest_framework.filters.SearchFilter.
+
+    Reads the same `?search=` parameter and falls back to icontains over the
+    view's `search_fields` when the database has no search backend. Results
+    come back best match first, unless an ordering backend or the paginator
+    (e.g. CursorPagination) imposes its own ordering, in which case they are
+    not ranked at all.
+    """
+    search_param = api_settings.SEARCH_PARAM
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        fallback_fields = [field.lstrip('^=@$') for field in getattr(view, 'search_fields', [])]
+        ranked = not self.is_reordered(request, queryset, view)
+        return search_queryset(queryset, query, fallback_fields=fallback_fields, ranked=ranked)
+
+    def is_reordered(self, request, queryset, view):
+        """True if the paginator or an ordering backend will replace the rank order."""
+        if getattr(getattr(view, 'paginator', None), 'ordering', None):
+            return True
+        return any(
+            backend().get_ordering(request, queryset, view)
+            for backend in getattr(view, 'filter_backends', ())
+            if hasattr(backend, 'get_ordering')
+        )
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Full-text search; every word is matched as a prefix.',
+            'schema': {'type': 'string'},
+        }]
@@ -0,0 +1,127 @@
+"""
+Reading and writing the search index.
+"""
+from django.apps import apps
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from .backends import get_backend, query_terms
+from .documents import DOCUMENTS, KIND_SLOTS, document_id, kind_for_model, object_id
+
+# Ranked matches returned by search_ids(). search_queryset() filters without
+# this cap and only uses it to rank: matches past it come last, by id
+SEARCH_RESULT_LIMIT = 500
+
+
+def is_available():
+    """True if the active database has a full-text search backend."""
+    return get_backend(connection) is not None
+
+
+def index_object(obj):
+    """Add or refresh `obj` in the index. Unregistered models are ignored."""
+    kind = kind_for_model(type(obj))
+    backend = get_backend(connection)
+    if kind is None or backend is None:
+        return
+    document = DOCUMENTS[kind]
+    with connection.cursor() as cursor:
+        backend.upsert(cursor, document_id(kind, obj.pk), kind, document.title(obj) or '', document.body(obj) or '')
+
+
+def remove_object(obj):
+    """Drop `obj` from the index."""
+    kind = kind_for_model(type(obj))
+    backend = get_backend(connection)
+    if kind is None or backend is None:
+        return
+    with connection.cursor() as cursor:
+        backend.delete(cursor, document_id(kind, obj.pk))
+
+
+def rebuild(kind, batch_size=1000):
+    """Re-index every object of `kind`; returns the number indexed."""
+    backend = get_backend(connection)
+    if backend is None:
+        return 0
+    document = DOCUMENTS[kind]
+    model = apps.get_model(document.model)
+
+    count = 0
+    with connection.cursor() as cursor:
+        backend.clear(cursor, kind)
+        for obj in model.objects.order_by('pk').iterator(chunk_size=batch_size):
+            backend.upsert(cursor, document_id(kind, obj.pk), kind, document.title(obj) or '', document.body(obj) or '')
+            count += 1
+    return count
+
+
+def candidate_doc_ids(kind, queryset):
+    """SQL and params selecting the doc ids of the objects in `queryset`."""
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    pk = connection.ops.quote_name(queryset.model._meta.pk.column)
+    return f'SELECT candidates.{pk} * {KIND_SLOTS} + {DOCUMENTS[kind].code} FROM ({sql}) candidates', params
+
+
+def search_ids(kind, query, limit=None, candidates=None):
+    """
+    Return primary keys of `kind` objects matching `query`, best first.
+
+    Every word in the query must match, as a prefix, in the title or body.
+    At most `limit` (default SEARCH_RESULT_LIMIT) ids are returned, so this
+    is for ranking and short id lists: use search_queryset() to filter
+    without a cap. With `candidates`, a queryset of `kind` objects, only
+    those are ranked, so the limit applies after the caller's filters. Returns None when no
+    backend is available, so callers can fall back to a plain filter, and
+    [] for a query with no searchable words.
+    """
+    backend = get_backend(connection)
+    if backend is None:
+        return None
+    terms = query_terms(query)
+    if not terms:
+        return []
+    if limit is None:
+        limit = SEARCH_RESULT_LIMIT
+    if candidates is not None:
+        candidates = candidate_doc_ids(kind, candidates)
+    with connection.cursor() as cursor:
+        return [object_id(doc_id) for doc_id in backend.search(cursor, kind, terms, limit, candidates)]
+
+
+def search_queryset(queryset, query, fallback_fields=(), ranked=True):
+    """
+    Narrow `queryset` to objects matching `query`, ordered by rank.
+
+    Matching runs inside the queryset's own SQL, so every match that passes
+    its filters is returned. Ranking the matches costs a second query and a
+    CASE over the best SEARCH_RESULT_LIMIT; pass ranked=False when the
+    caller imposes its own ordering (e.g. keyset pagination). Without a
+    search backend the query is applied as icontains over `fallback_fields`
+    instead.
+    """
+    kind = kind_for_model(queryset.model)
+    backend = get_backend(connection)
+    if backend is None:
+        condition = Q()
+        for field in fallback_fields:
+            condition |= Q(**{f'{field}__icontains': query})
+        return queryset.filter(condition) if fallback_fields else queryset
+
+    terms = query_terms(query)
+    if not terms:
+        return queryset.none()
+    sql, params = backend.matching_sql(kind, terms)
+    queryset = queryset.filter(pk__in=RawSQL(f'SELECT matches.doc_id / {KIND_SLOTS} FROM ({sql}) matches', params))
+    if not ranked:
+        return queryset
+
+    ids = search_ids(kind, query, candidates=queryset)
+    if ids:
+        queryset = queryset.order_by(Case(
+            *[When(pk=pk, then=Value(position)) for position, pk in enumerate(ids)],
+            default=Value(len(ids)),
+            output_field=IntegerField(),
+        ), 'pk')
+    return queryset
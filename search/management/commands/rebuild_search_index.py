@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from search.documents import DOCUMENTS
+from search.index import is_available, rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index for campaigns and organisations.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'kinds',
+            nargs='*',
+            help=f"Document kinds to rebuild: {', '.join(sorted(DOCUMENTS))} (default: all).",
+        )
+
+    def handle(self, *args, **options):
+        if not is_available():
+            raise CommandError('The configured database has no full-text search backend.')
+
+        unknown = set(options['kinds']) - set(DOCUMENTS)
+        if unknown:
+            raise CommandError(f"Unknown document kind(s): {', '.join(sorted(unknown))}")
+
+        for kind in options['kinds'] or sorted(DOCUMENTS):
+            count = rebuild(kind)
+            self.stdout.write(self.style.SUCCESS(f'Indexed {count} {kind} document(s).'))
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+from search.backends import get_backend
+from search.documents import DOCUMENTS, document_id
+
+
+def create_index(apps, schema_editor):
+    backend = get_backend(schema_editor.connection)
+    if backend is None:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        backend.create(cursor)
+        for kind, document in DOCUMENTS.items():
+            model = apps.get_model(document.model)
+            for obj in model.objects.order_by('pk').iterator():
+                backend.upsert(cursor, document_id(kind, obj.pk), kind, document.title(obj) or '', document.body(obj) or '')
+
+
+def drop_index(apps, schema_editor):
+    backend = get_backend(schema_editor.connection)
+    if backend is None:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        backend.drop(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0003_hot_query_indexes'),
+        ('organizations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,25 @@
+"""
+Signal handlers that keep the search index in step with its models.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from campaigns.models import Campaign
+from organizations.models import Organisation
+
+from .index import index_object, remove_object
+
+
+@receiver(post_save, sender=Campaign)
+@receiver(post_save, sender=Organisation)
+def update_search_document(sender, instance, raw=False, **kwargs):
+    # Fixture loading bypasses the index; run `rebuild_search_index` after
+    if raw:
+        return
+    index_object(instance)
+
+
+@receiver(post_delete, sender=Campaign)
+@receiver(post_delete, sender=Organisation)
+def remove_search_document(sender, instance, **kwargs):
+    remove_object(instance)
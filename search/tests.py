@@ -0,0 +1,106 @@
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from campaigns.models import Campaign
+from core.pagination import CreatedAtCursorPagination
+from organizations.models import Organisation
+from search.backends import TABLE
+from search.filters import FullTextSearchFilter
+from search.index import search_ids, search_queryset
+
+CustomUser = get_user_model()
+
+
+class SearchIndexTests(TestCase):
+
+    def setUp(self):
+        self.organisation = Organisation.objects.create(name='Riverside Literacy Trust', mission='Books for every child')
+        self.reading = self.create_campaign('Reading Corners', 'Build reading corners in rural schools')
+        self.water = self.create_campaign('Clean Water Wells', 'Drill wells so schools have reading light and water')
+
+    def create_campaign(self, title, description):
+        return Campaign.objects.create(
+            title=title, slug=title.lower().replace(' ', '-'), description=description,
+            funding_goal=1000, category='education', organisation=self.organisation, status='active',
+        )
+
+    def test_saved_objects_are_searchable_by_prefix(self):
+        self.assertEqual(search_ids('campaign', 'wel'), [self.water.pk])
+        self.assertEqual(search_ids('organisation', 'liter'), [self.organisation.pk])
+
+    def test_title_matches_rank_above_body_matches(self):
+        self.assertEqual(search_ids('campaign', 'reading'), [self.reading.pk, self.water.pk])
+
+    def test_every_term_must_match(self):
+        self.assertEqual(search_ids('campaign', 'schools drill'), [self.water.pk])
+        self.assertEqual(search_ids('campaign', 'schools piano'), [])
+        self.assertEqual(search_ids('campaign', '  "*( '), [])
+
+    def test_updates_and_deletes_are_reflected(self):
+        self.water.title = 'Solar Lamps'
+        self.water.save()
+        self.assertEqual(search_ids('campaign', 'solar'), [self.water.pk])
+        self.assertEqual(search_ids('campaign', 'clean'), [])
+
+        self.water.delete()
+        self.assertEqual(search_ids('campaign', 'solar'), [])
+
+    def test_search_queryset_orders_by_rank(self):
+        results = search_queryset(Campaign.objects.all(), 'reading')
+        self.assertEqual(list(results), [self.reading, self.water])
+
+    def test_result_limit_applies_after_the_callers_filters(self):
+        # The closed campaign outranks the active body match
+        self.reading.status = 'closed'
+        self.reading.save()
+
+        with mock.patch('search.index.SEARCH_RESULT_LIMIT', 1):
+            results = search_queryset(Campaign.objects.filter(status='active'), 'reading')
+            unranked = search_queryset(Campaign.objects.all(), 'reading', ranked=False)
+
+            self.assertEqual(list(results), [self.water])
+            self.assertEqual(set(unranked), {self.reading, self.water})
+
+    def test_drf_filter_skips_ranking_under_cursor_pagination(self):
+        request = Request(APIRequestFactory().get('/api/v1/campaigns/', {'search': 'reading'}))
+        view = SimpleNamespace(search_fields=['title'], paginator=CreatedAtCursorPagination(), filter_backends=[])
+
+        results = FullTextSearchFilter().filter_queryset(request, Campaign.objects.all(), view)
+
+        self.assertNotIn('CASE', str(results.query).upper())
+        self.assertEqual(set(results), {self.reading, self.water})
+
+    def test_rebuild_command_restores_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE}')
+        self.assertEqual(search_ids('campaign', 'reading'), [])
+
+        call_command('rebuild_search_index', stdout=StringIO())
+
+        self.assertEqual(search_ids('campaign', 'reading'), [self.reading.pk, self.water.pk])
+
+    def test_drf_filter_backend(self):
+        request = Request(APIRequestFactory().get('/api/v1/campaigns/', {'search': 'clean wat'}))
+        view = SimpleNamespace(search_fields=['title', 'description'])
+
+        results = FullTextSearchFilter().filter_queryset(request, Campaign.objects.all(), view)
+
+        self.assertEqual(list(results), [self.water])
+
+    def test_admin_organisation_search(self):
+        Organisation.objects.create(name='Harbour Rescue')
+        CustomUser.objects.create_superuser(username='admin', password='password123', email='admin@example.com')
+        self.client.login(username='admin', password='password123')
+
+        response = self.client.get(reverse('core_admin:admin_organisations'), {'q': 'riversi'})
+
+        self.assertEqual([org.pk for org in response.context['organisations']], [self.organisation.pk])
@@ -8,6 +8,6 @@ class TagsConfig(AppConfig):
     
     def ready(self):
         """
-        Perform initialization tasks when the app is ready.
+        Keep the tag matching index in step with campaign tagging.
         """
-        pass  # Add any app startup code here if needed
+        from . import signals  # noqa: F401
@@ -0,0 +1,159 @@
+"""
+Match campaigns that carry every one of a set of tags.
+
+Chaining one `.filter(tags__slug=...)` per tag adds a join on the M2M table
+for each tag and needs `.distinct()`. This module resolves "has all of
+these tags" in one pass instead:
+
+* From an in-memory tag -> campaign-id index, intersected with set
+  operations, when the index is warm and the answer is small enough to
+  hand to the database as an id list.
+* Otherwise with a single `tag_id IN (...)` scan of the M2M table grouped
+  by campaign with `HAVING COUNT(*) = n`.
+
+The index is cached per process and rebuilt lazily after tags or campaign
+tagging change (see tags.signals), so common intersections cost no
+campaign-table work beyond fetching the final rows.
+"""
+import threading
+from collections import OrderedDict
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Tag
+
+VERSION_CACHE_KEY = 'tags:campaign-index-version'
+
+# Skip the in-memory index for very large tagging tables
+MAX_INDEXED_PAIRS = 200000
+
+# Largest id list passed to the database as `pk IN (...)`
+MAX_ID_LIST = 5000
+
+# Intersections remembered per index build
+MAX_CACHED_INTERSECTIONS = 256
+
+
+def _campaign_tags():
+    return apps.get_model('campaigns', 'Campaign').tags.through
+
+
+def current_version():
+    """Return the shared index version, bumped whenever tagging changes."""
+    return cache.get_or_set(VERSION_CACHE_KEY, 1, timeout=None)
+
+
+def invalidate():
+    """Mark every process's in-memory index as stale."""
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 2, timeout=None)
+
+
+class TagIndex:
+    """Tag id -> frozenset of campaign ids, with memoised intersections"""
+
+    def __init__(self, version, campaigns_by_tag):
+        self.version = version
+        self.campaigns_by_tag = campaigns_by_tag
+        self._intersections = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, version):
+        """Load the whole tagging table, or return None if it is too large."""
+        pairs = list(
+            _campaign_tags().objects.order_by().values_list('tag_id', 'campaign_id')[:MAX_INDEXED_PAIRS + 1]
+        )
+        if len(pairs) > MAX_INDEXED_PAIRS:
+            return None
+
+        campaigns_by_tag = {}
+        for tag_id, campaign_id in pairs:
+            campaigns_by_tag.setdefault(tag_id, set()).add(campaign_id)
+        return cls(version, {tag_id: frozenset(ids) for tag_id, ids in campaigns_by_tag.items()})
+
+    def campaign_ids(self, tag_ids):
+        """Return the ids of campaigns tagged with every tag in `tag_ids`."""
+        key = frozenset(tag_ids)
+        with self._lock:
+            if key in self._intersections:
+                self._intersections.move_to_end(key)
+                return self._intersections[key]
+
+        # Intersect smallest first so the working set shrinks fastest
+        sets = sorted((self.campaigns_by_tag.get(tag_id, frozenset()) for tag_id in key), key=len)
+        result = frozenset(sets[0].intersection(*sets[1:])) if sets else frozenset()
+
+        with self._lock:
+            self._intersections[key] = result
+            if len(self._intersections) > MAX_CACHED_INTERSECTIONS:
+                self._intersections.popitem(last=False)
+        return result
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Return the in-memory index for the current version, or None."""
+    global _index
+    version = current_version()
+    index = _index
+    if index is None or index.version != version:
+        with _index_lock:
+            if _index is None or _index.version != version:
+                # An index without data records that the table was too large
+                _index = TagIndex.build(version) or TagIndex(version, None)
+            index = _index
+    return index if index.campaigns_by_tag is not None else None
+
+
+def resolve_tag_ids(values, field='slug'):
+    """
+    Map tag slugs (or ids, with field='id') to tag ids in one query.
+
+    Returns None if any value names no tag, since then nothing can match.
+    """
+    values = {str(value) for value in values if value}
+    if field == 'id':
+        values = {value for value in values if value.isdigit()}
+    tag_ids = set(Tag.objects.filter(**{f'{field}__in': values}).values_list('id', flat=True))
+    if len(tag_ids) < len(values):
+        return None
+    return tag_ids
+
+
+def filter_by_all_tags(queryset, values, field='slug'):
+    """
+    Narrow a Campaign queryset to campaigns carrying every tag in `values`.
+
+    No duplicates are produced, so no `.distinct()` is needed afterwards.
+    """
+    values = [value for value in values if value]
+    if not values:
+        return queryset
+
+    tag_ids = resolve_tag_ids(values, field=field)
+    if not tag_ids:
+        return queryset.none()
+
+    index = get_index()
+    if index is not None:
+        campaign_ids = index.campaign_ids(tag_ids)
+        if len(campaign_ids) <= MAX_ID_LIST:
+            return queryset.filter(pk__in=campaign_ids)
+
+    matching = (
+        _campaign_tags().objects.filter(tag_id__in=tag_ids)
+        .order_by()
+        .values('campaign_id')
+        .annotate(matched=Count('tag_id'))
+        .filter(matched=len(tag_ids))
+        .values('campaign_id')
+    )
+    return queryset.filter(pk__in=matching)
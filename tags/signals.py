@@ -0,0 +1,32 @@
+"""
+Signal handlers that keep the tag matching index in step with tagging.
+
+As for cached campaign pages (campaigns.signals), the version is bumped
+straight away and again once the transaction commits, so a concurrent
+request cannot rebuild the index from pre-commit rows under the new version.
+"""
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete
+from django.dispatch import receiver
+
+from campaigns.models import Campaign
+
+from .matching import invalidate
+from .models import Tag
+
+
+def _invalidate():
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+@receiver(m2m_changed, sender=Campaign.tags.through)
+def campaign_tags_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        _invalidate()
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Campaign)
+def tagged_object_deleted(sender, instance, **kwargs):
+    _invalidate()
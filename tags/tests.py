@@ -0,0 +1,90 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+
+from campaigns.models import Campaign
+from funding.views import CampaignListView
+from organizations.models import Organisation
+from tags import matching
+from tags.models import Tag
+
+
+class TagMatchingTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.organisation = Organisation.objects.create(name='Green Futures')
+        self.water, self.health, self.schools = (
+            Tag.objects.create(name=name) for name in ('Water', 'Health', 'Schools')
+        )
+        self.wells = self.create_campaign('Wells', self.water, self.health)
+        self.clinic = self.create_campaign('Clinic', self.health)
+        self.taps = self.create_campaign('School Taps', self.water, self.health, self.schools)
+
+    def create_campaign(self, title, *tags):
+        campaign = Campaign.objects.create(
+            title=title, slug=title.lower().replace(' ', '-'), description=title,
+            funding_goal=1000, category='health', organisation=self.organisation, status='active',
+        )
+        campaign.tags.set(tags)
+        return campaign
+
+    def match(self, values, field='slug'):
+        return set(matching.filter_by_all_tags(Campaign.objects.all(), values, field=field))
+
+    def test_campaigns_must_have_every_tag(self):
+        self.assertEqual(self.match(['health']), {self.wells, self.clinic, self.taps})
+        self.assertEqual(self.match(['water', 'health']), {self.wells, self.taps})
+        self.assertEqual(self.match(['water', 'health', 'schools']), {self.taps})
+        self.assertEqual(self.match([str(self.water.pk), str(self.schools.pk)], field='id'), {self.taps})
+
+    def test_unknown_tag_matches_nothing(self):
+        self.assertEqual(self.match(['water', 'no-such-tag']), set())
+        self.assertEqual(self.match(['abc'], field='id'), set())
+
+    def test_no_tags_leaves_queryset_alone(self):
+        self.assertEqual(self.match([]), {self.wells, self.clinic, self.taps})
+
+    def test_sql_fallback_matches_index(self):
+        with mock.patch.object(matching, 'MAX_ID_LIST', 0):
+            self.assertEqual(self.match(['water', 'health']), {self.wells, self.taps})
+        with mock.patch.object(matching, 'MAX_INDEXED_PAIRS', 1):
+            matching.invalidate()
+            self.assertIsNone(matching.get_index())
+            self.assertEqual(self.match(['water', 'schools']), {self.taps})
+
+    def test_tagging_changes_invalidate_index(self):
+        self.assertEqual(self.match(['schools']), {self.taps})
+
+        self.wells.tags.add(self.schools)
+        self.assertEqual(self.match(['schools']), {self.wells, self.taps})
+
+        self.taps.tags.remove(self.schools)
+        self.assertEqual(self.match(['schools']), {self.wells})
+
+        self.wells.delete()
+        self.assertEqual(self.match(['schools']), set())
+
+    def test_tagging_bumps_version_again_on_commit(self):
+        # A rebuild between the change and the commit must not outlive it
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.wells.tags.add(self.schools)
+            version = matching.current_version()
+
+        self.assertEqual(callbacks, [matching.invalidate])
+        callbacks[0]()
+        self.assertGreater(matching.current_version(), version)
+
+    def test_warm_index_skips_tagging_table(self):
+        self.match(['water', 'health'])
+
+        # One query to resolve the slugs, one for the campaigns themselves
+        with self.assertNumQueries(2):
+            self.assertEqual(self.match(['water', 'health']), {self.wells, self.taps})
+
+    def test_campaign_list_filters_by_all_tags(self):
+        request = RequestFactory().get('/campaigns/', {'tags': ['water', 'schools']})
+        response = CampaignListView.as_view()(request)
+
+        self.assertEqual(list(response.context_data['campaigns']), [self.taps])
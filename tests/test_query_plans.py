@@ -0,0 +1,71 @@
+"""
+Query-plan regression tests for the hot query shapes.
+
+Each test runs EXPLAIN QUERY PLAN on SQLite for a query the views issue on
+every page load and fails if any table comes back as a full scan, which
+means a composite index in Meta.indexes has been lost or no longer matches
+the filter/ordering.
+"""
+import unittest
+
+from django.db import connection
+from django.test import TestCase
+
+from accounts.models import CustomUser
+from campaigns.models import Campaign
+from donations.models import Donation
+from organizations.models import Organisation
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite-specific')
+class HotQueryPlanTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organisation = Organisation.objects.create(name='Plan Org')
+        cls.donor = CustomUser.objects.create_user(username='plandonor', password='password123', role='donor')
+        cls.campaign = Campaign.objects.create(
+            title='Plan Campaign', slug='plan-campaign', description='Plan',
+            funding_goal=1000, category='education', organisation=cls.organisation, status='active',
+        )
+
+    def explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertNoFullScan(self, queryset):
+        plan = self.explain(queryset)
+        scans = [step for step in plan if step.startswith('SCAN')]
+        self.assertEqual(scans, [], 'Full scan in query plan:\n' + '\n'.join(plan))
+
+    def test_campaign_recent_donations(self):
+        # campaigns.views.CampaignDetailView
+        self.assertNoFullScan(Donation.objects.filter(campaign=self.campaign).order_by('-created_at')[:5])
+
+    def test_donor_donation_history(self):
+        # donations.views.DonorDonationsListView
+        self.assertNoFullScan(Donation.objects.filter(donor=self.donor).order_by('-created_at'))
+
+    def test_active_campaign_list(self):
+        # campaigns.views.CampaignListView, funding.admin_views.AdminActiveCampaignsListView
+        self.assertNoFullScan(Campaign.objects.filter(status='active').order_by('-created_at'))
+
+    def test_pending_campaign_queue(self):
+        # funding.admin_views.AdminCampaignQueueView
+        self.assertNoFullScan(Campaign.objects.filter(status='pending').order_by('created_at'))
+
+    def test_organisation_campaigns_by_status(self):
+        # funding.views.OrgDashboardView / CampaignCreateView pending limit
+        self.assertNoFullScan(Campaign.objects.filter(organisation=self.organisation, status='pending'))
+
+    def test_organisation_donations(self):
+        # donations.views.OrgDonationsListView
+        self.assertNoFullScan(
+            Donation.objects.filter(campaign__organisation=self.organisation).order_by('-created_at')
+        )
+
+    def test_users_by_role(self):
+        # funding.admin_views.AdminDonorsListView and dashboard counters
+        self.assertNoFullScan(CustomUser.objects.filter(role='donor'))
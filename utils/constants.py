@@ -81,6 +81,8 @@ class Messages:
     
     # Donation messages
     DONATION_SUCCESSFUL = "Thank you for your donation!"
+    EXPORT_REQUESTED = "Your export has been queued. It will be ready to download shortly."
+    EXPORT_IN_PROGRESS = "An identical export is already in progress."
     
     # Error messages
     ERROR_GENERIC = "An error occurred. Please try again."